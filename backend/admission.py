@@ -0,0 +1,125 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+# Per-client token bucket: sustained requests/second and burst size
+DEFAULT_RATE = float(os.getenv("ADMISSION_RATE", "0.5"))
+DEFAULT_BURST = int(os.getenv("ADMISSION_BURST", "5"))
+# Longest a request may wait for its client's next token before being shed
+DEFAULT_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "2.0"))
+# Shared upstream (LLM) concurrency and how many requests may queue for it
+DEFAULT_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "16"))
+DEFAULT_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+
+
+def client_key(request: Request, user_id: Optional[str] = None) -> str:
+    """Admission key: the caller's user_id when given, else its IP"""
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Reserve the next token; seconds to wait for it, or None if that exceeds max_wait"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+class AdmissionController:
+    """Per-client rate limiting plus a bounded queue in front of the shared upstream"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, max_wait: float = DEFAULT_MAX_WAIT,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                 max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_clients = max_clients
+
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._slots: Optional[asyncio.Condition] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.shed = 0
+        self.priority_admitted = 0
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _reject(self, retry_after: float, reason: str):
+        self.shed += 1
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests: {reason}",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    @asynccontextmanager
+    async def admit(self, key: str, priority: bool = False):
+        """Hold an upstream slot for the duration of the block, or raise 429
+
+        Priority (crisis) requests skip the client's bucket and the queue.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+
+        if priority:
+            self.priority_admitted += 1
+        else:
+            bucket = self._bucket(key)
+            wait = bucket.reserve(self.max_wait)
+            if wait is None:
+                self._reject(1 / self.rate, "rate limit exceeded")
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            if self.in_flight >= self.max_concurrent:
+                if self.queued >= self.max_queue:
+                    self._reject(1, "server busy")
+                self.queued += 1
+                try:
+                    async with self._slots:
+                        await asyncio.wait_for(
+                            self._slots.wait_for(lambda: self.in_flight < self.max_concurrent),
+                            timeout=self.max_wait
+                        )
+                except asyncio.TimeoutError:
+                    self._reject(1, "server busy")
+                finally:
+                    self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            async with self._slots:
+                self._slots.notify(1)
@@ -1,21 +1,37 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import cv2
 import numpy as np
-import base64
-import io
-from PIL import Image
-import requests
 import json
-from groq import Groq
-import mediapipe as mp
-from typing import Dict, List
+from typing import Dict, List, Optional
 import asyncio
 import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from admission import AdmissionController, client_key
+from batching import MicroBatcher
+from crisis import is_crisis
+from emotions import EMOTIONS, UNKNOWN_CODE
+from llm import get_groq_client, shared_clients
+from metrics import instrument, record_tokens, stage_timer, track_queue
+from profiling import enable_profiling
+from readiness import WARMUP_ON_STARTUP, Readiness
+from state_store import STATE, StateStore
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with shared_clients():
+        if WARMUP_ON_STARTUP:
+            readiness.warm("facemesh", load_vision)
+            if GROUP_WARMUP:
+                readiness.warm("facemesh_group", load_group_vision)
+        yield
 
 # Initialize FastAPI app
-app = FastAPI(title="AI Mirror API", version="1.0.0")
+app = FastAPI(title="AI Mirror API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -26,122 +42,300 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Groq client (you'll need to add your API key)
-groq_client = Groq(api_key="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")
-
-# Initialize MediaPipe
-mp_face_mesh = mp.solutions.face_mesh
-mp_drawing = mp.solutions.drawing_utils
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    refine_landmarks=True,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+# Shared Groq client (key and base URL come from llm.py / the environment)
+groq_client = get_groq_client()
+
+# Per-client admission control in front of the Groq calls
+admission = AdmissionController()
+
+# Request histograms, per-stage timers and /metrics
+instrument(app, "aimirror")
+# Opt-in per-request sampling profiler (PROFILE_SAMPLE_RATE / PROFILE_TOKEN)
+enable_profiling(app, "aimirror")
+stage = stage_timer("aimirror")
+track_queue("aimirror", "admission_queued", lambda: admission.queued)
+track_queue("aimirror", "admission_in_flight", lambda: admission.in_flight)
+
+# cv2 and MediaPipe are loaded on first use or by the startup warmup, not at import.
+# FaceMesh tracks faces across frames inside one process, so with several workers route a
+# session's frames to the same worker (sticky by session_id); history and trends live in the
+# shared state store and are consistent either way.
+cv2 = None
+face_mesh = None
+group_face_mesh = None
+_vision_lock = threading.Lock()
+readiness = Readiness("aimirror")
+
+# Size of the blank frame used to warm the FaceMesh graph
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+# Group mode (/analyze-frame?group=true): faces detected per frame, and whether to warm its FaceMesh at startup
+GROUP_MAX_FACES = int(os.getenv("MIRROR_GROUP_MAX_FACES", "8"))
+GROUP_WARMUP = os.getenv("MIRROR_GROUP_WARMUP", "0") == "1"
+
+def _build_face_mesh(max_faces: int):
+    import mediapipe as mp
+    mesh = mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=max_faces,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+    # The first process() call initializes the graph; pay for it here instead of in a request
+    mesh.process(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8))
+    return mesh
+
+def load_vision():
+    """Import cv2/MediaPipe and build FaceMesh once, pushing a dummy frame through it"""
+    global cv2, face_mesh
+    with _vision_lock:
+        if face_mesh is None:
+            import cv2 as cv2_module
+            mesh = _build_face_mesh(1)
+            cv2 = cv2_module
+            face_mesh = mesh
+    return face_mesh
 
-# Emotion mapping based on facial landmarks
-EMOTION_MAPPING = {
-    "happy": [0.7, 0.1, 0.1, 0.05, 0.02, 0.03],
-    "sad": [0.1, 0.7, 0.1, 0.05, 0.02, 0.03],
-    "angry": [0.1, 0.1, 0.7, 0.05, 0.02, 0.03],
-    "surprised": [0.1, 0.1, 0.1, 0.65, 0.02, 0.03],
-    "fearful": [0.1, 0.1, 0.1, 0.05, 0.62, 0.03],
-    "neutral": [0.2, 0.2, 0.2, 0.2, 0.1, 0.1]
+def load_group_vision():
+    """FaceMesh for group mode, built on first use (or at startup with MIRROR_GROUP_WARMUP=1)"""
+    global group_face_mesh
+    load_vision()
+    with _vision_lock:
+        if group_face_mesh is None:
+            group_face_mesh = _build_face_mesh(GROUP_MAX_FACES)
+    return group_face_mesh
+
+# Landmarks the classifier and tracker read, in the column order of key_points()
+KEY_LANDMARKS = {
+    "left_eye": 33,
+    "right_eye": 362,
+    "mouth_left": 61,
+    "mouth_right": 291,
+    "mouth_top": 13,
+    "mouth_bottom": 14,
+    "nose_tip": 1,
 }
+KEY_INDEX = {name: i for i, name in enumerate(KEY_LANDMARKS)}
+
+def key_points(faces) -> np.ndarray:
+    """(faces, key landmarks, xy) array from MediaPipe landmark lists"""
+    return np.array(
+        [[(landmarks[i].x, landmarks[i].y) for i in KEY_LANDMARKS.values()] for landmarks in faces],
+        dtype=float
+    ).reshape(-1, len(KEY_LANDMARKS), 2)
+
+def classify_faces(points: np.ndarray):
+    """Emotion and confidence for every face at once, from mouth geometry.
+
+    Simple rule-based detection - you can enhance with ML models.
+    """
+    mouth_width = np.abs(points[:, KEY_INDEX["mouth_left"], 0] - points[:, KEY_INDEX["mouth_right"], 0])
+    mouth_height = np.abs(points[:, KEY_INDEX["mouth_top"], 1] - points[:, KEY_INDEX["mouth_bottom"], 1])
+    
+    conditions = [
+        (mouth_height > 0.02) & (mouth_width > 0.05),
+        mouth_height < 0.01,
+        mouth_width < 0.03,
+    ]
+    emotions = np.select(conditions, ["happy", "sad", "angry"], default="neutral")
+    confidences = np.select(conditions, [0.8, 0.7, 0.6], default=0.5)
+    return emotions.tolist(), confidences
+
+# Frames kept per session
+HISTORY_LIMIT = 100
 
 class EmotionAnalyzer:
-    def __init__(self):
-        self.emotion_history = []
+    def __init__(self, store: StateStore = STATE):
+        # Per-session history and counters live in the state store so every worker sees them
+        self.store = store
+
+    def record(self, session_id: str, entry: Dict) -> None:
+        self.store.append(f"aimirror:history:{session_id}", entry, HISTORY_LIMIT)
+        self.store.incr(f"aimirror:counts:{session_id}", entry["emotion"])
+
+    def history(self, session_id: str, limit: int = HISTORY_LIMIT) -> List[Dict]:
+        return self.store.tail(f"aimirror:history:{session_id}", limit)
+
+    def history_length(self, session_id: str) -> int:
+        return self.store.length(f"aimirror:history:{session_id}")
+
+    def emotion_counts(self, session_id: str) -> Dict[str, int]:
+        """All-time frame count per emotion for a session"""
+        return self.store.counters(f"aimirror:counts:{session_id}")
     
     def analyze_facial_landmarks(self, landmarks) -> Dict:
         """Analyze facial landmarks to detect emotions"""
         if not landmarks:
             return {"emotion": "neutral", "confidence": 0.5}
         
-        # Simple emotion detection based on landmark positions
-        # This is a simplified version - you can enhance with ML models
-        
-        # Get key facial points
-        left_eye = landmarks[33]
-        right_eye = landmarks[362]
-        mouth_left = landmarks[61]
-        mouth_right = landmarks[291]
-        mouth_top = landmarks[13]
-        mouth_bottom = landmarks[14]
-        
-        # Calculate ratios for emotion detection
-        eye_distance = abs(left_eye.x - right_eye.x)
-        mouth_width = abs(mouth_left.x - mouth_right.x)
-        mouth_height = abs(mouth_top.y - mouth_bottom.y)
-        
-        # Simple emotion classification
-        if mouth_height > 0.02 and mouth_width > 0.05:
-            emotion = "happy"
-            confidence = 0.8
-        elif mouth_height < 0.01:
-            emotion = "sad"
-            confidence = 0.7
-        elif mouth_width < 0.03:
-            emotion = "angry"
-            confidence = 0.6
-        else:
-            emotion = "neutral"
-            confidence = 0.5
-        
-        return {"emotion": emotion, "confidence": confidence}
+        emotions, confidences = classify_faces(key_points([landmarks]))
+        return {"emotion": emotions[0], "confidence": float(confidences[0])}
     
-    def get_emotion_trends(self) -> Dict:
+    def get_emotion_trends(self, session_id: str) -> Dict:
         """Get emotional trends over time"""
-        if len(self.emotion_history) < 2:
+        recent_emotions = self.history(session_id, 10)
+        if len(recent_emotions) < 2:
             return {"trend": "stable", "dominant_emotion": "neutral"}
         
-        recent_emotions = self.emotion_history[-10:]
-        emotion_counts = {}
-        
-        for emotion_data in recent_emotions:
-            emotion = emotion_data["emotion"]
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        codes = EMOTIONS.codes_for([e["emotion"] for e in recent_emotions])
+        codes = codes[codes != UNKNOWN_CODE]
+        if not codes.size:
+            return {"trend": "stable", "dominant_emotion": "neutral"}
         
-        dominant_emotion = max(emotion_counts, key=emotion_counts.get)
+        counts = np.bincount(codes, minlength=len(EMOTIONS))
+        # Codes in order of first appearance, so ties go to the emotion seen first
+        _, first_seen = np.unique(codes, return_index=True)
+        seen = codes[np.sort(first_seen)]
+        dominant = EMOTIONS.labels[int(seen[np.argmax(counts[seen])])]
         
         return {
-            "trend": "improving" if dominant_emotion == "happy" else "declining" if dominant_emotion == "sad" else "stable",
-            "dominant_emotion": dominant_emotion,
-            "emotion_distribution": emotion_counts
+            "trend": "improving" if dominant == "happy" else "declining" if dominant == "sad" else "stable",
+            "dominant_emotion": dominant,
+            "emotion_distribution": {EMOTIONS.labels[c]: int(counts[c]) for c in seen}
         }
 
 # Initialize emotion analyzer
 emotion_analyzer = EmotionAnalyzer()
 
+# A face keeps its ID if its nose tip moved less than this (in normalized frame coordinates)
+TRACK_MAX_DISTANCE = float(os.getenv("MIRROR_TRACK_MAX_DISTANCE", "0.15"))
+# Seconds a face may go undetected before its ID is retired
+TRACK_GRACE = float(os.getenv("MIRROR_TRACK_GRACE", "3"))
+# Seconds an idle session's tracker state is kept
+TRACK_STATE_TTL = 3600
+
+# Client-chosen session ids; "/" is excluded so no session id can look like a face_session() key
+SESSION_ID_PATTERN = r"^[A-Za-z0-9_.-]{1,128}$"
+
+def face_session(session_id: str, face_id: int) -> str:
+    """History key of one tracked face in a group session"""
+    return f"{session_id}/face-{face_id}"
+
+class FaceTracker:
+    """Stable per-session face IDs by greedy nearest-centroid matching against the last positions"""
+
+    def __init__(self, store: StateStore = STATE, max_distance: float = TRACK_MAX_DISTANCE,
+                 grace: float = TRACK_GRACE):
+        self.store = store
+        self.max_distance = max_distance
+        self.grace = grace
+
+    def assign(self, session_id: str, centers: np.ndarray, now: float) -> List[int]:
+        """IDs for the faces at centers (n, 2); unmatched faces get new IDs"""
+        ids = [None] * len(centers)
+
+        def step(state):
+            state = state or {"next_id": 1, "tracks": []}
+            tracks = [t for t in state["tracks"] if now - t["seen"] <= self.grace]
+            
+            if tracks and len(centers):
+                previous = np.array([[t["x"], t["y"]] for t in tracks])
+                distances = np.linalg.norm(centers[:, None, :] - previous[None, :, :], axis=2)
+                matched_faces, matched_tracks = set(), set()
+                # Closest pairs first
+                for flat in np.argsort(distances, axis=None):
+                    face, track = divmod(int(flat), len(tracks))
+                    if distances[face, track] > self.max_distance:
+                        break
+                    if face in matched_faces or track in matched_tracks:
+                        continue
+                    ids[face] = tracks[track]["id"]
+                    matched_faces.add(face)
+                    matched_tracks.add(track)
+            
+            next_id = state["next_id"]
+            for face in range(len(centers)):
+                if ids[face] is None:
+                    ids[face] = next_id
+                    next_id += 1
+            
+            seen = set(ids)
+            tracks = [t for t in tracks if t["id"] not in seen] + [
+                {"id": face_id, "x": float(x), "y": float(y), "seen": now}
+                for face_id, (x, y) in zip(ids, centers)
+            ]
+            return {"next_id": next_id, "tracks": tracks}
+
+        # One atomic step, so frames of a session handled by two workers can't hand out the same ID
+        self.store.update(f"aimirror:tracks:{session_id}", step, ttl=TRACK_STATE_TTL)
+        return ids
+
+face_tracker = FaceTracker()
+
+def analyze_group(faces, session_id: str, timestamp: float) -> Dict:
+    """Classify every detected face in one vectorized pass and attach tracked IDs"""
+    with stage("landmark_analysis"):
+        points = key_points([face.landmark for face in faces])
+        emotions, confidences = classify_faces(points)
+    with stage("tracking"):
+        face_ids = face_tracker.assign(session_id, points[:, KEY_INDEX["nose_tip"]], timestamp)
+    
+    results = []
+    for face_id, emotion, confidence, center in zip(face_ids, emotions, confidences.tolist(),
+                                                    points[:, KEY_INDEX["nose_tip"]].tolist()):
+        entry = {"emotion": emotion, "confidence": confidence, "timestamp": timestamp}
+        emotion_analyzer.record(face_session(session_id, face_id), entry)
+        results.append({"face_id": face_id, "emotion": emotion, "confidence": confidence, "center": center})
+    
+    group_emotion = max(emotions, key=emotions.count) if emotions else "neutral"
+    return {
+        "face_detected": bool(results),
+        "faces_count": len(results),
+        "faces": results,
+        "group_emotion": group_emotion,
+        "timestamp": timestamp
+    }
+
 @app.get("/")
 async def root():
     return {"message": "AI Mirror API is running!"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until FaceMesh is warm"""
+    return await readiness.endpoint()
+
 @app.post("/analyze-frame")
-async def analyze_frame(file: UploadFile = File(...)):
-    """Analyze a single frame for emotions"""
+async def analyze_frame(file: UploadFile = File(...), session_id: str = Query("default", pattern=SESSION_ID_PATTERN),
+                        group: bool = False):
+    """Analyze a single frame for emotions.
+
+    group=true detects up to MIRROR_GROUP_MAX_FACES faces and returns one entry per face with an ID
+    that stays stable across the session's frames; per-face history is under /emotion-trends?face_id=.
+    """
     try:
         # Read the uploaded image
         contents = await file.read()
+        # Loading takes the vision lock (held by the warmup while it runs), so wait for it off the event loop
+        if group:
+            mesh = group_face_mesh or await asyncio.to_thread(load_group_vision)
+        else:
+            mesh = face_mesh or await asyncio.to_thread(load_vision)
         nparr = np.frombuffer(contents, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with stage("imdecode"):
+            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image format")
         
         # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with stage("cvtcolor"):
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
         # Process with MediaPipe
-        results = face_mesh.process(rgb_frame)
+        with stage("facemesh_group" if group else "facemesh"):
+            results = mesh.process(rgb_frame)
+        
+        if group:
+            return JSONResponse(content=analyze_group(results.multi_face_landmarks or [], session_id, time.time()))
         
         analysis_result = {
             "face_detected": False,
             "emotion": "neutral",
             "confidence": 0.0,
             "landmarks_count": 0,
-            "timestamp": asyncio.get_event_loop().time()
+            "timestamp": time.time()
         }
         
         if results.multi_face_landmarks:
@@ -150,19 +344,16 @@ async def analyze_frame(file: UploadFile = File(...)):
             analysis_result["landmarks_count"] = len(landmarks)
             
             # Analyze emotions
-            emotion_result = emotion_analyzer.analyze_facial_landmarks(landmarks)
+            with stage("landmark_analysis"):
+                emotion_result = emotion_analyzer.analyze_facial_landmarks(landmarks)
             analysis_result.update(emotion_result)
             
-            # Add to history
-            emotion_analyzer.emotion_history.append({
+            # Add to history (the store keeps the last HISTORY_LIMIT entries)
+            emotion_analyzer.record(session_id, {
                 "emotion": emotion_result["emotion"],
                 "confidence": emotion_result["confidence"],
                 "timestamp": analysis_result["timestamp"]
             })
-            
-            # Keep only last 100 entries
-            if len(emotion_analyzer.emotion_history) > 100:
-                emotion_analyzer.emotion_history = emotion_analyzer.emotion_history[-100:]
         
         return JSONResponse(content=analysis_result)
         
@@ -170,72 +361,111 @@ async def analyze_frame(file: UploadFile = File(...)):
         logging.error(f"Error analyzing frame: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
 
-@app.post("/analyze-speech")
-async def analyze_speech(data: dict):
-    """Analyze speech text for sentiment using Groq"""
-    try:
-        text = data.get("text", "")
-        if not text:
-            raise HTTPException(status_code=400, detail="No text provided")
-        
-        # Use Groq for sentiment analysis
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert emotion and sentiment analyzer. Analyze the given text and return a JSON response with:
+# /analyze-speech requests arriving within SPEECH_BATCH_WAIT_MS are classified in one Groq call
+SPEECH_BATCH_MAX = int(os.getenv("SPEECH_BATCH_MAX", "16"))
+SPEECH_BATCH_WAIT = float(os.getenv("SPEECH_BATCH_WAIT_MS", "10")) / 1000
+# Completion budget per utterance in a batch
+SPEECH_ITEM_TOKENS = 120
+
+SPEECH_SYSTEM_PROMPT = """You are an expert emotion and sentiment analyzer. You will get numbered texts. Return a JSON array with one object per text, in the same order, each with:
+                    - id: the text's number
                     - emotion: one of [happy, sad, angry, surprised, fearful, neutral]
                     - confidence: float between 0-1
                     - sentiment: one of [positive, negative, neutral]
                     - intensity: float between 0-1
                     - keywords: array of emotional keywords found
                     
-                    Only return valid JSON, no additional text."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Analyze this text: '{text}'"
-                }
+                    Only return the JSON array, no additional text."""
+
+SPEECH_FALLBACK = {
+    "emotion": "neutral",
+    "confidence": 0.5,
+    "sentiment": "neutral",
+    "intensity": 0.5,
+    "keywords": []
+}
+
+def normalize_sentiment(result) -> Dict:
+    """Snap free-form labels ("joy", "scared") onto the facial classes; fallback for malformed items"""
+    if not isinstance(result, dict):
+        return dict(SPEECH_FALLBACK)
+    result = {key: value for key, value in result.items() if key != "id"}
+    code = EMOTIONS.code(str(result.get("emotion", "neutral")))
+    result["emotion"] = EMOTIONS.labels[code] if code != UNKNOWN_CODE and EMOTIONS.tags["facial"][code] else "neutral"
+    return result
+
+def parse_sentiment_batch(response_text: str, count: int) -> List[Dict]:
+    """Map a JSON array reply back onto the batch by id (or position); missing items get the fallback"""
+    try:
+        start, end = response_text.find("["), response_text.rfind("]") + 1
+        items = json.loads(response_text[start:end]) if start != -1 and end else []
+    except json.JSONDecodeError:
+        items = []
+    by_id = {}
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        index = item.get("id", position + 1) if isinstance(item, dict) else position + 1
+        if isinstance(index, int) and 1 <= index <= count:
+            by_id.setdefault(index, item)
+    return [normalize_sentiment(by_id.get(i + 1)) for i in range(count)]
+
+async def classify_speech_batch(texts: List[str]) -> List[Dict]:
+    """One Groq call for a whole batch; the system prompt is paid once"""
+    numbered = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, 1))
+    with stage("groq"):
+        chat_completion = await asyncio.to_thread(
+            groq_client.chat.completions.create,
+            messages=[
+                {"role": "system", "content": SPEECH_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Analyze these {len(texts)} texts:\n{numbered}"}
             ],
             model="llama3-8b-8192",
             temperature=0.1,
-            max_tokens=200
+            max_tokens=SPEECH_ITEM_TOKENS * len(texts)
         )
+    record_tokens("aimirror", chat_completion.usage)
+    return parse_sentiment_batch(chat_completion.choices[0].message.content or "", len(texts))
+
+speech_batcher = MicroBatcher("analyze_speech", classify_speech_batch,
+                              max_size=SPEECH_BATCH_MAX, max_wait=SPEECH_BATCH_WAIT)
+track_queue("aimirror", "speech_batch_pending", lambda: speech_batcher.pending)
+
+@app.post("/analyze-speech")
+async def analyze_speech(data: dict, request: Request):
+    """Analyze speech text for sentiment using Groq"""
+    try:
+        text = data.get("text", "")
+        if not text:
+            raise HTTPException(status_code=400, detail="No text provided")
         
-        response_text = chat_completion.choices[0].message.content
-        
-        # Parse the JSON response
-        try:
-            sentiment_result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            sentiment_result = {
-                "emotion": "neutral",
-                "confidence": 0.5,
-                "sentiment": "neutral",
-                "intensity": 0.5,
-                "keywords": []
-            }
+        # Admission is still per caller; the Groq call itself is shared with the rest of the batch
+        async with admission.admit(client_key(request, data.get("user_id")), priority=is_crisis(text)):
+            sentiment_result = await speech_batcher.submit(text)
         
         return JSONResponse(content=sentiment_result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error analyzing speech: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing speech: {str(e)}")
 
 @app.get("/emotion-trends")
-async def get_emotion_trends():
-    """Get emotion trends and analytics"""
+async def get_emotion_trends(session_id: str = Query("default", pattern=SESSION_ID_PATTERN),
+                             face_id: Optional[int] = None):
+    """Get emotion trends and analytics (for one tracked face of a group session with face_id)"""
     try:
-        trends = emotion_analyzer.get_emotion_trends()
+        if face_id is not None:
+            session_id = face_session(session_id, face_id)
+        trends = emotion_analyzer.get_emotion_trends(session_id)
         
         # Get recent history
-        recent_history = emotion_analyzer.emotion_history[-20:] if emotion_analyzer.emotion_history else []
+        recent_history = emotion_analyzer.history(session_id, 20)
         
         return JSONResponse(content={
             "trends": trends,
             "recent_history": recent_history,
-            "total_sessions": len(emotion_analyzer.emotion_history)
+            "total_sessions": emotion_analyzer.history_length(session_id),
+            "emotion_counts": emotion_analyzer.emotion_counts(session_id)
         })
         
     except Exception as e:
@@ -251,27 +481,30 @@ async def get_ai_feedback(data: dict):
         context = data.get("context", "")
         
         # Use Groq to generate personalized feedback
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a supportive AI wellness coach. Based on the user's current emotional state, provide:
+        with stage("groq"):
+            chat_completion = await asyncio.to_thread(
+                groq_client.chat.completions.create,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": """You are a supportive AI wellness coach. Based on the user's current emotional state, provide:
                     1. A brief, empathetic acknowledgment
                     2. One practical suggestion or tip
                     3. A positive affirmation
                     
                     Keep responses concise (max 3 sentences) and supportive. Never provide medical advice."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Current emotion: {emotion} (confidence: {confidence}). Context: {context}"
-                }
-            ],
-            model="llama3-8b-8192",
-            temperature=0.7,
-            max_tokens=150
-        )
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Current emotion: {emotion} (confidence: {confidence}). Context: {context}"
+                    }
+                ],
+                model="llama3-8b-8192",
+                temperature=0.7,
+                max_tokens=150
+            )
         
+        record_tokens("aimirror", chat_completion.usage)
         feedback = chat_completion.choices[0].message.content
         
         return JSONResponse(content={
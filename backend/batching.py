@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Tuple
+
+from metrics import REGISTRY
+
+BATCH_SIZE = REGISTRY.histogram(
+    "mindmesh_batch_size", "Items per micro-batch", ("batcher",), buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+class MicroBatcher:
+    """Gathers submissions arriving within max_wait seconds (up to max_size) and processes them in one call.
+
+    process(items) must return one result per item, in order. If it raises, every caller in that
+    batch gets the exception.
+    """
+
+    def __init__(self, name: str, process: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_size: int = 16, max_wait: float = 0.01):
+        self.name = name
+        self.process = process
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer = None
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        BATCH_SIZE.observe(len(batch), self.name)
+        try:
+            results = await self.process([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{self.name}: expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Callers that gave up (cancelled) are skipped
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,234 @@
+"""Per-stage benchmark of the aimirror.py /analyze-frame vision pipeline.
+
+Pushes JPEG frames through the same stages as the endpoint, timed separately:
+cv2.imdecode, cvtColor, FaceMesh.process and EmotionAnalyzer.analyze_facial_landmarks.
+Sweeps frame resolutions and worker-process counts (one FaceMesh per process, like one
+uvicorn worker each) and reports per-stage latency, end-to-end FPS and peak RSS.
+
+    cd backend
+    python benchmarks/bench_mirror.py --images ~/faces          # directory of jpg/png
+    python benchmarks/bench_mirror.py --video session.mp4 --workers 1 2 4 8
+    python benchmarks/bench_mirror.py --resolutions 640x480 1280x720 --frames 300
+
+Without --images/--video it uses synthetic noise frames. Those contain no face, so
+FaceMesh runs detection only and the landmark stage is timed on a synthetic mesh;
+use real footage for capacity numbers.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest_mirror.json"
+
+RESOLUTIONS = ["320x240", "640x480", "1280x720", "1920x1080"]
+WORKERS = [1, 2, 4]
+STAGES = ["imdecode", "cvtcolor", "facemesh", "landmark_analysis"]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+# FaceMesh with refine_landmarks=True
+LANDMARK_COUNT = 478
+
+
+def load_sources(images: Path = None, video: Path = None, max_frames: int = 300) -> List[np.ndarray]:
+    """Decoded BGR frames from a directory, a video, or synthetic noise"""
+    import cv2
+
+    if images:
+        paths = sorted(p for p in Path(images).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        frames = [f for f in (cv2.imread(str(p)) for p in paths[:max_frames]) if f is not None]
+    elif video:
+        capture = cv2.VideoCapture(str(video))
+        frames = []
+        while len(frames) < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    if not frames:
+        raise SystemExit("No readable frames in the given input")
+    return frames
+
+
+def encode_frames(frames: List[np.ndarray], width: int, height: int, quality: int) -> List[bytes]:
+    """Resize and JPEG-encode frames the way a client would upload them"""
+    import cv2
+
+    encoded = []
+    for frame in frames:
+        resized = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", resized, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            encoded.append(buffer.tobytes())
+    return encoded
+
+
+def synthetic_landmarks() -> List[SimpleNamespace]:
+    rng = np.random.default_rng(0)
+    return [SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in rng.random((LANDMARK_COUNT, 2))]
+
+
+def _init_worker():
+    # Each process builds and warms its own FaceMesh, outside the timed loop
+    import aimirror
+    aimirror.load_vision()
+
+
+def _wait_ready(hold: float) -> int:
+    # Holding each task keeps it from being picked up by an already-warm process
+    time.sleep(hold)
+    return os.getpid()
+
+
+def run_worker(encoded: List[bytes], n_frames: int) -> Dict:
+    """Time every stage for n_frames frames, cycling through the encoded inputs"""
+    import aimirror
+
+    cv2, face_mesh, analyzer = aimirror.cv2, aimirror.face_mesh, aimirror.emotion_analyzer
+    fallback = synthetic_landmarks()
+    timings = {name: [] for name in STAGES}
+    faces = 0
+
+    started = time.perf_counter()
+    for i in range(n_frames):
+        contents = encoded[i % len(encoded)]
+
+        t0 = time.perf_counter()
+        frame = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+        t1 = time.perf_counter()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t2 = time.perf_counter()
+        results = face_mesh.process(rgb_frame)
+        t3 = time.perf_counter()
+        if results.multi_face_landmarks:
+            faces += 1
+            landmarks = results.multi_face_landmarks[0].landmark
+        else:
+            landmarks = fallback
+        analyzer.analyze_facial_landmarks(landmarks)
+        t4 = time.perf_counter()
+
+        for name, start, end in zip(STAGES, (t0, t1, t2, t3), (t1, t2, t3, t4)):
+            timings[name].append(end - start)
+
+    return {
+        "timings": timings,
+        "elapsed_s": time.perf_counter() - started,
+        "faces": faces,
+        # Linux reports KiB, macOS bytes
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2)
+    }
+
+
+def stage_summary(values: List[float]) -> Dict:
+    return {
+        "median_ms": round(statistics.median(values) * 1e3, 3),
+        "p95_ms": round(float(np.percentile(values, 95)) * 1e3, 3),
+        "mean_ms": round(statistics.fmean(values) * 1e3, 3),
+    }
+
+
+def run_config(encoded: List[bytes], workers: int, frames_per_worker: int) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        # Wait until every worker is warm so startup doesn't count against FPS
+        list(pool.map(_wait_ready, [0.2] * workers))
+        started = time.perf_counter()
+        runs = list(pool.map(run_worker, [encoded] * workers, [frames_per_worker] * workers))
+        wall = time.perf_counter() - started
+
+    total_frames = workers * frames_per_worker
+    stages = {name: stage_summary([t for run in runs for t in run["timings"][name]]) for name in STAGES}
+    per_frame = sum(stages[name]["mean_ms"] for name in STAGES)
+    return {
+        "workers": workers,
+        "frames": total_frames,
+        "face_rate": round(sum(run["faces"] for run in runs) / total_frames, 3),
+        "stages": stages,
+        "frame_ms": round(per_frame, 3),
+        "fps": round(total_frames / wall, 2),
+        "fps_per_worker": round(total_frames / wall / workers, 2),
+        "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1),
+        "total_rss_mb": round(sum(run["peak_rss_mb"] for run in runs), 1)
+    }
+
+
+def parse_resolution(value: str):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage FPS benchmark for the AI mirror pipeline")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--images", type=Path, help="Directory of sample images")
+    source.add_argument("--video", type=Path, help="Video file; frames are read in order")
+    parser.add_argument("--resolutions", nargs="+", default=RESOLUTIONS, help="WIDTHxHEIGHT frame sizes")
+    parser.add_argument("--workers", type=int, nargs="+", default=WORKERS, help="Worker process counts")
+    parser.add_argument("--frames", type=int, default=200, help="Frames per worker per configuration")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality of the uploaded frames")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    sources = load_sources(args.images, args.video, max_frames=args.frames)
+    synthetic = not (args.images or args.video)
+    if synthetic:
+        print("No --images/--video given: synthetic frames, no faces (landmark stage uses a synthetic mesh)")
+
+    results = []
+    print(f"{'resolution':<11}{'workers':>8}{'imdecode':>10}{'cvtcolor':>10}{'facemesh':>10}{'landmarks':>11}"
+          f"{'frame ms':>10}{'fps':>9}{'rss MB':>8}")
+    for resolution in args.resolutions:
+        width, height = parse_resolution(resolution)
+        encoded = encode_frames(sources, width, height, args.quality)
+        for workers in args.workers:
+            result = run_config(encoded, workers, args.frames)
+            result.update(resolution=resolution, jpeg_kb=round(statistics.fmean(map(len, encoded)) / 1024, 1))
+            results.append(result)
+            stages = result["stages"]
+            print(f"{resolution:<11}{workers:>8}" + "".join(f"{stages[name]['median_ms']:>10.2f}" for name in STAGES[:3])
+                  + f"{stages['landmark_analysis']['median_ms']:>11.3f}{result['frame_ms']:>10.2f}"
+                  f"{result['fps']:>9.1f}{result['peak_rss_mb']:>8.0f}")
+
+    import cv2
+    import mediapipe
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "mediapipe": mediapipe.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "source": str(args.images or args.video or "synthetic"),
+            "source_frames": len(sources)
+        },
+        "results": results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmarks for the mood.py analytics hot path.
+
+Runs per-function microbenchmarks and in-process ASGI endpoint benchmarks
+(Groq stubbed out) over synthetic timelines, writes the results as JSON and
+compares them against a stored baseline.
+
+    cd backend
+    python benchmarks/bench_mood.py                      # run + compare
+    python benchmarks/bench_mood.py --save-baseline      # refresh baseline
+    python benchmarks/bench_mood.py --sizes 10 1000 --endpoint-sizes 10
+
+Exit code is 1 when any benchmark is slower than baseline by more than
+--threshold and by more than --noise-floor-us in absolute terms (so cases of a
+few dozen microseconds don't flap). The cyclic GC is paused while a case is
+timed, as timeit does. On noisy machines record the baseline with
+--repeat 3: each case then keeps the median of its per-run best times instead
+of one lucky run. Baselines are machine specific; regenerate them on the
+machine that runs the comparison.
+
+    python benchmarks/bench_mood.py --save-baseline --repeat 3
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+import numpy as np
+
+import mood
+from admission import AdmissionController
+from emotions import EMOTIONS
+from forecast import MoodForecaster
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline_mood.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest_mood.json"
+
+MICRO_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+ENDPOINT_SIZES = [10, 100, 1_000, 10_000]
+
+STUB_INSIGHTS = {
+    "trend": "stable",
+    "recommendations": ["Keep tracking", "Sleep well", "Take breaks"],
+    "prediction_mood": "calm",
+    "confidence": 0.7,
+    "insights": "stubbed"
+}
+
+
+def synthetic_timeline(n: int, seed: int = 42) -> dict:
+    """Daily mood/sleep/focus history with a weekly cycle, slow drift and noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    scores = 5.5 + 1.5 * np.sin(2 * np.pi * t / 7) + np.cumsum(rng.normal(0, 0.05, n)) + rng.normal(0, 1.2, n)
+    scores = np.clip(np.rint(scores), 1, 10)
+
+    # First registry label for each score 1-10
+    label_codes = np.array([np.flatnonzero(EMOTIONS.scores == s)[0] for s in range(1, 11)])
+    codes = label_codes[scores.astype(int) - 1]
+
+    start = date(2000, 1, 1)
+    return {
+        "codes": codes,
+        "labels": EMOTIONS.labels_for(codes),
+        "scores": EMOTIONS.scores[codes],
+        "intensities": rng.integers(1, 11, n).astype(float),
+        "sleep": np.clip(7 + 0.4 * (scores - 5.5) + rng.normal(0, 1, n), 3, 12).round(1),
+        "focus": np.clip(scores + rng.normal(0, 1.5, n), 1, 10).round(1),
+        "dates": [(start + timedelta(days=int(i))).isoformat() for i in t],
+    }
+
+
+@contextmanager
+def gc_paused():
+    """Collect, then keep the cyclic GC off while timing (as timeit does) so collections don't land in random runs"""
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure(fn, min_time: float = 0.2, max_runs: int = 50) -> dict:
+    """Time fn() repeatedly until min_time has elapsed (at least 3 runs)"""
+    timings = []
+    started = time.perf_counter()
+    with gc_paused():
+        while len(timings) < 3 or (time.perf_counter() - started < min_time and len(timings) < max_runs):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "runs": len(timings)
+    }
+
+
+async def measure_async(fn, min_time: float = 0.2, max_runs: int = 50) -> dict:
+    timings = []
+    started = time.perf_counter()
+    with gc_paused():
+        while len(timings) < 3 or (time.perf_counter() - started < min_time and len(timings) < max_runs):
+            t0 = time.perf_counter()
+            await fn()
+            timings.append(time.perf_counter() - t0)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "runs": len(timings)
+    }
+
+
+def run_micro(sizes, min_time: float) -> dict:
+    results = {}
+    for n in sizes:
+        data = synthetic_timeline(n)
+        scores, intensities, labels = data["scores"], data["intensities"], data["labels"]
+        score_list = scores.tolist()
+
+        cases = {
+            "predict_mood": lambda: mood.predict_mood(scores, intensities),
+            "predict_mood_list": lambda: mood.predict_mood(score_list, intensities.tolist()),
+            "analyze_mood_pattern": lambda: mood.analyze_mood_pattern(scores),
+            "calculate_correlation": lambda: mood.calculate_correlation(data["sleep"], scores),
+            "emotion_scores_for": lambda: EMOTIONS.scores_for(labels),
+            "forecast_fit": lambda: MoodForecaster().fit(scores).forecast(7),
+        }
+        for name, fn in cases.items():
+            np.random.seed(0)
+            results[f"micro/{name}/{n}"] = measure(fn, min_time)
+            print(f"  micro/{name}/{n}: {results[f'micro/{name}/{n}']['median_s'] * 1e3:.3f} ms")
+    return results
+
+
+def _stub_groq_transport() -> httpx.MockTransport:
+    body = {"choices": [{"message": {"content": json.dumps(STUB_INSIGHTS)}}]}
+    return httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+
+
+async def run_endpoints(sizes, min_time: float) -> dict:
+    results = {}
+    stub_groq = httpx.AsyncClient(transport=_stub_groq_transport())
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=mood.app), base_url="http://bench") as client:
+        # Benchmark traffic comes from one client, so lift the per-client rate limit
+        unlimited = AdmissionController(rate=1e9, burst=10**9, max_concurrent=10**9)
+        with mock.patch.object(mood, "get_async_client", lambda: stub_groq), \
+                mock.patch.object(mood, "admission", unlimited):
+            for n in sizes:
+                data = synthetic_timeline(n)
+                objects = json.dumps({
+                    "moodData": [{"date": d, "emotion": e, "intensity": int(i)}
+                                 for d, e, i in zip(data["dates"], data["labels"].tolist(), data["intensities"])],
+                    "sleepData": [{"date": d, "hours": float(h), "quality": "good"}
+                                  for d, h in zip(data["dates"], data["sleep"])],
+                    "focusData": [{"date": d, "score": float(s)} for d, s in zip(data["dates"], data["focus"])]
+                })
+                columnar = json.dumps({
+                    "mood": {"date": data["dates"], "emotion": data["codes"].tolist(),
+                             "intensity": data["intensities"].tolist()},
+                    "sleep": {"date": data["dates"], "hours": data["sleep"].tolist()},
+                    "focus": {"date": data["dates"], "score": data["focus"].tolist()}
+                })
+                headers = {"content-type": "application/json"}
+
+                cases = {
+                    "insights": lambda: client.post("/api/insights", content=objects, headers=headers),
+                    "insights_columnar": lambda: client.post("/api/insights/columnar", content=columnar, headers=headers),
+                    "forecast": lambda: client.post("/api/forecast?days=14", content=objects, headers=headers),
+                }
+                for name, fn in cases.items():
+                    response = await fn()
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{name} returned {response.status_code}: {response.text[:200]}")
+                    results[f"endpoint/{name}/{n}"] = await measure_async(fn, min_time)
+                    print(f"  endpoint/{name}/{n}: {results[f'endpoint/{name}/{n}']['median_s'] * 1e3:.3f} ms")
+    await stub_groq.aclose()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, noise_floor: float = 0.0) -> list:
+    """Benchmarks whose best time got slower than baseline * threshold and baseline + noise_floor seconds
+
+    min is the least noisy statistic; the absolute floor keeps microsecond-scale cases from flapping.
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        ratio = current["min_s"] / previous["min_s"] if previous["min_s"] else 1.0
+        current["baseline_min_s"] = previous["min_s"]
+        current["ratio"] = round(ratio, 3)
+        if ratio > threshold and current["min_s"] - previous["min_s"] > noise_floor:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def merge_runs(runs: list) -> dict:
+    """Per case: median of the runs' best and median times"""
+    return {
+        key: {
+            "median_s": statistics.median(run[key]["median_s"] for run in runs),
+            "min_s": statistics.median(run[key]["min_s"] for run in runs),
+            "runs": sum(run[key]["runs"] for run in runs)
+        }
+        for key in runs[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mood.py analytics across history sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=MICRO_SIZES)
+    parser.add_argument("--endpoint-sizes", type=int, nargs="+", default=ENDPOINT_SIZES)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend per benchmark")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown ratio vs baseline")
+    parser.add_argument("--noise-floor-us", type=float, default=100,
+                        help="Slowdowns smaller than this many microseconds never count as regressions")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the suite this many times and keep per-case medians")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(max(1, args.repeat)):
+        if args.repeat > 1:
+            print(f"Run {i + 1}/{args.repeat}")
+        run = {}
+        if not args.skip_micro:
+            print("Microbenchmarks")
+            run.update(run_micro(args.sizes, args.min_time))
+        if not args.skip_endpoints:
+            print("Endpoint benchmarks (Groq stubbed)")
+            run.update(asyncio.run(run_endpoints(args.endpoint_sizes, args.min_time)))
+        runs.append(run)
+    results = merge_runs(runs)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": max(1, args.repeat)
+        },
+        "results": results
+    }
+
+    regressions = []
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text()).get("results", {})
+        regressions = compare(results, baseline, args.threshold, args.noise_floor_us / 1e6)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold}x baseline "
+              f"(and +{args.noise_floor_us:g} us):")
+        for key, ratio in sorted(regressions, key=lambda r: -r[1]):
+            print(f"  {key}: {ratio:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Local OpenAI-compatible stand-in for the Groq API, for load tests without real quota.
+
+Serves POST /openai/v1/chat/completions (plain and stream=True) with canned answers
+from health.txt, a configurable latency distribution, token streaming and injected
+429/5xx errors. Point the services at it through llm.GROQ_BASE_URL:
+
+    cd backend
+    python benchmarks/fake_groq.py --port 9100 --latency lognormal:0.4:0.5 --rate-429 0.02
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=fake python gateway.py
+
+Latency specs (seconds): fixed:T, uniform:LO:HI, lognormal:MEDIAN:SIGMA, exponential:MEAN.
+The sampled latency is time to first token; streamed tokens follow every --token-interval.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Callable, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from health_dataset import HEALTH_TXT, Exchange, load_exchanges, words
+
+# Prompts asking for a JSON object get one carrying the keys of every such prompt in the
+# services (mood.py insights); JSON array prompts (batched sentiment) get one item per line
+JSON_EMOTIONS = ["happy", "sad", "angry", "surprised", "fearful", "neutral"]
+TRENDS = ["improving", "declining", "stable"]
+NUMBERED_LINE = re.compile(r"^\d+\. ", re.M)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Build a sampler from a latency spec such as "lognormal:0.4:0.5" """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"Bad latency spec: {spec}")
+
+
+class FakeLLM:
+    """Picks canned answers and failure modes; all randomness comes from one seeded RNG"""
+
+    def __init__(self, exchanges: List[Exchange], latency: str = "lognormal:0.4:0.5",
+                 token_interval: float = 0.02, rate_429: float = 0.0, rate_5xx: float = 0.0, seed: int = 0):
+        self.exchanges = exchanges
+        self.vocab = [words(e.user_input) for e in exchanges]
+        # Rare words ("lonely") decide the match, not "i" or "feel"
+        document_frequency = Counter(word for vocab in self.vocab for word in vocab)
+        self.idf = {word: math.log(len(exchanges) / count) for word, count in document_frequency.items()}
+        self.sample_latency = parse_latency(latency)
+        self.token_interval = token_interval
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "streamed": 0, "429": 0, "5xx": 0}
+
+    def latency(self) -> float:
+        return max(0.0, self.sample_latency(self.rng))
+
+    def failure(self):
+        """Status code to inject for this request, or None"""
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return self.rng.choice([500, 502, 503])
+        return None
+
+    def sentiment(self, index: int) -> dict:
+        return {
+            "id": index,
+            "emotion": self.rng.choice(JSON_EMOTIONS),
+            "confidence": round(self.rng.uniform(0.5, 0.95), 2),
+            "sentiment": self.rng.choice(["positive", "negative", "neutral"]),
+            "intensity": round(self.rng.uniform(0.2, 0.9), 2),
+            "keywords": []
+        }
+
+    def answer(self, messages: List[dict]) -> str:
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        user_turns = [m for m in messages if m.get("role") == "user"]
+        last_user = str(user_turns[-1].get("content", "")) if user_turns else ""
+        if "json array" in prompt.lower():
+            # Batched prompt (aimirror /analyze-speech): one object per numbered line
+            count = len(NUMBERED_LINE.findall(last_user)) or 1
+            return json.dumps([self.sentiment(i) for i in range(1, count + 1)])
+        if "json" in prompt.lower():
+            return json.dumps({
+                "emotion": self.rng.choice(JSON_EMOTIONS),
+                "confidence": round(self.rng.uniform(0.5, 0.95), 2),
+                "sentiment": self.rng.choice(["positive", "negative", "neutral"]),
+                "intensity": round(self.rng.uniform(0.2, 0.9), 2),
+                "keywords": [],
+                "trend": self.rng.choice(TRENDS),
+                "recommendations": [e.response.split(". ")[0] for e in self.rng.sample(self.exchanges, 3)],
+                "prediction_mood": "calm",
+                "insights": self.rng.choice(self.exchanges).response
+            })
+        # Dataset answer whose input best overlaps the last user turn (IDF-weighted)
+        query = words(last_user)
+        best = max(range(len(self.exchanges)),
+                   key=lambda i: sum(self.idf[word] for word in query & self.vocab[i]))
+        return self.exchanges[best].response
+
+
+def usage_for(messages: List[dict], text: str) -> dict:
+    # ~0.75 words per token, close enough for throughput accounting
+    prompt = int(sum(len(str(m.get("content", "")).split()) for m in messages) / 0.75)
+    completion = int(len(text.split()) / 0.75)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def error_response(status: int) -> JSONResponse:
+    if status == 429:
+        return JSONResponse(status_code=429, headers={"retry-after": "1"}, content={
+            "error": {"message": "Rate limit reached (injected)", "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"}
+        })
+    return JSONResponse(status_code=status, content={
+        "error": {"message": "Upstream failure (injected)", "type": "internal_server_error"}
+    })
+
+
+def create_app(llm: FakeLLM) -> FastAPI:
+    app = FastAPI(title="Fake Groq API")
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "fake")
+        llm.stats["requests"] += 1
+
+        delay = llm.latency()
+        status = llm.failure()
+        if status is not None:
+            llm.stats["429" if status == 429 else "5xx"] += 1
+            await asyncio.sleep(delay)
+            return error_response(status)
+
+        text = llm.answer(messages)
+        usage = usage_for(messages, text)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        llm.stats["streamed"] += 1
+
+        async def events():
+            def chunk(delta: dict, finish_reason=None, **extra) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    **extra
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(delay)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(text.split(" ")):
+                if i:
+                    await asyncio.sleep(llm.token_interval)
+                yield chunk({"content": token if i == 0 else f" {token}"})
+            # Groq reports usage on the final chunk under x_groq
+            yield chunk({}, "stop", x_groq={"id": completion_id, "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return llm.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--dataset", type=Path, default=HEALTH_TXT)
+    parser.add_argument("--latency", default="lognormal:0.4:0.5", help="Time-to-first-token distribution")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="Seconds between streamed tokens")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 500/502/503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    llm = FakeLLM(load_exchanges(args.dataset), args.latency, args.token_interval,
+                  args.rate_429, args.rate_5xx, args.seed)
+    print(f"Fake Groq API on http://{args.host}:{args.port} ({len(llm.exchanges)} canned answers, latency {args.latency})")
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Parser for backend/health.txt (USER_INPUT | CONTEXT | AI_RESPONSE lines).
+
+Shared by the fake LLM server (canned answers) and the load generator (user inputs).
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+HEALTH_TXT = Path(__file__).resolve().parent.parent / "health.txt"
+
+WORD = re.compile(r"[a-z']+")
+
+
+@dataclass(frozen=True)
+class Exchange:
+    user_input: str
+    context: List[str]
+    response: str
+    section: str
+
+    @property
+    def mood(self) -> str:
+        """Mood from a `mood:<label>` context tag, if any"""
+        for tag in self.context:
+            if tag.startswith("mood:"):
+                return tag.split(":", 1)[1]
+        return ""
+
+
+def load_exchanges(path: Path = HEALTH_TXT) -> List[Exchange]:
+    exchanges = []
+    section = ""
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line.startswith("# ==="):
+            section = line.strip("# =").lower()
+            continue
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split("|", 2)
+        if len(parts) != 3:
+            continue
+        user_input, context, response = (part.strip() for part in parts)
+        exchanges.append(Exchange(user_input, [t.strip() for t in context.split(",") if t.strip()], response, section))
+    return exchanges
+
+
+def words(text: str) -> set:
+    return set(WORD.findall(text.lower()))
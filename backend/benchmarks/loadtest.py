@@ -0,0 +1,230 @@
+"""Load generator replaying health.txt user inputs against running MindMesh services.
+
+Each virtual user loops over the dataset and hits the selected endpoints with its own
+user_id (so admission control sees distinct callers) until --duration elapses or
+--requests have been sent. Reports throughput and p50/p95/p99 latency per endpoint.
+
+    cd backend
+    python benchmarks/fake_groq.py --port 9100 &
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=fake ADMISSION_RATE=1000 ADMISSION_BURST=1000 \\
+        python gateway.py &
+    python benchmarks/loadtest.py --concurrency 32 --duration 60
+    python benchmarks/loadtest.py --endpoints insights analyze_speech --requests 2000
+
+By default everything goes through the gateway (port 8080); --url SERVICE=URL points one
+service at a standalone app instead, e.g. --url mood=http://127.0.0.1:8003.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from health_dataset import HEALTH_TXT, Exchange, load_exchanges
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest_loadtest.json"
+DEFAULT_GATEWAY = "http://127.0.0.1:8080"
+
+# Service -> gateway mount prefix (see gateway.SERVICES)
+GATEWAY_PREFIXES = {"assistant": "/assistant", "wellness": "/wellness", "mirror": "/mirror", "mood": "/mood"}
+
+
+class Workload:
+    """Builds requests for each endpoint from dataset exchanges"""
+
+    def __init__(self, exchanges: List[Exchange], urls: Dict[str, str], frame: Optional[bytes]):
+        self.exchanges = exchanges
+        self.urls = urls
+        self.frame = frame
+        # Mood history for /api/insights: the dataset's mood tags in order, one per day
+        moods = [e.mood for e in exchanges if e.mood] or ["neutral", "happy"]
+        start = date(2024, 1, 1)
+        self.mood_data = [
+            {"date": (start + timedelta(days=i)).isoformat(), "emotion": mood, "intensity": 3 + i % 6}
+            for i, mood in enumerate(itertools.islice(itertools.cycle(moods), 30))
+        ]
+
+    def endpoints(self) -> Dict[str, Callable]:
+        endpoints = {
+            "assistant_chat": self.assistant_chat,
+            "wellness_chat": self.wellness_chat,
+            "insights": self.insights,
+            "analyze_speech": self.analyze_speech,
+        }
+        if self.frame is not None:
+            endpoints["analyze_frame"] = self.analyze_frame
+        return endpoints
+
+    def assistant_chat(self, client: httpx.AsyncClient, exchange: Exchange, user_id: str):
+        return client.post(f"{self.urls['assistant']}/chat", json={"message": exchange.user_input, "user_id": user_id})
+
+    def wellness_chat(self, client: httpx.AsyncClient, exchange: Exchange, user_id: str):
+        return client.post(f"{self.urls['wellness']}/chat", json={
+            "message": exchange.user_input,
+            "user_state": {
+                "user_id": user_id,
+                "current_mood": exchange.mood or "neutral",
+                "xp_points": 120,
+                "streak_days": 3,
+                "last_activity": datetime.now().isoformat()
+            },
+            "emotion_history": []
+        })
+
+    def insights(self, client: httpx.AsyncClient, exchange: Exchange, user_id: str):
+        return client.post(f"{self.urls['mood']}/api/insights", params={"user_id": user_id},
+                           json={"moodData": self.mood_data})
+
+    def analyze_speech(self, client: httpx.AsyncClient, exchange: Exchange, user_id: str):
+        return client.post(f"{self.urls['mirror']}/analyze-speech", json={"text": exchange.user_input, "user_id": user_id})
+
+    def analyze_frame(self, client: httpx.AsyncClient, exchange: Exchange, user_id: str):
+        return client.post(f"{self.urls['mirror']}/analyze-frame", params={"session_id": user_id},
+                           files={"file": ("frame.jpg", self.frame, "image/jpeg")})
+
+
+def synthetic_frame(width: int = 640, height: int = 480) -> Optional[bytes]:
+    """A JPEG of noise for /analyze-frame (no face, so it measures decode + FaceMesh); None without cv2"""
+    try:
+        import cv2
+    except ImportError:
+        return None
+    rng = np.random.default_rng(0)
+    ok, encoded = cv2.imencode(".jpg", rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+    return encoded.tobytes() if ok else None
+
+
+async def run_load(workload: Workload, names: List[str], concurrency: int, duration: float,
+                   max_requests: Optional[int], timeout: float) -> Dict[str, list]:
+    """Closed-loop load: `concurrency` users each send their next request as soon as the last returns"""
+    endpoints = workload.endpoints()
+    samples = {name: [] for name in names}  # name -> [(latency_s, status)]
+    sent = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def user(index: int):
+            user_id = f"loadtest-{index}"
+            # Stagger users across the dataset and the endpoint mix
+            exchanges = itertools.islice(itertools.cycle(workload.exchanges), index, None)
+            targets = itertools.islice(itertools.cycle(names), index, None)
+            for exchange, name in zip(exchanges, targets):
+                if time.perf_counter() >= deadline:
+                    return
+                if max_requests is not None and next(sent) >= max_requests:
+                    return
+                start = time.perf_counter()
+                try:
+                    response = await endpoints[name](client, exchange, user_id)
+                    await response.aread()
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                samples[name].append((time.perf_counter() - start, status))
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return samples
+
+
+def summarize(latencies: List[float], statuses: List, elapsed: float) -> dict:
+    ok = [lat for lat, status in zip(latencies, statuses) if status == 200]
+    summary = {
+        "requests": len(latencies),
+        "ok": len(ok),
+        "statuses": {str(k): v for k, v in Counter(statuses).items()},
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    if ok:
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99])
+        summary.update(p50_ms=round(p50 * 1e3, 2), p95_ms=round(p95 * 1e3, 2),
+                       p99_ms=round(p99 * 1e3, 2), max_ms=round(max(ok) * 1e3, 2))
+    return summary
+
+
+def service_urls(gateway: str, overrides: List[str]) -> Dict[str, str]:
+    urls = {service: gateway.rstrip("/") + prefix for service, prefix in GATEWAY_PREFIXES.items()}
+    for override in overrides:
+        service, _, url = override.partition("=")
+        if service not in urls or not url:
+            raise SystemExit(f"--url expects SERVICE=URL with SERVICE in {sorted(urls)}, got {override!r}")
+        urls[service] = url.rstrip("/")
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay health.txt inputs against the MindMesh services")
+    parser.add_argument("--gateway", default=DEFAULT_GATEWAY, help="Gateway base URL")
+    parser.add_argument("--url", action="append", default=[], metavar="SERVICE=URL",
+                        help="Standalone service URL (assistant, wellness, mirror, mood)")
+    parser.add_argument("--endpoints", nargs="+",
+                        default=["assistant_chat", "wellness_chat", "insights", "analyze_speech", "analyze_frame"])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--dataset", type=Path, default=HEALTH_TXT)
+    parser.add_argument("--frame", type=Path, default=None, help="Image for /analyze-frame (default: synthetic 640x480)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    frame = args.frame.read_bytes() if args.frame else synthetic_frame()
+    workload = Workload(load_exchanges(args.dataset), service_urls(args.gateway, args.url), frame)
+    available = workload.endpoints()
+    unknown = [name for name in args.endpoints if name not in available]
+    if unknown:
+        raise SystemExit(f"Unknown or unavailable endpoint(s) {unknown}; choose from {sorted(available)}")
+
+    print(f"{args.concurrency} users, {', '.join(args.endpoints)}, "
+          f"{args.duration:.0f}s" + (f" / {args.requests} requests" if args.requests else ""))
+    started = time.perf_counter()
+    samples = asyncio.run(run_load(workload, args.endpoints, args.concurrency, args.duration,
+                                   args.requests, args.timeout))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name, rows in samples.items():
+        results[name] = summarize([lat for lat, _ in rows], [status for _, status in rows], elapsed)
+    all_rows = [row for rows in samples.values() for row in rows]
+    results["total"] = summarize([lat for lat, _ in all_rows], [status for _, status in all_rows], elapsed)
+
+    print(f"{'endpoint':<16}{'reqs':>7}{'ok':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, summary in results.items():
+        print(f"{name:<16}{summary['requests']:>7}{summary['ok']:>7}{summary['throughput_rps']:>9}"
+              f"{summary.get('p50_ms', '-'):>10}{summary.get('p95_ms', '-'):>10}{summary.get('p99_ms', '-'):>10}")
+        if summary["ok"] != summary["requests"]:
+            print(f"{'':<16}statuses: {summary['statuses']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "endpoints": args.endpoints,
+            "urls": workload.urls
+        },
+        "results": results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
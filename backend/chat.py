@@ -1,29 +1,41 @@
 import os
 import uuid
+import hashlib
+import asyncio
 import tempfile
-import requests
+import threading
 import json
 from pathlib import Path
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-import speech_recognition as sr
-from gtts import gTTS
-from dotenv import load_dotenv
+from admission import AdmissionController, client_key
+from crisis import CRISIS_RESPONSE, FollowupStore, detect
+from llm import CHAT_COMPLETIONS_URL, GROQ_API_KEY, get_http_session, shared_clients
+from metrics import instrument, record_tokens, stage_timer, track_queue
+from profiling import enable_profiling
+from readiness import WARMUP_ON_STARTUP, Readiness
+from semantic_cache import SEMANTIC_CACHE, SemanticCache
 
-# Load environment variables
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled Groq connections, closed on shutdown
+    async with shared_clients():
+        if WARMUP_ON_STARTUP:
+            readiness.warm("speech", load_speech)
+            if SEMANTIC_CACHE:
+                readiness.warm("semantic_cache", response_cache.load)
+            # Have the spoken crisis response ready before the first crisis message
+            crisis_audio()
+        yield
 
-# Get API key from environment
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your_api_key_here")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-app = FastAPI(title="TriFocus AI Mental Health Assistant")
+app = FastAPI(title="TriFocus AI Mental Health Assistant", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -34,10 +46,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-client admission control in front of the Groq calls
+admission = AdmissionController()
+
+# Request histograms, per-stage timers and /metrics
+instrument(app, "chat")
+# Opt-in per-request sampling profiler (PROFILE_SAMPLE_RATE / PROFILE_TOKEN)
+enable_profiling(app, "chat")
+stage = stage_timer("chat")
+track_queue("chat", "admission_queued", lambda: admission.queued)
+track_queue("chat", "admission_in_flight", lambda: admission.in_flight)
+
 # Audio files directory
 UPLOAD_DIR = Path("audio_files")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# LLM elaborations that follow an immediate crisis response
+followups = FollowupStore()
+# Replies depend only on the message, so paraphrases share one cache scope
+response_cache = SemanticCache("chat")
+# Spoken crisis response under a name fixed by its text, so restarts and workers share one file
+CRISIS_AUDIO_NAME = f"crisis_{hashlib.sha256(CRISIS_RESPONSE.encode()).hexdigest()[:16]}.mp3"
+# Synthesized on first use unless an earlier run already left it on disk
+crisis_audio_file = CRISIS_AUDIO_NAME if (UPLOAD_DIR / CRISIS_AUDIO_NAME).exists() else None
+crisis_audio_task = None
+
+# speech_recognition and gTTS are imported on first use or by the startup warmup, not at import
+sr = None
+gTTS = None
+_speech_lock = threading.Lock()
+readiness = Readiness("chat")
+
+def load_speech():
+    """Import the speech-to-text and text-to-speech libraries once"""
+    global sr, gTTS
+    with _speech_lock:
+        if sr is None:
+            import speech_recognition
+            from gtts import gTTS as gtts_class
+            gTTS, sr = gtts_class, speech_recognition
+
 # Pydantic Models
 class QueryModel(BaseModel):
     message: str
@@ -49,24 +97,72 @@ class MentalHealthAnalysisModel(BaseModel):
     duration: Optional[str] = None
     severity: Optional[str] = None
 
-def text_to_speech(text, lang='en'):
+def text_to_speech(text, lang='en', audio_filename=None):
     """Convert text to speech and save as an audio file."""
+    # Written aside and renamed, so a reader never sees a half-written file
+    partial = UPLOAD_DIR / f".{uuid.uuid4()}.partial"
     try:
-        audio_filename = f"mental_health_{uuid.uuid4()}.mp3"
+        audio_filename = audio_filename or f"mental_health_{uuid.uuid4()}.mp3"
         filepath = UPLOAD_DIR / audio_filename
         
         tts_text = text[:800] if len(text) > 800 else text
-        tts = gTTS(text=tts_text, lang=lang, slow=False)
-        tts.save(str(filepath))
+        load_speech()
+        with stage("gtts"):
+            tts = gTTS(text=tts_text, lang=lang, slow=False)
+            tts.save(str(partial))
+        os.replace(partial, filepath)
         
         return audio_filename
     except Exception as e:
         print(f"Text-to-speech error: {e}")
+        partial.unlink(missing_ok=True)
         return None
 
-def generate_mental_health_response(message):
+def transcribe(path):
+    """Recognize speech in a WAV file (blocking: decoding plus a Google Speech API call)"""
+    load_speech()
+    with stage("speech_recognition"):
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(path) as source:
+            audio = recognizer.record(source)
+        return recognizer.recognize_google(audio, language='en-US')
+
+def speech_chunks(text, lang='en'):
+    """Yield mp3 bytes piece by piece as gTTS synthesizes them (no file on disk)"""
+    load_speech()
+    tts_text = text[:800] if len(text) > 800 else text
+    yield from gTTS(text=tts_text, lang=lang, slow=False).stream()
+
+def multipart_reply(payload, text):
+    """multipart/mixed body: the JSON reply first, then the spoken reply streamed as audio/mpeg"""
+    boundary = uuid.uuid4().hex
+
+    async def parts():
+        yield (f"--{boundary}\r\nContent-Type: application/json\r\n\r\n"
+               f"{json.dumps(payload)}\r\n"
+               f"--{boundary}\r\nContent-Type: audio/mpeg\r\n\r\n").encode()
+        try:
+            # The cached crisis recording is reused; everything else is synthesized on the fly
+            if text == CRISIS_RESPONSE and crisis_audio_file:
+                yield await asyncio.to_thread((UPLOAD_DIR / crisis_audio_file).read_bytes)
+            else:
+                chunks = speech_chunks(text)
+                with stage("gtts_stream"):
+                    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                        yield chunk
+        except Exception as e:
+            print(f"Text-to-speech stream error: {e}")
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    return StreamingResponse(parts(), media_type=f"multipart/mixed; boundary={boundary}")
+
+def generate_mental_health_response(message, use_cache=True):
     """Generate a mental health response using Groq API."""
     try:
+        cached = response_cache.lookup(message) if use_cache else None
+        if cached:
+            return cached
+        
         headers = {
             "Authorization": f"Bearer {GROQ_API_KEY}",
             "Content-Type": "application/json"
@@ -92,33 +188,96 @@ GUIDELINES:
             "max_tokens": 1000
         }
         
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
+        with stage("groq"):
+            response = get_http_session().post(CHAT_COMPLETIONS_URL, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
         
         result = response.json()
-        return result["choices"][0]["message"]["content"]
+        record_tokens("chat", result.get("usage"))
+        reply = result["choices"][0]["message"]["content"]
+        if use_cache:
+            response_cache.store(message, reply)
+        return reply
     except Exception as e:
         print(f"Groq API error: {e}")
+        if detect(message):
+            return CRISIS_RESPONSE
         return "I'm here to support you, but I'm experiencing technical difficulties. Please consider reaching out to a mental health professional."
 
+def crisis_audio():
+    """Cached crisis audio file; the first call starts synthesis and returns None"""
+    global crisis_audio_task
+    if crisis_audio_file is None and crisis_audio_task is None:
+        crisis_audio_task = asyncio.get_running_loop().create_task(synthesize_crisis_audio())
+    return crisis_audio_file
+
+async def synthesize_crisis_audio():
+    global crisis_audio_file, crisis_audio_task
+    if (UPLOAD_DIR / CRISIS_AUDIO_NAME).exists():
+        crisis_audio_file = CRISIS_AUDIO_NAME
+    else:
+        crisis_audio_file = await asyncio.to_thread(text_to_speech, CRISIS_RESPONSE, 'en', CRISIS_AUDIO_NAME)
+    crisis_audio_task = None
+
+def crisis_reply(message, key):
+    """Immediate crisis response; the LLM elaboration runs in the background under the priority lane"""
+    async def elaborate():
+        async with admission.admit(key, priority=True):
+            return await asyncio.to_thread(generate_mental_health_response, message)
+
+    return {
+        "text_response": CRISIS_RESPONSE,
+        "audio_file_path": crisis_audio(),
+        "crisis": True,
+        "followup_id": followups.start(elaborate),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/chat")
-async def mental_health_chat(query: QueryModel):
-    """Process mental health chat messages."""
-    try:
-        response_text = generate_mental_health_response(query.message)
-        audio_filename = text_to_speech(response_text, 'en')
-        
-        return {
-            "text_response": response_text,
-            "audio_file_path": audio_filename,
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        return {
-            "error": str(e),
-            "text_response": "I'm here to support you. Please consider reaching out to a mental health professional.",
-            "audio_file_path": None
-        }
+async def mental_health_chat(query: QueryModel, request: Request,
+                             audio: str = Query("file", pattern="^(file|inline)$")):
+    """Process mental health chat messages.
+
+    audio=file (default) saves an mp3 for GET /audio/{filename}; audio=inline returns
+    multipart/mixed with the JSON reply followed by the mp3 streamed as it is synthesized.
+    """
+    key = client_key(request, query.user_id)
+    # Local check before any LLM call, so crisis messages never wait on the upstream
+    if detect(query.message):
+        reply = crisis_reply(query.message, key)
+        return multipart_reply({**reply, "audio_file_path": None}, CRISIS_RESPONSE) if audio == "inline" else reply
+
+    async with admission.admit(key):
+        try:
+            # Blocking Groq and gTTS calls run off the event loop so admitted requests overlap and queue
+            response_text = await asyncio.to_thread(generate_mental_health_response, query.message)
+            if audio == "inline":
+                return multipart_reply({
+                    "text_response": response_text,
+                    "audio_file_path": None,
+                    "timestamp": datetime.now().isoformat()
+                }, response_text)
+            audio_filename = await asyncio.to_thread(text_to_speech, response_text, 'en')
+            
+            return {
+                "text_response": response_text,
+                "audio_file_path": audio_filename,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "error": str(e),
+                "text_response": "I'm here to support you. Please consider reaching out to a mental health professional.",
+                "audio_file_path": None
+            }
+
+@app.get("/chat/followup/{followup_id}")
+async def chat_followup(followup_id: str):
+    """Poll for the LLM elaboration that follows a crisis response."""
+    result = followups.get(followup_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Follow-up not found")
+    return result
 
 @app.post("/mental-health-analysis")
 async def mental_health_analysis(concerns: MentalHealthAnalysisModel):
@@ -127,7 +286,8 @@ async def mental_health_analysis(concerns: MentalHealthAnalysisModel):
         concerns_text = ", ".join(concerns.concerns)
         query = f"I'm experiencing {concerns_text}. Age: {concerns.age}. Duration: {concerns.duration}. Severity: {concerns.severity}."
         
-        analysis_result = generate_mental_health_response(query)
+        # Not cached: prompts differing only in age or severity embed almost identically
+        analysis_result = await asyncio.to_thread(generate_mental_health_response, query, False)
         
         return {
             "analysis": analysis_result,
@@ -141,7 +301,7 @@ async def mental_health_analysis(concerns: MentalHealthAnalysisModel):
         }
 
 @app.post("/voice-input")
-async def process_voice(file: UploadFile = File(...)):
+async def process_voice(request: Request, file: UploadFile = File(...)):
     """Process voice input and generate response."""
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
     try:
@@ -149,13 +309,12 @@ async def process_voice(file: UploadFile = File(...)):
         temp_file.write(content)
         temp_file.close()
 
-        recognizer = sr.Recognizer()
-        with sr.AudioFile(temp_file.name) as source:
-            audio = recognizer.record(source)
-        
-        transcribed_text = recognizer.recognize_google(audio, language='en-US')
-        response_text = generate_mental_health_response(transcribed_text)
-        audio_filename = text_to_speech(response_text, 'en')
+        transcribed_text = await asyncio.to_thread(transcribe, temp_file.name)
+        if detect(transcribed_text):
+            return {"transcribed_text": transcribed_text, **crisis_reply(transcribed_text, client_key(request))}
+
+        response_text = await asyncio.to_thread(generate_mental_health_response, transcribed_text)
+        audio_filename = await asyncio.to_thread(text_to_speech, response_text, 'en')
 
         return {
             "transcribed_text": transcribed_text,
@@ -180,6 +339,11 @@ async def get_audio(filename: str):
         raise HTTPException(status_code=404, detail="Audio file not found")
     return FileResponse(str(file_path))
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the speech libraries are loaded"""
+    return await readiness.endpoint()
+
 @app.get("/health-check")
 async def health_check():
     return {
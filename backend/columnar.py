@@ -0,0 +1,135 @@
+import json
+from typing import Any, Dict
+
+import numpy as np
+
+# Optional binary decoders
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+JSON_TYPES = ("application/json",)
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+ARROW_TYPES = ("application/vnd.apache.arrow.stream",)
+
+# Column name -> dtype per series; "emotion" may hold integer codes or labels
+COLUMN_DTYPES = {
+    "mood": {"date": None, "emotion": None, "intensity": float},
+    "sleep": {"date": None, "hours": float},
+    "focus": {"date": None, "score": float},
+}
+
+# Column that defines a series' rows; every other column must match its length
+ROW_COLUMNS = {"mood": "emotion", "sleep": "hours", "focus": "score"}
+# Columns that may be left out entirely (mood.py fills in a default)
+OPTIONAL_COLUMNS = {("mood", "intensity")}
+
+# Flat Arrow layout: one row per day, sleep/focus columns nullable
+ARROW_COLUMNS = {
+    "date": ("mood", "date"),
+    "emotion": ("mood", "emotion"),
+    "intensity": ("mood", "intensity"),
+    "sleep_hours": ("sleep", "hours"),
+    "focus_score": ("focus", "score"),
+}
+
+
+def is_supported(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in JSON_TYPES:
+        return True
+    if media_type in MSGPACK_TYPES:
+        return msgpack is not None
+    if media_type in ARROW_TYPES:
+        return pa is not None
+    return False
+
+
+def _to_array(values: Any, dtype) -> np.ndarray:
+    if dtype is not None:
+        return np.asarray(values, dtype=dtype)
+    array = np.asarray(values)
+    # Keep integer codes as ints and labels as strings, never object arrays
+    if array.dtype.kind in "iu":
+        return array.astype(np.int64, copy=False)
+    if array.dtype.kind == "f":
+        # 2.0 is a code; 1.5 is neither a code nor a label
+        if not np.all(np.mod(array, 1) == 0):
+            raise ValueError("Emotion codes must be integers")
+        return array.astype(np.int64)
+    return array.astype(str)
+
+
+def _from_mapping(payload: Any) -> Dict[str, Dict[str, np.ndarray]]:
+    if not isinstance(payload, dict):
+        raise ValueError("Columnar payload must be an object of series")
+
+    series = {}
+    for name, columns in COLUMN_DTYPES.items():
+        section = payload.get(name) or {}
+        if not isinstance(section, dict):
+            raise ValueError(f"'{name}' must be an object of parallel arrays")
+        arrays = {}
+        for column, dtype in columns.items():
+            values = section.get(column, [])
+            if not isinstance(values, (list, tuple)):
+                raise ValueError(f"'{name}.{column}' must be an array")
+            arrays[column] = _to_array(values, dtype)
+        series[name] = arrays
+    return series
+
+
+def _from_arrow(body: bytes) -> Dict[str, Dict[str, np.ndarray]]:
+    table = pa.ipc.open_stream(body).read_all()
+    series = {name: {column: _to_array([], dtype) for column, dtype in columns.items()}
+              for name, columns in COLUMN_DTYPES.items()}
+    dates = table.column("date").to_numpy(zero_copy_only=False).astype(str) if "date" in table.column_names else None
+    # Mood rows are the days with an emotion; a null intensity on those days becomes NaN (the default)
+    mood_rows = None
+    if "emotion" in table.column_names:
+        mood_rows = ~table.column("emotion").is_null().to_numpy(zero_copy_only=False)
+
+    for arrow_name, (name, column) in ARROW_COLUMNS.items():
+        if arrow_name not in table.column_names:
+            continue
+        chunked = table.column(arrow_name)
+        if name == "mood" and mood_rows is not None:
+            valid = mood_rows
+        else:
+            valid = ~chunked.is_null().to_numpy(zero_copy_only=False)
+        values = chunked.to_numpy(zero_copy_only=False)[valid]
+        series[name][column] = _to_array(values, COLUMN_DTYPES[name][column])
+        if dates is not None:
+            series[name]["date"] = dates[valid]
+    return series
+
+
+def decode_columns(body: bytes, content_type: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Decode a columnar mood/sleep/focus payload straight into NumPy arrays"""
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        if media_type in MSGPACK_TYPES:
+            series = _from_mapping(msgpack.unpackb(body, raw=False))
+        elif media_type in ARROW_TYPES:
+            series = _from_arrow(body)
+        else:
+            series = _from_mapping(json.loads(body))
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not decode {media_type or 'request'} body: {e}")
+
+    for name, arrays in series.items():
+        rows = len(arrays[ROW_COLUMNS[name]])
+        lengths = {column: len(values) for column, values in arrays.items()}
+        if any(length != rows and not (length == 0 and (name, column) in OPTIONAL_COLUMNS)
+               for column, length in lengths.items()):
+            raise ValueError(f"'{name}' columns have mismatched lengths: {lengths}")
+    return series
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough budget figures, in estimated tokens
+CONTEXT_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 250
+SUMMARY_MIN_PENDING_TOKENS = 200
+
+# Summarizer: (previous summary, turns to fold in) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+class Conversation:
+    def __init__(self, summary: str = "", summarized_upto: int = 0, turns: Optional[List[Dict]] = None):
+        self.summary = summary
+        # Absolute sequence number of the first turn not covered by the summary
+        self.summarized_upto = summarized_upto
+        # Turns not yet folded into the summary, oldest first
+        self.turns = turns or []
+
+
+class ConversationStore:
+    """Per-user chat memory: in-memory LRU in front of a local SQLite file"""
+
+    def __init__(self, db_path: Path, max_users: int = 1000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_users = max_users
+        self._cache: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS turns (
+                user_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (user_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS summaries (
+                user_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                summarized_upto INTEGER NOT NULL
+            );
+        """)
+        self._db.commit()
+
+    def _load(self, user_id: str) -> Conversation:
+        """Fetch a conversation from the LRU, falling back to SQLite (caller holds the lock)"""
+        conversation = self._cache.get(user_id)
+        if conversation is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(user_id)
+            return conversation
+        self.cache_misses += 1
+
+        row = self._db.execute(
+            "SELECT summary, summarized_upto FROM summaries WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        summary, upto = row if row else ("", 0)
+        turns = [
+            {"seq": seq, "role": role, "content": content}
+            for seq, role, content in self._db.execute(
+                "SELECT seq, role, content FROM turns WHERE user_id = ? AND seq >= ? ORDER BY seq",
+                (user_id, upto)
+            )
+        ]
+        conversation = Conversation(summary, upto, turns)
+        self._cache[user_id] = conversation
+        if len(self._cache) > self.max_users:
+            self._cache.popitem(last=False)
+        return conversation
+
+    def add_turns(self, user_id: str, turns: List[Dict[str, str]]) -> None:
+        """Append (role, content) turns for a user"""
+        with self._lock:
+            conversation = self._load(user_id)
+            # Allocate seqs inside one write transaction so workers sharing the file never reuse one
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                next_seq = self._db.execute(
+                    "SELECT COALESCE(MAX(seq), -1) + 1 FROM turns WHERE user_id = ?", (user_id,)
+                ).fetchone()[0]
+                rows = []
+                for turn in turns:
+                    rows.append((user_id, next_seq, turn["role"], turn["content"], time.time()))
+                    next_seq += 1
+                self._db.executemany(
+                    "INSERT INTO turns (user_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)", rows
+                )
+            conversation.turns.extend({"seq": seq, "role": role, "content": content}
+                                      for _, seq, role, content, _ in rows)
+
+    def build_context(self, user_id: str, budget: int = CONTEXT_TOKEN_BUDGET) -> Dict:
+        """Rolling summary plus as many recent turns as fit in the token budget
+
+        Returns the summary, the verbatim turns (oldest first) and the older
+        turns that fell outside the window and are not yet summarized.
+        """
+        with self._lock:
+            conversation = self._load(user_id)
+            summary = conversation.summary
+            remaining = budget - (estimate_tokens(summary) if summary else 0)
+
+            window_start = len(conversation.turns)
+            for i in range(len(conversation.turns) - 1, -1, -1):
+                cost = estimate_tokens(conversation.turns[i]["content"])
+                if cost > remaining:
+                    break
+                remaining -= cost
+                window_start = i
+            # Never open the window on an assistant reply cut off from its question
+            if window_start < len(conversation.turns) and conversation.turns[window_start]["role"] == "assistant":
+                window_start += 1
+
+            return {
+                "summary": summary,
+                "recent": [{"role": t["role"], "content": t["content"]} for t in conversation.turns[window_start:]],
+                "pending": list(conversation.turns[:window_start])
+            }
+
+    def schedule_summary_refresh(self, user_id: str, pending: List[Dict], summarizer: Summarizer) -> None:
+        """Fold turns that dropped out of the window into the summary, off the request path"""
+        pending_tokens = sum(estimate_tokens(t["content"]) for t in pending)
+        if pending_tokens < SUMMARY_MIN_PENDING_TOKENS or user_id in self._refreshing:
+            return
+        self._refreshing.add(user_id)
+        asyncio.get_running_loop().create_task(self._refresh_summary(user_id, pending, summarizer))
+
+    async def _refresh_summary(self, user_id: str, pending: List[Dict], summarizer: Summarizer) -> None:
+        try:
+            with self._lock:
+                previous = self._load(user_id).summary
+            summary = await summarizer(previous, [{"role": t["role"], "content": t["content"]} for t in pending])
+            if not summary:
+                return
+            upto = pending[-1]["seq"] + 1
+
+            with self._lock:
+                conversation = self._load(user_id)
+                conversation.summary = summary
+                conversation.summarized_upto = upto
+                conversation.turns = [t for t in conversation.turns if t["seq"] >= upto]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO summaries (user_id, summary, summarized_upto) VALUES (?, ?, ?)",
+                    (user_id, summary, upto)
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.error(f"Error refreshing conversation summary for {user_id}: {e}")
+        finally:
+            self._refreshing.discard(user_id)
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+            self._db.execute("DELETE FROM turns WHERE user_id = ?", (user_id,))
+            self._db.execute("DELETE FROM summaries WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import re
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from state_store import STATE, StateStore
+
+logger = logging.getLogger(__name__)
+
+# Curated phrases, written in normalized form (lowercase, no apostrophes)
+CRISIS_PHRASES = {
+    "suicidal": [
+        "suicide", "suicidal", "kill myself", "killing myself", "killed myself", "kill my self", "kms",
+        "unalive myself", "end my life", "ending my life", "end it all", "ending it all", "want to end it",
+        "take my own life", "taking my own life", "want to die", "wanna die", "wish i was dead",
+        "wish i were dead", "better off dead", "better off without me", "dont want to live",
+        "dont want to be alive", "dont want to be here anymore", "dont want to exist", "wish i was never born",
+        "no reason to live", "nothing to live for", "not worth living", "cant go on anymore", "hang myself",
+        "overdose on", "take an overdose", "say goodbye forever",
+    ],
+    "self_harm": [
+        "self harm", "selfharm", "hurt myself", "hurting myself", "harm myself", "harming myself",
+        "cut myself", "cutting myself", "burn myself", "burning myself", "slit my wrists", "cut my wrists",
+    ],
+}
+
+# Words that negate a phrase when they govern it directly ("I'm not suicidal", "don't want to die").
+# A missed crisis is far worse than a false alarm, so negation is read narrowly.
+NEGATORS = {"not", "never", "no", "dont", "didnt", "wont", "wouldnt", "isnt", "arent", "wasnt", "cant", "nor"}
+# Words allowed between a negator and the phrase ("not going to hurt myself"). No pronouns: in
+# "no i really want to die" the negator does not govern the phrase.
+NEGATION_FILLERS = {"really", "actually", "ever", "going", "gonna", "to", "be", "feeling"}
+NEGATION_WINDOW = 3
+# Negators that only count inside a clause, never opening it ("No. I want to die", "no i want to die")
+CLAUSE_INITIAL_AFFIRMATIVE = {"no"}
+
+# How long a crisis follow-up stays retrievable, in seconds
+FOLLOWUP_TTL = 900
+
+CLAUSE_MARK = "|"
+_APOSTROPHES = re.compile(r"['’`]")
+_CLAUSE_BREAKS = re.compile(r"[.,;:!?\n]+|\bbut\b")
+# Set phrases that look negated but affirm what follows ("not gonna lie, I want to die")
+_DISCOURSE_MARKERS = re.compile(r"\b(?:not (?:gonna|going to) lie|no lie|to be honest|tbh|ngl)\b")
+_NON_WORD = re.compile(r"[^a-z0-9|]+")
+
+CRISIS_RESPONSE = (
+    "I'm really glad you told me, and I'm so sorry you're hurting right now. "
+    "Please SEEK IMMEDIATE PROFESSIONAL HELP: if you are in danger, call your local emergency number now. "
+    "In the US you can call or text 988 (Suicide & Crisis Lifeline) any time, and you can find a "
+    "helpline in your country at findahelpline.com. You don't have to go through this alone - "
+    "if you can, reach out to someone you trust and stay with them."
+)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop apostrophes, mark clause breaks and pad with spaces for word-boundary matching"""
+    text = _APOSTROPHES.sub("", (text or "").lower())
+    text = _DISCOURSE_MARKERS.sub(CLAUSE_MARK, text)
+    text = _CLAUSE_BREAKS.sub(f" {CLAUSE_MARK} ", text)
+    return f" {' '.join(_NON_WORD.sub(' ', text).split())} "
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over whole-word phrases; one pass per message"""
+
+    def __init__(self, phrases: Dict[str, List[str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[tuple]] = [[]]
+
+        for category, items in phrases.items():
+            for phrase in items:
+                self._insert(f" {phrase} ", (phrase, category))
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, payload: tuple) -> None:
+        node = 0
+        for char in pattern:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append((len(pattern),) + payload)
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so every fail target is finished before its dependents
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text: str) -> List[tuple]:
+        """(start, phrase, category) for every phrase occurrence in normalized text"""
+        matches = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for length, phrase, category in self.output[node]:
+                matches.append((i - length + 1, phrase, category))
+        return matches
+
+
+MATCHER = PhraseMatcher(CRISIS_PHRASES)
+
+
+def _negated(normalized: str, start: int) -> bool:
+    """True when a negator governs the phrase: right before it, or separated only by fillers, in one clause"""
+    preceding = normalized[:start].split()
+    for offset in range(1, min(NEGATION_WINDOW, len(preceding)) + 1):
+        word = preceding[-offset]
+        if word in NEGATORS:
+            opens_clause = offset == len(preceding) or preceding[-offset - 1] == CLAUSE_MARK
+            return not (opens_clause and word in CLAUSE_INITIAL_AFFIRMATIVE)
+        if word not in NEGATION_FILLERS:
+            return False
+    return False
+
+
+def detect(text: Optional[str]) -> List[Dict[str, str]]:
+    """Non-negated crisis phrases found in a message"""
+    normalized = normalize(text)
+    return [
+        {"phrase": phrase, "category": category}
+        for start, phrase, category in MATCHER.find(normalized)
+        if not _negated(normalized, start)
+    ]
+
+
+def is_crisis(text: Optional[str]) -> bool:
+    return bool(detect(text))
+
+
+class FollowupStore:
+    """Results of LLM elaborations that run after the immediate crisis response
+
+    Results go to the shared state store, so any worker can answer the poll.
+    """
+
+    def __init__(self, store: StateStore = STATE, ttl: float = FOLLOWUP_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._tasks = set()
+
+    def start(self, produce: Callable[[], Awaitable[str]]) -> str:
+        """Run produce() in the background and return an id to poll for its text"""
+        followup_id = str(uuid.uuid4())
+        self.store.set(f"followup:{followup_id}", {"status": "pending"}, self.ttl)
+        task = asyncio.get_running_loop().create_task(self._run(followup_id, produce))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return followup_id
+
+    async def _run(self, followup_id: str, produce: Callable[[], Awaitable[str]]) -> None:
+        try:
+            result = await produce()
+        except Exception as e:
+            logger.error(f"Crisis follow-up failed: {e}")
+            result = CRISIS_RESPONSE
+        self.store.set(f"followup:{followup_id}", {"status": "ready", "text_response": result}, self.ttl)
+
+    def get(self, followup_id: str) -> Optional[Dict[str, str]]:
+        return self.store.get(f"followup:{followup_id}")
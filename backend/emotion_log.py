@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many entries are buffered or the oldest has waited this long
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.05
+# Appenders wait for the writer once this many entries are unflushed
+DEFAULT_MAX_PENDING = 50000
+
+COLUMNS = ("user_id", "emotion", "intensity", "timestamp", "notes")
+
+
+class EmotionLog:
+    """Write-behind emotion store: appends are buffered in memory and group-committed to SQLite"""
+
+    def __init__(self, db_path: Path, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_pending: int = DEFAULT_MAX_PENDING):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._buffer: List[tuple] = []
+        self._inflight: List[tuple] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flushed: Optional[asyncio.Condition] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS emotions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                emotion TEXT NOT NULL,
+                intensity INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                notes TEXT,
+                received_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_emotions_user_time ON emotions (user_id, timestamp);
+        """)
+        self._db.commit()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer) + len(self._inflight)
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._wakeup = asyncio.Event()
+            self._flushed = asyncio.Condition()
+            self._writer = asyncio.get_running_loop().create_task(self._run_writer())
+
+    async def append(self, entries: Sequence[Dict]) -> int:
+        """Buffer entries for the next group commit; returns immediately unless the buffer is full"""
+        self._ensure_writer()
+        if self.pending >= self.max_pending:
+            async with self._flushed:
+                await self._flushed.wait_for(lambda: self.pending < self.max_pending)
+
+        now = time.time()
+        self._buffer.extend(tuple(entry.get(column) for column in COLUMNS) + (now,) for entry in entries)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return len(entries)
+
+    async def _run_writer(self) -> None:
+        while not self._closing or self._buffer:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._buffer:
+                continue
+
+            self._inflight, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write_batch, self._inflight)
+            except Exception as e:
+                # Keep the rows for the next attempt rather than dropping them
+                logger.error(f"Emotion log flush failed ({len(self._inflight)} rows): {e}")
+                self._buffer = self._inflight + self._buffer
+                await asyncio.sleep(self.flush_interval)
+            finally:
+                self._inflight = []
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    def _write_batch(self, rows: List[tuple]) -> None:
+        # One transaction (and one fsync) per batch
+        with self._db_lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO emotions (user_id, emotion, intensity, timestamp, notes, received_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+
+    async def flush(self) -> None:
+        """Wait until everything appended so far is committed"""
+        if self._writer is None:
+            return
+        self._wakeup.set()
+        async with self._flushed:
+            await self._flushed.wait_for(lambda: not self.pending)
+
+    async def recent(self, user_id: str, limit: int = 20) -> List[Dict]:
+        """Latest entries for a user, oldest first, including ones not yet flushed"""
+        rows = await asyncio.to_thread(self._read_recent, user_id, limit)
+        unflushed = [row[1:5] for row in self._inflight + self._buffer if row[0] == user_id]
+        rows = sorted(rows + unflushed, key=lambda row: row[2])[-limit:]
+        return [dict(zip(COLUMNS[1:], row)) for row in rows]
+
+    def _read_recent(self, user_id: str, limit: int) -> List[tuple]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT emotion, intensity, timestamp, notes FROM emotions "
+                "WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit)
+            ).fetchall()
+        return rows[::-1]
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._writer is not None:
+            self._wakeup.set()
+            await self._writer
+        with self._db_lock:
+            self._db.close()
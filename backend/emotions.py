@@ -0,0 +1,180 @@
+import difflib
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_SCORE = 5.0
+UNKNOWN_CODE = -1
+
+# label, score (1-10), category
+# Order matters: codes are positions in this table and are part of the
+# columnar wire format, so only ever append new emotions at the end.
+EMOTION_TABLE = [
+    # Very negative emotions (1-3)
+    ("depressed", 1, "very_negative"), ("devastated", 1, "very_negative"), ("hopeless", 1, "very_negative"),
+    ("angry", 2, "negative"), ("furious", 2, "very_negative"), ("enraged", 2, "very_negative"),
+    ("sad", 2, "negative"), ("miserable", 2, "very_negative"), ("heartbroken", 2, "very_negative"),
+    ("anxious", 3, "negative"), ("panicked", 3, "negative"), ("overwhelmed", 3, "negative"),
+
+    # Moderately negative emotions (4-5)
+    ("stressed", 4, "negative"), ("worried", 4, "negative"), ("frustrated", 4, "negative"),
+    ("tired", 4, "mild_negative"), ("exhausted", 4, "mild_negative"), ("drained", 4, "mild_negative"),
+    ("lonely", 4, "mild_negative"), ("isolated", 4, "mild_negative"), ("bored", 4, "mild_negative"),
+    ("neutral", 5, "neutral"), ("okay", 5, "neutral"), ("fine", 5, "neutral"),
+
+    # Moderately positive emotions (6-7)
+    ("calm", 6, "mild_positive"), ("peaceful", 6, "mild_positive"), ("relaxed", 6, "mild_positive"),
+    ("content", 6, "mild_positive"), ("satisfied", 6, "mild_positive"), ("serene", 6, "mild_positive"),
+    ("hopeful", 7, "positive"), ("optimistic", 7, "positive"), ("confident", 7, "positive"),
+
+    # Very positive emotions (8-10)
+    ("happy", 8, "positive"), ("cheerful", 8, "positive"), ("pleased", 8, "positive"),
+    ("excited", 9, "very_positive"), ("thrilled", 9, "very_positive"), ("energetic", 9, "very_positive"),
+    ("joyful", 10, "very_positive"), ("ecstatic", 10, "very_positive"), ("blissful", 10, "very_positive"),
+    ("grateful", 8, "positive"), ("loved", 9, "very_positive"), ("accomplished", 8, "very_positive"),
+
+    # Facial expression classes from the AI mirror. Not on the mood scale: they score like any
+    # unlisted mood did and are left out of /api/emotions.
+    ("surprised", 5, "facial"), ("fearful", 5, "facial"),
+]
+
+CATEGORY_ORDER = ["very_negative", "negative", "mild_negative", "neutral",
+                  "mild_positive", "positive", "very_positive"]
+
+# Free-text words that mean an emotion in the table
+SYNONYMS = {
+    "depression": "depressed", "upset": "sad", "unhappy": "sad", "blue": "sad",
+    "mad": "angry", "annoyed": "frustrated", "irritated": "frustrated",
+    "anxiety": "anxious", "nervous": "anxious", "panic": "panicked", "panicky": "panicked",
+    "stress": "stressed", "stressful": "stressed", "tense": "stressed",
+    "worry": "worried", "scared": "fearful", "afraid": "fearful", "fear": "fearful",
+    "sleepy": "tired", "burnt out": "exhausted", "burned out": "exhausted", "alone": "lonely",
+    "ok": "okay", "alright": "okay", "meh": "neutral",
+    "relaxing": "relaxed", "chill": "relaxed", "hope": "hopeful",
+    "glad": "happy", "good": "happy", "great": "happy", "positive": "happy",
+    "joy": "joyful", "thankful": "grateful", "proud": "accomplished",
+    "energized": "energetic", "surprise": "surprised",
+}
+
+# Named groups of emotions the services branch on
+TAGS = {
+    "stress": ["stressed", "anxious", "worried", "overwhelmed", "panicked"],
+    "energized": ["happy", "excited", "energetic", "cheerful", "thrilled", "joyful"],
+    "facial": ["happy", "sad", "angry", "surprised", "fearful", "neutral"],
+}
+
+FUZZY_CUTOFF = 0.82
+# Distinct near-miss spellings remembered before the memo is reset
+FUZZY_CACHE_SIZE = 4096
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+class EmotionRegistry:
+    """Interned emotion vocabulary: labels <-> small integer codes with score/valence arrays"""
+
+    def __init__(self, table, synonyms: Dict[str, str], tags: Dict[str, List[str]]):
+        self.labels = [label for label, _, _ in table]
+        self.codes = {label: code for code, label in enumerate(self.labels)}
+        self.scores = np.array([score for _, score, _ in table], dtype=float)
+        self.valence = (self.scores - 5.5) / 4.5
+        self.categories = [category for _, _, category in table]
+
+        # Trailing slot makes UNKNOWN_CODE (-1) index the default score
+        self._score_lookup = np.append(self.scores, DEFAULT_SCORE)
+        self._labels_array = np.array(self.labels + ["unknown"])
+
+        self.synonyms = {word: self.codes[label] for word, label in synonyms.items()}
+        self.tags = {name: np.zeros(len(self.labels), dtype=bool) for name in tags}
+        for name, labels in tags.items():
+            self.tags[name][[self.codes[label] for label in labels]] = True
+
+        self._words = {**self.codes, **self.synonyms}
+        self._vocabulary = list(self._words)
+        self._max_phrase_words = max(len(word.split()) for word in self._vocabulary)
+        # Near-miss spelling -> code, filled on demand; difflib is the slow part
+        self._fuzzy: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, label: str, fuzzy: bool = True) -> int:
+        """Code for a label, synonym or near-miss spelling; UNKNOWN_CODE if nothing matches"""
+        key = label.strip().lower() if label else ""
+        code = self._words.get(key)
+        if code is None and fuzzy and len(key) >= 4:
+            code = self._fuzzy.get(key)
+            if code is None:
+                self.misses += 1
+                match = difflib.get_close_matches(key, self._vocabulary, n=1, cutoff=FUZZY_CUTOFF)
+                code = self._words[match[0]] if match else UNKNOWN_CODE
+                if len(self._fuzzy) >= FUZZY_CACHE_SIZE:
+                    self._fuzzy.clear()
+                self._fuzzy[key] = code
+                return code
+        self.hits += 1
+        return UNKNOWN_CODE if code is None else code
+
+    def label(self, code: int) -> str:
+        return self._labels_array[code]
+
+    def codes_for(self, labels: Iterable[str], exact: bool = False) -> np.ndarray:
+        """Vectorized labels -> codes; each distinct label is resolved once
+
+        exact only accepts the labels themselves (case-insensitive), not synonyms or misspellings.
+        """
+        array = np.asarray(labels if isinstance(labels, np.ndarray) else list(labels), dtype=str)
+        if not array.size:
+            return np.zeros(0, dtype=np.int64)
+        unique, inverse = np.unique(array, return_inverse=True)
+        if exact:
+            resolved = (self.codes.get(label.lower(), UNKNOWN_CODE) for label in unique)
+        else:
+            resolved = (self.code(label) for label in unique)
+        return np.fromiter(resolved, dtype=np.int64, count=len(unique))[inverse]
+
+    def scores_for(self, values) -> np.ndarray:
+        """Vectorized labels or codes -> mood scores (unknown -> DEFAULT_SCORE)
+
+        Logged moods are scored by exact label, so "good" or a misspelling scores DEFAULT_SCORE as it
+        always has; synonyms only steer free-text matching.
+        """
+        array = np.asarray(values)
+        codes = array if array.dtype.kind in "iu" else self.codes_for(array, exact=True)
+        return self._score_lookup[codes]
+
+    def labels_for(self, codes: np.ndarray) -> np.ndarray:
+        return self._labels_array[codes]
+
+    def match_text(self, text: Optional[str]) -> np.ndarray:
+        """Codes of every emotion word or phrase found in free text (fuzzy only for single-word text)"""
+        words = _WORD_RE.findall(text.lower()) if text else []
+        found = []
+        for size in range(self._max_phrase_words, 0, -1):
+            for i in range(len(words) - size + 1):
+                code = self.code(" ".join(words[i:i + size]), fuzzy=len(words) == 1)
+                if code != UNKNOWN_CODE:
+                    found.append(code)
+        return np.unique(np.array(found, dtype=np.int64))
+
+    def has_tag(self, codes, tag: str) -> bool:
+        codes = np.asarray(codes, dtype=np.int64)
+        codes = codes[codes != UNKNOWN_CODE]
+        return bool(self.tags[tag][codes].any())
+
+    def tagged(self, tag: str) -> List[str]:
+        return [self.labels[code] for code in np.flatnonzero(self.tags[tag])]
+
+    def by_category(self) -> Dict[str, List[str]]:
+        """Mood-scale labels grouped by category (facial-only classes are left out)"""
+        grouped = {category: [] for category in CATEGORY_ORDER}
+        for label, category in zip(self.labels, self.categories):
+            if category in grouped:
+                grouped[category].append(label)
+        return grouped
+
+
+# Built once at import and shared by every service
+EMOTIONS = EmotionRegistry(EMOTION_TABLE, SYNONYMS, TAGS)
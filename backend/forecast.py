@@ -0,0 +1,166 @@
+import numpy as np
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence
+
+# Additive Holt-Winters smoothing constants (level, trend, weekly season)
+DEFAULT_ALPHA = 0.35
+DEFAULT_BETA = 0.05
+DEFAULT_GAMMA = 0.15
+SEASON_LENGTH = 7
+
+MIN_SCORE = 1.0
+MAX_SCORE = 10.0
+
+
+class MoodForecaster:
+    """Additive Holt-Winters model with weekly seasonality over one or more mood series.
+
+    State is kept as arrays of shape (n_series,) so that a single instance can
+    track many users at once; every update is O(1) per series.
+    """
+
+    def __init__(self, n_series: int = 1, alpha: float = DEFAULT_ALPHA, beta: float = DEFAULT_BETA,
+                 gamma: float = DEFAULT_GAMMA, season_length: int = SEASON_LENGTH):
+        self.n_series = n_series
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season_length = season_length
+
+        self.level = np.zeros(n_series)
+        self.trend = np.zeros(n_series)
+        self.season = np.zeros((n_series, season_length))
+        self.steps = np.zeros(n_series, dtype=np.int64)
+        # Running sum of squared one-step-ahead errors, used for the intervals
+        self.sse = np.zeros(n_series)
+        self.n_errors = np.zeros(n_series, dtype=np.int64)
+
+    STATE_FIELDS = ("level", "trend", "season", "steps", "sse", "n_errors")
+
+    def to_state(self) -> Dict:
+        """JSON-serializable snapshot of the model, for the shared state store"""
+        return {
+            "params": [self.alpha, self.beta, self.gamma, self.season_length],
+            **{field: getattr(self, field).tolist() for field in self.STATE_FIELDS}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "MoodForecaster":
+        alpha, beta, gamma, season_length = state["params"]
+        model = cls(len(state["level"]), alpha, beta, gamma, int(season_length))
+        for field in cls.STATE_FIELDS:
+            setattr(model, field, np.asarray(state[field], dtype=getattr(model, field).dtype))
+        return model
+
+    def update(self, values) -> None:
+        """Fold one new observation per series into the state (NaN = no entry for that series)"""
+        y = np.asarray(values, dtype=float).reshape(self.n_series)
+        active = ~np.isnan(y)
+        if not active.any():
+            return
+
+        rows = np.arange(self.n_series)
+        phase = self.steps % self.season_length
+        seasonal = self.season[rows, phase]
+
+        first = active & (self.steps == 0)
+        rest = active & (self.steps > 0)
+
+        # Seed the level with the first observation of each series
+        self.level[first] = y[first]
+
+        if rest.any():
+            y_r = y[rest]
+            level_r = self.level[rest]
+            trend_r = self.trend[rest]
+            seasonal_r = seasonal[rest]
+
+            error = y_r - (level_r + trend_r + seasonal_r)
+            self.sse[rest] += error * error
+            self.n_errors[rest] += 1
+
+            new_level = self.alpha * (y_r - seasonal_r) + (1 - self.alpha) * (level_r + trend_r)
+            self.trend[rest] = self.beta * (new_level - level_r) + (1 - self.beta) * trend_r
+            self.season[rows[rest], phase[rest]] = self.gamma * (y_r - new_level) + (1 - self.gamma) * seasonal_r
+            self.level[rest] = new_level
+
+        self.steps[active] += 1
+
+    def fit(self, history) -> "MoodForecaster":
+        """Feed a full history of shape (T,) or (n_series, T); shorter series are NaN-padded on the left"""
+        data = np.asarray(history, dtype=float)
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+        if self.n_series == 1:
+            self._fit_single(data[0])
+            return self
+        for column in data.T:
+            self.update(column)
+        return self
+
+    def _fit_single(self, values: np.ndarray) -> None:
+        """Same recursion as update() on plain floats; avoids per-step array overhead for long histories"""
+        alpha, beta, gamma, m = self.alpha, self.beta, self.gamma, self.season_length
+        level, trend = float(self.level[0]), float(self.trend[0])
+        season = self.season[0].tolist()
+        steps, sse, n_errors = int(self.steps[0]), float(self.sse[0]), int(self.n_errors[0])
+
+        for y in values[~np.isnan(values)].tolist():
+            phase = steps % m
+            if steps == 0:
+                level = y
+            else:
+                seasonal = season[phase]
+                error = y - (level + trend + seasonal)
+                sse += error * error
+                n_errors += 1
+                new_level = alpha * (y - seasonal) + (1 - alpha) * (level + trend)
+                trend = beta * (new_level - level) + (1 - beta) * trend
+                season[phase] = gamma * (y - new_level) + (1 - gamma) * seasonal
+                level = new_level
+            steps += 1
+
+        self.level[0], self.trend[0] = level, trend
+        self.season[0] = season
+        self.steps[0], self.sse[0], self.n_errors[0] = steps, sse, n_errors
+
+    def residual_std(self) -> np.ndarray:
+        """Standard deviation of the one-step-ahead errors, with a prior for short series"""
+        prior_var, prior_weight = 1.5 ** 2, 3
+        var = (self.sse + prior_var * prior_weight) / (self.n_errors + prior_weight)
+        return np.sqrt(var)
+
+    def forecast(self, days: int, level: float = 0.95) -> Dict[str, np.ndarray]:
+        """Point forecasts and prediction intervals for the next `days` steps, shape (n_series, days)"""
+        horizon = np.arange(1, days + 1)
+        phase = (self.steps[:, None] + horizon[None, :] - 1) % self.season_length
+        seasonal = np.take_along_axis(self.season, phase, axis=1)
+        mean = self.level[:, None] + horizon[None, :] * self.trend[:, None] + seasonal
+
+        # Variance multiplier for additive Holt-Winters h-step errors
+        j = np.arange(0, days)
+        psi = self.alpha * (1 + j * self.beta) + self.gamma * ((j % self.season_length) == 0)
+        psi[0] = 0.0
+        multiplier = 1.0 + np.cumsum(psi ** 2)
+        spread = NormalDist().inv_cdf(0.5 + level / 2) * self.residual_std()[:, None] * np.sqrt(multiplier)[None, :]
+
+        return {
+            "mean": np.clip(mean, MIN_SCORE, MAX_SCORE),
+            "lower": np.clip(mean - spread, MIN_SCORE, MAX_SCORE),
+            "upper": np.clip(mean + spread, MIN_SCORE, MAX_SCORE),
+        }
+
+
+def forecast_many(series: Sequence[Sequence[float]], days: int, level: float = 0.95,
+                  forecaster: Optional[MoodForecaster] = None) -> Dict[str, np.ndarray]:
+    """Fit and forecast many (possibly ragged) score series at once"""
+    lengths = [len(s) for s in series]
+    width = max(lengths) if lengths else 0
+    padded = np.full((len(series), width), np.nan)
+    for i, s in enumerate(series):
+        if lengths[i]:
+            padded[i, width - lengths[i]:] = s
+
+    model = forecaster or MoodForecaster(n_series=len(series))
+    model.fit(padded)
+    return model.forecast(days, level)
@@ -0,0 +1,85 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import uvicorn
+
+from metrics import metrics_endpoint
+
+import aimirror
+import chat
+import mood
+import wellness
+
+# Path prefix -> sub-application. Each module still runs standalone with `uvicorn <module>:app`.
+SERVICES = {
+    "/assistant": chat.app,
+    "/wellness": wellness.app,
+    "/mirror": aimirror.app,
+    "/mood": mood.app,
+}
+READINESS = [chat.readiness, wellness.readiness, aimirror.readiness, mood.readiness]
+
+
+def _without_cors(app: FastAPI) -> FastAPI:
+    """Drop a sub-app's own CORS layer; the gateway applies one for everything"""
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not CORSMiddleware]
+    return app
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mounted apps don't get lifespan events, so run each one's startup/shutdown here
+    async with AsyncExitStack() as stack:
+        for sub_app in SERVICES.values():
+            await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+        yield
+
+
+app = FastAPI(title="MindMesh API Gateway", version="1.0.0", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+for prefix, sub_app in SERVICES.items():
+    app.mount(prefix, _without_cors(sub_app))
+
+# The metrics registry is per process, so one scrape covers every service
+app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+@app.get("/")
+async def root():
+    return {
+        "message": "MindMesh API Gateway",
+        "services": {prefix: sub_app.title for prefix, sub_app in SERVICES.items()}
+    }
+
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "services": list(SERVICES)
+    }
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until every mounted service has finished warming up"""
+    statuses = [readiness.status() for readiness in READINESS]
+    is_ready = all(status["ready"] for status in statuses)
+    return JSONResponse(status_code=200 if is_ready else 503, content={"ready": is_ready, "services": statuses})
+
+
+if __name__ == "__main__":
+    print("Starting MindMesh API Gateway on port 8080...")
+    uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# No default: without a key every LLM call fails and the services fall back to their canned replies
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+if not GROQ_API_KEY:
+    logger.warning("GROQ_API_KEY is not set; LLM calls will fail until it is configured")
+# API root; point it at any OpenAI-compatible stand-in (e.g. a local fake for load tests)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com").rstrip("/")
+CHAT_COMPLETIONS_URL = f"{GROQ_BASE_URL}/openai/v1/chat/completions"
+
+# Keep-alive connections per pool, shared by every app in the process
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+
+_lock = threading.Lock()
+_groq = None
+_session = None
+_async_client = None
+_users = 0
+
+
+def get_groq_client():
+    """Process-wide Groq SDK client"""
+    global _groq
+    with _lock:
+        if _groq is None:
+            from groq import Groq
+            _groq = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+        return _groq
+
+
+def get_http_session():
+    """Process-wide requests session with a pooled adapter"""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONNECTIONS))
+            _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONNECTIONS))
+        return _session
+
+
+def get_async_client():
+    """Process-wide httpx client; reuses connections instead of one client per call"""
+    global _async_client
+    with _lock:
+        if _async_client is None or _async_client.is_closed:
+            import httpx
+            _async_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+            )
+        return _async_client
+
+
+async def aclose() -> None:
+    """Close the HTTP pools; they are recreated on next use. The Groq SDK client lives for the process."""
+    global _session, _async_client
+    with _lock:
+        session, async_client = _session, _async_client
+        _session = _async_client = None
+    if async_client is not None:
+        await async_client.aclose()
+    if session is not None:
+        session.close()
+
+
+@asynccontextmanager
+async def shared_clients():
+    """Hold the shared clients for an app's lifetime; the last app to shut down closes them"""
+    global _users
+    _users += 1
+    try:
+        yield
+    finally:
+        _users -= 1
+        if not _users:
+            await aclose()
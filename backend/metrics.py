@@ -0,0 +1,279 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+# Latency buckets in seconds; fine at the low end for cv2/FaceMesh stages, wide enough for LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Tuple[str, Tuple, str, float]]:
+        """(suffix, label values, extra label text, value) rows for the exposition"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_label_text(self.labelnames, values, extra)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: Any) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [("", labels, "", value) for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Gauge whose values are set directly or read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._callbacks: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels: Any) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def track(self, fn: Callable[[], float], *labels: Any) -> None:
+        """Read the value from fn() on every scrape (queue depths, cache stats)"""
+        with self._lock:
+            self._callbacks[labels] = fn
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks.items())
+        for labels, fn in callbacks:
+            try:
+                values[labels] = float(fn())
+            except Exception:
+                continue
+        return [("", labels, "", value) for labels, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        rows = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                rows.append(("_bucket", labels, f'le="{le}"', cumulative))
+            rows.append(("_sum", labels, "", total))
+            rows.append(("_count", labels, "", cumulative))
+        return rows
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        # Re-registering returns the existing metric, so modules can be imported in any order
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# One registry per process, shared by every app mounted in it
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "mindmesh_request_duration_seconds", "HTTP request latency by endpoint",
+    ("service", "method", "route", "status")
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "mindmesh_stage_duration_seconds", "Latency of named stages inside a request (LLM, TTS, vision...)",
+    ("service", "stage")
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "mindmesh_stage_errors_total", "Stages that raised", ("service", "stage")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "mindmesh_llm_tokens_total", "Tokens reported by the upstream LLM", ("service", "kind")
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "mindmesh_cache_hit_ratio", "Hits / lookups since start", ("cache",)
+)
+CACHE_LOOKUPS = REGISTRY.gauge(
+    "mindmesh_cache_lookups", "Lookups since start", ("cache",)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "mindmesh_queue_depth", "Items waiting in an in-process queue", ("service", "queue")
+)
+
+
+class Stage:
+    """Times one named stage; usable with both `with` and `async with`"""
+    __slots__ = ("service", "name", "start")
+
+    def __init__(self, service: str, name: str):
+        self.service = service
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.service, self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(1, self.service, self.name)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def stage_timer(service: str) -> Callable[[str], Stage]:
+    """Return a stage(name) timer factory bound to one service"""
+    return lambda name: Stage(service, name)
+
+
+def record_tokens(service: str, usage: Any) -> None:
+    """Count prompt/completion tokens from an OpenAI-style usage dict or object"""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.inc(value, service, kind[:-len("_tokens")])
+
+
+def track_cache(cache: str, stats: Callable[[], Tuple[int, int]]) -> None:
+    """Expose a cache's hit ratio; stats() returns (hits, misses)"""
+    def ratio():
+        hits, misses = stats()
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    CACHE_HIT_RATIO.track(ratio, cache)
+    CACHE_LOOKUPS.track(lambda: sum(stats()), cache)
+
+
+def track_queue(service: str, queue: str, depth: Callable[[], float]) -> None:
+    QUEUE_DEPTH.track(depth, service, queue)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware recording per-route request latency"""
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, self.service, scope["method"],
+                getattr(route, "path", "unmatched"), status[0]
+            )
+
+
+async def metrics_endpoint():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def instrument(app: FastAPI, service: str) -> None:
+    """Record request latency for an app and serve the registry at /metrics"""
+    app.add_middleware(MetricsMiddleware, service=service)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -1,14 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 import numpy as np
-import httpx
-import os
+import hashlib
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
-app = FastAPI(title="Mood Timeline AI API", version="1.0.0")
+from admission import AdmissionController, client_key
+from columnar import decode_columns, is_supported
+from emotions import DEFAULT_SCORE, EMOTIONS
+from forecast import MoodForecaster, forecast_many
+from llm import CHAT_COMPLETIONS_URL, GROQ_API_KEY, get_async_client, shared_clients
+from metrics import instrument, record_tokens, stage_timer, track_cache, track_queue
+from profiling import enable_profiling
+from readiness import Readiness
+from state_store import STATE
+from timeline import BUCKETS, build_series
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled Groq connections, closed on shutdown
+    async with shared_clients():
+        yield
+
+app = FastAPI(title="Mood Timeline AI API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +35,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Groq API configuration
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "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")
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+# Per-client admission control in front of the Groq calls
+admission = AdmissionController()
+
+# Request histograms, per-stage timers and /metrics
+instrument(app, "mood")
+# Opt-in per-request sampling profiler (PROFILE_SAMPLE_RATE / PROFILE_TOKEN)
+enable_profiling(app, "mood")
+# No heavy models here; kept for a uniform /ready probe
+readiness = Readiness("mood")
+stage = stage_timer("mood")
+track_queue("mood", "admission_queued", lambda: admission.queued)
+track_queue("mood", "admission_in_flight", lambda: admission.in_flight)
+track_cache("emotion_labels", lambda: (EMOTIONS.hits, EMOTIONS.misses))
 
 # Data models
 class MoodData(BaseModel):
@@ -48,34 +75,32 @@ class PredictionResponse(BaseModel):
     recommendations: List[str]
     correlations: Dict[str, float]
 
+class ForecastPoint(BaseModel):
+    date: Optional[str] = None
+    mood: str
+    score: float
+    lower: float
+    upper: float
+
+class ForecastResponse(BaseModel):
+    days: int
+    level: float
+    forecast: List[ForecastPoint]
+    model: Dict[str, Any]
+
+class BatchForecastRequest(BaseModel):
+    users: Dict[str, List[MoodData]]
+
 # Enhanced utility functions
-def mood_to_score(emotion: str) -> int:
-    """Convert emotion to numerical score (1-10)"""
-    mood_scores = {
-        # Very negative emotions (1-3)
-        'depressed': 1, 'devastated': 1, 'hopeless': 1,
-        'angry': 2, 'furious': 2, 'enraged': 2,
-        'sad': 2, 'miserable': 2, 'heartbroken': 2,
-        'anxious': 3, 'panicked': 3, 'overwhelmed': 3,
-        
-        # Moderately negative emotions (4-5)
-        'stressed': 4, 'worried': 4, 'frustrated': 4,
-        'tired': 4, 'exhausted': 4, 'drained': 4,
-        'lonely': 4, 'isolated': 4, 'bored': 4,
-        'neutral': 5, 'okay': 5, 'fine': 5,
-        
-        # Moderately positive emotions (6-7)
-        'calm': 6, 'peaceful': 6, 'relaxed': 6,
-        'content': 6, 'satisfied': 6, 'serene': 6,
-        'hopeful': 7, 'optimistic': 7, 'confident': 7,
-        
-        # Very positive emotions (8-10)
-        'happy': 8, 'cheerful': 8, 'pleased': 8,
-        'excited': 9, 'thrilled': 9, 'energetic': 9,
-        'joyful': 10, 'ecstatic': 10, 'blissful': 10,
-        'grateful': 8, 'loved': 9, 'accomplished': 8
-    }
-    return mood_scores.get(emotion.lower(), 5)
+def emotions_to_scores(emotions: np.ndarray) -> tuple:
+    """Map a column of emotion codes or labels to (scores, codes) arrays"""
+    if emotions.dtype.kind in "iu":
+        if emotions.size and (emotions.min() < 0 or emotions.max() >= len(EMOTIONS)):
+            raise ValueError("Emotion code out of range")
+        codes = emotions
+    else:
+        codes = EMOTIONS.codes_for(emotions, exact=True)
+    return EMOTIONS.scores_for(codes), codes
 
 def score_to_mood(score: float) -> str:
     """Convert numerical score back to emotion"""
@@ -102,8 +127,8 @@ def calculate_correlation(x: List[float], y: List[float]) -> float:
     if len(x) < 2 or len(y) < 2:
         return 0.0
     min_len = min(len(x), len(y))
-    x, y = x[:min_len], y[:min_len]
-    if len(set(x)) == 1 or len(set(y)) == 1:
+    x, y = np.asarray(x[:min_len], dtype=float), np.asarray(y[:min_len], dtype=float)
+    if np.ptp(x) == 0 or np.ptp(y) == 0:
         return 0.0
     correlation = np.corrcoef(x, y)[0, 1]
     return correlation if not np.isnan(correlation) else 0.0
@@ -133,7 +158,7 @@ def predict_mood(mood_scores: List[int], intensities: List[int] = None) -> tuple
     recent_volatility = np.std(scores[-5:] if len(scores) >= 5 else scores)
     
     # Factor 4: Intensity consideration
-    if intensities:
+    if intensities is not None and len(intensities):
         intensity_factor = np.mean(intensities[-3:]) / 5.0  # Normalize to 0-2
     else:
         intensity_factor = 1.0
@@ -185,32 +210,81 @@ def analyze_mood_pattern(mood_scores: List[int]) -> str:
     else:
         return "stable"
 
-async def get_groq_insights(mood_data: List[MoodData], sleep_data: List[SleepData], focus_data: List[FocusData]) -> Dict:
+# Per-user forecaster state lives in the state store so repeat requests only fold in new entries.
+# Store lookups: [hits, misses]
+forecaster_cache_stats = [0, 0]
+track_cache("user_forecasters", lambda: tuple(forecaster_cache_stats))
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+def _history_digest(entries: List[MoodData]) -> str:
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(f"{entry.date}\x1f{entry.emotion}\x1e".encode())
+    return digest.hexdigest()
+
+def _user_forecaster(user_id: str, mood_data: List[MoodData]) -> MoodForecaster:
+    """Return the cached forecaster for a user, updated with the entries appended since the last request
+
+    Clients resend the whole history, so the model remembers how many entries it has folded in and a
+    digest of them. Any other history is refit from scratch, which keeps the forecast identical to the
+    anonymous path for the same payload.
+    """
+    def fold(state):
+        seen = state.get("count", 0) if state else 0
+        reuse = bool(state) and seen <= len(mood_data) and state.get("digest") == _history_digest(mood_data[:seen])
+        forecaster_cache_stats[not reuse] += 1
+        if reuse and seen == len(mood_data):
+            return None
+        model = MoodForecaster.from_state(state["model"]) if reuse else MoodForecaster()
+        new_entries = mood_data[seen:] if reuse else mood_data
+        with stage("forecast_fit"):
+            model.fit(EMOTIONS.scores_for([m.emotion for m in new_entries]))
+        return {"model": model.to_state(), "count": len(mood_data), "digest": _history_digest(mood_data)}
+
+    # Read, fit and write as one step so concurrent requests for a user can't drop each other's entries
+    state = STATE.update(f"mood:forecaster:{user_id}", fold)
+    return MoodForecaster.from_state(state["model"])
+
+def _forecast_points(mean, lower, upper, last_date: Optional[str]) -> List[ForecastPoint]:
+    start = _parse_date(last_date) if last_date else None
+    points = []
+    for i in range(len(mean)):
+        points.append(ForecastPoint(
+            date=(start + timedelta(days=i + 1)).date().isoformat() if start else None,
+            mood=score_to_mood(float(mean[i])),
+            score=round(float(mean[i]), 2),
+            lower=round(float(lower[i]), 2),
+            upper=round(float(upper[i]), 2)
+        ))
+    return points
+
+async def get_groq_insights(mood_scores, recent_moods: List[str], emotion_variety: int,
+                            sleep_hours, focus_scores) -> Dict:
     # Prepare more detailed summary
-    mood_scores = [mood_to_score(m.emotion) for m in mood_data]
     avg_mood = np.mean(mood_scores)
     mood_trend = analyze_mood_pattern(mood_scores)
     
-    # Get recent mood pattern
-    recent_moods = [m.emotion for m in mood_data[-5:]]
-    emotion_variety = len(set([m.emotion for m in mood_data]))
-    
     summary = f"""
     Mood Analysis:
-    - {len(mood_data)} entries, Average score: {avg_mood:.1f}/10
+    - {len(mood_scores)} entries, Average score: {avg_mood:.1f}/10
     - Trend: {mood_trend}
     - Recent moods: {recent_moods}
     - Emotion variety: {emotion_variety} different emotions
-    - Sleep entries: {len(sleep_data)}
-    - Focus entries: {len(focus_data)}
+    - Sleep entries: {len(sleep_hours)}
+    - Focus entries: {len(focus_scores)}
     """
     
-    if sleep_data:
-        avg_sleep = np.mean([s.hours for s in sleep_data])
+    if len(sleep_hours):
+        avg_sleep = np.mean(sleep_hours)
         summary += f"\n    - Average sleep: {avg_sleep:.1f} hours"
     
-    if focus_data:
-        avg_focus = np.mean([f.score for f in focus_data])
+    if len(focus_scores):
+        avg_focus = np.mean(focus_scores)
         summary += f"\n    - Average focus: {avg_focus:.1f}/10"
     
     prompt = f"""Analyze this detailed wellness data: {summary}
@@ -227,9 +301,9 @@ Based on the mood trend ({mood_trend}) and recent patterns, provide insights as
 Make recommendations specific to the trend and recent mood patterns."""
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{GROQ_BASE_URL}/chat/completions",
+        with stage("groq"):
+            response = await get_async_client().post(
+                CHAT_COMPLETIONS_URL,
                 headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
                 json={
                     "model": "mixtral-8x7b-32768",
@@ -239,14 +313,16 @@ Make recommendations specific to the trend and recent mood patterns."""
                 },
                 timeout=15.0
             )
-            
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                # Extract JSON
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                if start != -1 and end != 0:
-                    return json.loads(content[start:end])
+        
+        if response.status_code == 200:
+            result = response.json()
+            record_tokens("mood", result.get("usage"))
+            content = result['choices'][0]['message']['content']
+            # Extract JSON
+            start = content.find('{')
+            end = content.rfind('}') + 1
+            if start != -1 and end != 0:
+                return json.loads(content[start:end])
     except Exception as e:
         print(f"Groq API error: {e}")
     
@@ -277,81 +353,243 @@ Make recommendations specific to the trend and recent mood patterns."""
         "insights": f"Your mood shows a {mood_trend} pattern over recent entries"
     }
 
+async def build_insights(mood_scores: np.ndarray, intensities: np.ndarray, recent_moods: List[str],
+                         emotion_variety: int, sleep_hours: np.ndarray, focus_scores: np.ndarray) -> PredictionResponse:
+    """Shared insight pipeline for the object and columnar request formats"""
+    # Calculate correlations
+    sleep_corr = 0.0
+    focus_corr = 0.0
+    
+    if len(sleep_hours):
+        sleep_corr = calculate_correlation(sleep_hours, mood_scores)
+    
+    if len(focus_scores):
+        focus_corr = calculate_correlation(focus_scores, mood_scores)
+    
+    # Get AI insights from Groq
+    ai_insights = await get_groq_insights(mood_scores, recent_moods, emotion_variety, sleep_hours, focus_scores)
+    
+    # Enhanced prediction
+    predicted_mood, confidence = predict_mood(mood_scores, intensities)
+    
+    # Override AI prediction if our algorithm is more confident
+    final_predicted_mood = ai_insights.get("prediction_mood", predicted_mood)
+    final_confidence = max(ai_insights.get("confidence", 0.7), confidence)
+    
+    return PredictionResponse(
+        moodTrend=ai_insights.get("trend", analyze_mood_pattern(mood_scores)),
+        prediction={
+            "nextDayMood": final_predicted_mood,
+            "confidence": final_confidence,
+            "factors": {
+                "recent_average": float(np.mean(mood_scores[-3:])),
+                "trend_direction": ai_insights.get("trend", "stable"),
+                "data_points": len(mood_scores)
+            }
+        },
+        recommendations=ai_insights.get("recommendations", [
+            "Continue tracking your mood daily",
+            "Notice patterns between activities and emotions", 
+            "Practice mindfulness to increase emotional awareness"
+        ]),
+        correlations={
+            "sleep_mood": round(float(sleep_corr), 3),
+            "focus_mood": round(float(focus_corr), 3)
+        }
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Enhanced Mood Timeline AI API is running"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe"""
+    return await readiness.endpoint()
+
 @app.post("/api/insights", response_model=PredictionResponse)
-async def generate_insights(request: InsightRequest):
+async def generate_insights(request: InsightRequest, http_request: Request, user_id: Optional[str] = None):
     try:
         if len(request.moodData) < 2:
             raise HTTPException(status_code=400, detail="Need at least 2 mood entries")
         
         # Calculate enhanced stats
-        mood_scores = [mood_to_score(m.emotion) for m in request.moodData]
-        intensities = [m.intensity or 5 for m in request.moodData]
-        
-        # Calculate correlations
-        sleep_corr = 0.0
-        focus_corr = 0.0
-        
-        if request.sleepData:
-            sleep_hours = [s.hours for s in request.sleepData]
-            sleep_corr = calculate_correlation(sleep_hours, mood_scores)
-        
-        if request.focusData:
-            focus_scores = [f.score for f in request.focusData]
-            focus_corr = calculate_correlation(focus_scores, mood_scores)
-        
-        # Get AI insights from Groq
-        ai_insights = await get_groq_insights(request.moodData, request.sleepData or [], request.focusData or [])
-        
-        # Enhanced prediction
-        predicted_mood, confidence = predict_mood(mood_scores, intensities)
-        
-        # Override AI prediction if our algorithm is more confident
-        final_predicted_mood = ai_insights.get("prediction_mood", predicted_mood)
-        final_confidence = max(ai_insights.get("confidence", 0.7), confidence)
-        
-        return PredictionResponse(
-            moodTrend=ai_insights.get("trend", analyze_mood_pattern(mood_scores)),
-            prediction={
-                "nextDayMood": final_predicted_mood,
-                "confidence": final_confidence,
-                "factors": {
-                    "recent_average": float(np.mean(mood_scores[-3:])),
-                    "trend_direction": ai_insights.get("trend", "stable"),
-                    "data_points": len(mood_scores)
-                }
-            },
-            recommendations=ai_insights.get("recommendations", [
-                "Continue tracking your mood daily",
-                "Notice patterns between activities and emotions", 
-                "Practice mindfulness to increase emotional awareness"
-            ]),
-            correlations={
-                "sleep_mood": round(sleep_corr, 3),
-                "focus_mood": round(focus_corr, 3)
-            }
-        )
+        emotions = [m.emotion for m in request.moodData]
+        mood_scores = EMOTIONS.scores_for(emotions)
+        intensities = np.array([m.intensity or 5 for m in request.moodData], dtype=float)
+
+        async with admission.admit(client_key(http_request, user_id)):
+            return await build_insights(
+                mood_scores,
+                intensities,
+                recent_moods=emotions[-5:],
+                emotion_variety=len(set(emotions)),
+                sleep_hours=np.array([s.hours for s in request.sleepData or []], dtype=float),
+                focus_scores=np.array([f.score for f in request.focusData or []], dtype=float)
+            )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/insights/columnar", response_model=PredictionResponse)
+async def generate_insights_columnar(request: Request, user_id: Optional[str] = None):
+    """Insights from parallel arrays (JSON, msgpack or Arrow IPC) without per-entry validation"""
+    content_type = request.headers.get("content-type", "application/json")
+    if not is_supported(content_type):
+        raise HTTPException(status_code=415, detail=f"Unsupported columnar format: {content_type}")
+
+    try:
+        with stage("decode_columns"):
+            series = decode_columns(await request.body(), content_type)
+        mood_scores, codes = emotions_to_scores(series["mood"]["emotion"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(mood_scores) < 2:
+        raise HTTPException(status_code=400, detail="Need at least 2 mood entries")
+
+    intensities = series["mood"]["intensity"]
+    if not len(intensities):
+        intensities = np.full(len(mood_scores), 5.0)
+    intensities = np.where(intensities > 0, intensities, 5.0)
+
+    try:
+        async with admission.admit(client_key(request, user_id)):
+            return await build_insights(
+                mood_scores,
+                intensities,
+                recent_moods=[str(label) for label in EMOTIONS.labels_for(codes[-5:])],
+                emotion_variety=int(np.unique(codes).size),
+                sleep_hours=series["sleep"]["hours"],
+                focus_scores=series["focus"]["score"]
+            )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/emotion-codes")
+async def get_emotion_codes():
+    """Integer code table for the columnar emotion column"""
+    return {"codes": EMOTIONS.labels, "default_score": DEFAULT_SCORE}
+
+def _timeline_response(columns: Dict[str, tuple], bucket: str, points: Optional[int]) -> Dict[str, Any]:
+    series = {}
+    for name, (dates, values) in columns.items():
+        if len(dates) != len(values):
+            raise ValueError(f"'{name}' has {len(dates)} dates but {len(values)} values")
+        if len(dates):
+            series[name] = build_series(dates, values, bucket, points)
+    return {"bucket": bucket, "points": points, "series": series}
+
+def _check_bucket(bucket: str) -> None:
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(BUCKETS)}")
+
+@app.post("/api/timeline")
+async def mood_timeline(
+    request: InsightRequest,
+    bucket: str = Query("day"),
+    points: Optional[int] = Query(None, ge=3, le=10000)
+):
+    """Chart-ready mood/sleep/focus series bucketed by day, week or month, optionally LTTB-downsampled"""
+    _check_bucket(bucket)
+    try:
+        return _timeline_response({
+            "mood": ([m.date for m in request.moodData], EMOTIONS.scores_for([m.emotion for m in request.moodData])),
+            "sleep": ([s.date for s in request.sleepData or []], [s.hours for s in request.sleepData or []]),
+            "focus": ([f.date for f in request.focusData or []], [f.score for f in request.focusData or []])
+        }, bucket, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/timeline/columnar")
+async def mood_timeline_columnar(
+    request: Request,
+    bucket: str = Query("day"),
+    points: Optional[int] = Query(None, ge=3, le=10000)
+):
+    """Same as /api/timeline for columnar payloads (JSON, msgpack or Arrow IPC)"""
+    _check_bucket(bucket)
+    content_type = request.headers.get("content-type", "application/json")
+    if not is_supported(content_type):
+        raise HTTPException(status_code=415, detail=f"Unsupported columnar format: {content_type}")
+
+    try:
+        with stage("decode_columns"):
+            series = decode_columns(await request.body(), content_type)
+        mood_scores, _ = emotions_to_scores(series["mood"]["emotion"])
+        return _timeline_response({
+            "mood": (series["mood"]["date"], mood_scores),
+            "sleep": (series["sleep"]["date"], series["sleep"]["hours"]),
+            "focus": (series["focus"]["date"], series["focus"]["score"])
+        }, bucket, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/forecast", response_model=ForecastResponse)
+async def forecast_mood(
+    request: InsightRequest,
+    days: int = Query(7, ge=1, le=90),
+    level: float = Query(0.95, gt=0, lt=1),
+    user_id: Optional[str] = None
+):
+    """Forecast mood scores for the next N days with prediction intervals"""
+    if len(request.moodData) < 2:
+        raise HTTPException(status_code=400, detail="Need at least 2 mood entries")
+
+    if user_id:
+        model = _user_forecaster(user_id, request.moodData)
+    else:
+        model = MoodForecaster().fit(EMOTIONS.scores_for([m.emotion for m in request.moodData]))
+
+    result = model.forecast(days, level)
+    return ForecastResponse(
+        days=days,
+        level=level,
+        forecast=_forecast_points(result["mean"][0], result["lower"][0], result["upper"][0],
+                                  request.moodData[-1].date),
+        model={
+            "type": "holt_winters_additive",
+            "season_length": model.season_length,
+            "observations": int(model.steps[0]),
+            "level": round(float(model.level[0]), 3),
+            "trend": round(float(model.trend[0]), 3)
+        }
+    )
+
+@app.post("/api/forecast/batch")
+async def forecast_mood_batch(
+    request: BatchForecastRequest,
+    days: int = Query(7, ge=1, le=90),
+    level: float = Query(0.95, gt=0, lt=1)
+):
+    """Forecast many users at once with a single vectorized model
+
+    Users with fewer than 2 entries are listed under `errors` instead of being forecast.
+    """
+    # Same minimum as /api/forecast; an unseeded model would invent a forecast
+    user_ids = [u for u, entries in request.users.items() if len(entries) >= 2]
+    errors = {u: "Need at least 2 mood entries" for u, entries in request.users.items() if len(entries) < 2}
+
+    forecasts = {}
+    if user_ids:
+        series = [EMOTIONS.scores_for([m.emotion for m in request.users[u]]) for u in user_ids]
+        result = forecast_many(series, days, level)
+        for i, user_id in enumerate(user_ids):
+            forecasts[user_id] = _forecast_points(
+                result["mean"][i], result["lower"][i], result["upper"][i],
+                request.users[user_id][-1].date
+            )
+    return {"days": days, "level": level, "forecasts": forecasts, "errors": errors}
+
 # Additional endpoint to get available emotions
 @app.get("/api/emotions")
 async def get_available_emotions():
     """Return all available emotions categorized by intensity"""
-    emotions = {
-        "very_negative": ["depressed", "devastated", "hopeless", "furious", "enraged", "miserable", "heartbroken"],
-        "negative": ["angry", "sad", "anxious", "panicked", "overwhelmed", "stressed", "worried", "frustrated"],
-        "mild_negative": ["tired", "exhausted", "drained", "lonely", "isolated", "bored"],
-        "neutral": ["neutral", "okay", "fine"],
-        "mild_positive": ["calm", "peaceful", "relaxed", "content", "satisfied", "serene"],
-        "positive": ["hopeful", "optimistic", "confident", "happy", "cheerful", "pleased", "grateful"],
-        "very_positive": ["excited", "thrilled", "energetic", "joyful", "ecstatic", "blissful", "loved", "accomplished"]
-    }
-    return emotions
+    return EMOTIONS.by_category()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,256 @@
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+# Off unless one of these is set. PROFILE_SAMPLE_RATE profiles that fraction of requests;
+# PROFILE_TOKEN lets a request opt in with "X-Profile: <token>" (and guards the download routes).
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+# Oldest profiles are deleted beyond this many
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILES_ROUTE = "/debug/profiles"
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+MAX_DEPTH = 128
+
+# Innermost frames of threads that are parked, not working (event loop select, idle pool workers)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def collapse(frame) -> Optional[str]:
+    """Root-first "a;b;c" stack for one thread, or None when the thread is idle"""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+        return None
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Profile:
+    """Stack samples taken while one request was in flight"""
+
+    def __init__(self, service: str, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.service = service
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.duration = 0.0
+        self.ticks = 0
+        self.stacks: Counter = Counter()
+        # Profiled requests in flight when this one started, itself included
+        self.concurrent = 1
+
+    def add(self, stacks: List[str]) -> None:
+        self.ticks += 1
+        self.stacks.update(stacks)
+
+    def top(self, n: int = 3) -> List[tuple]:
+        """(frame, share of samples) for the innermost frames seen most often"""
+        leaves = Counter()
+        for stack, count in list(self.stacks.items()):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [(frame, count / self.ticks) for frame, count in leaves.most_common(n)] if self.ticks else []
+
+    def summary(self) -> str:
+        top = ", ".join(f"{frame} {share:.0%}" for frame, share in self.top())
+        return (f"{self.ticks} samples @ {PROFILE_INTERVAL * 1e3:g}ms; concurrent={self.concurrent}"
+                + (f"; {top}" if top else ""))
+
+    def save(self, directory: Path = PROFILE_DIR) -> None:
+        """Write <id>.folded (flamegraph.pl / speedscope input) and <id>.json metadata"""
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        (directory / f"{self.id}.folded").write_text("\n".join(lines) + "\n")
+        (directory / f"{self.id}.json").write_text(json.dumps(self.meta()))
+        prune(directory)
+
+    def meta(self) -> Dict:
+        return {
+            "id": self.id,
+            "service": self.service,
+            "method": self.method,
+            "path": self.path,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1e3, 2),
+            "samples": self.ticks,
+            "concurrent": self.concurrent,
+            "interval_ms": PROFILE_INTERVAL * 1e3,
+            "top": [{"frame": frame, "share": round(share, 3)} for frame, share in self.top(10)]
+        }
+
+
+def prune(directory: Path, keep: int = PROFILE_MAX_FILES) -> None:
+    metas = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for meta in metas[:max(0, len(metas) - keep)]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".folded").unlink(missing_ok=True)
+
+
+class Sampler:
+    """One background thread sampling every thread's stack while any profile is active.
+
+    Samples cover the whole process, so requests running concurrently with a profiled one
+    show up in its profile too; Profile.concurrent says how many profiled ones overlapped.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.add(profile)
+            profile.concurrent = len(self._profiles)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = collapse(frame)
+                if stack is not None:
+                    stacks.append(f"{names.get(ident, ident)};{stack}")
+            for profile in profiles:
+                profile.add(stacks)
+            time.sleep(self.interval)
+
+
+SAMPLER = Sampler()
+
+
+def _token_ok(value: str) -> bool:
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(value.encode(), PROFILE_TOKEN.encode())
+
+
+class ProfilingMiddleware:
+    """Plain ASGI middleware profiling requests picked by PROFILE_SAMPLE_RATE or the X-Profile header.
+
+    Profiled responses get X-Profile-Id and an X-Profile-Summary of the hottest frames up to the
+    response start; the stored profile also covers the rest of a streamed body.
+    """
+
+    def __init__(self, app, service: str, sampler: Sampler = SAMPLER):
+        self.app = app
+        self.service = service
+        self.sampler = sampler
+
+    def _selected(self, scope) -> bool:
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return True
+        if PROFILE_TOKEN:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return _token_ok(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        # The download routes take the same header; don't profile them
+        if scope["type"] != "http" or PROFILES_ROUTE in scope["path"] or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(self.service, scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode()),
+                    (b"x-profile-summary", profile.summary().encode("latin-1", "replace")),
+                ]}
+            await send(message)
+
+        start = time.perf_counter()
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.stop(profile)
+            profile.duration = time.perf_counter() - start
+            try:
+                profile.save()
+            except OSError as e:
+                logger.error(f"Could not save profile {profile.id}: {e}")
+
+
+def _check_token(request: Request) -> None:
+    if not _token_ok(request.headers.get("x-profile", "")):
+        raise HTTPException(status_code=403, detail="Profile access requires the X-Profile token")
+
+
+async def list_profiles(request: Request):
+    _check_token(request)
+    metas = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True) if PROFILE_DIR.exists() else []
+    return {"profiles": [json.loads(p.read_text()) for p in metas]}
+
+
+async def get_profile(profile_id: str, request: Request):
+    """Collapsed stacks, ready for flamegraph.pl or speedscope"""
+    _check_token(request)
+    path = PROFILE_DIR / f"{profile_id}.folded"
+    if not PROFILE_ID.match(profile_id) or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(path.read_text())
+
+
+def enable_profiling(app: FastAPI, service: str) -> None:
+    """Add the profiler and its download routes when profiling is configured; otherwise add nothing"""
+    if not (PROFILE_SAMPLE_RATE > 0 or PROFILE_TOKEN):
+        return
+    app.add_middleware(ProfilingMiddleware, service=service)
+    app.add_api_route(PROFILES_ROUTE, list_profiles, methods=["GET"], include_in_schema=False)
+    app.add_api_route(PROFILES_ROUTE + "/{profile_id}", get_profile, methods=["GET"], include_in_schema=False)
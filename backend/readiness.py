@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict
+
+from fastapi.responses import JSONResponse
+
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Warm heavy dependencies at startup; set to 0 to load them on first use instead
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+
+
+class Readiness:
+    """Warmup status of a service's heavy dependencies, reported by /ready"""
+
+    def __init__(self, service: str):
+        self.service = service
+        # component -> "warming" | "ready" | "failed: <error>"
+        self.components: Dict[str, str] = {}
+        self._tasks = set()
+
+    @property
+    def ready(self) -> bool:
+        return all(status == "ready" for status in self.components.values())
+
+    def warm(self, name: str, load: Callable[[], object]) -> None:
+        """Run a blocking loader in a worker thread; the service reports not-ready until it finishes"""
+        self.components[name] = "warming"
+        task = asyncio.get_running_loop().create_task(self._run(name, load))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, name: str, load: Callable[[], object]) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(load)
+            self.components[name] = "ready"
+        except Exception as e:
+            logger.error(f"Warmup of {self.service}/{name} failed: {e}")
+            self.components[name] = f"failed: {e}"
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, self.service, f"warmup_{name}")
+
+    def status(self) -> Dict:
+        return {"service": self.service, "ready": self.ready, "components": dict(self.components)}
+
+    async def endpoint(self):
+        """200 once every warmed component is loaded, 503 before that"""
+        return JSONResponse(status_code=200 if self.ready else 503, content=self.status())
@@ -0,0 +1,321 @@
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from crisis import detect
+from metrics import Stage, track_cache
+
+logger = logging.getLogger(__name__)
+
+# Serve LLM replies for paraphrases of earlier messages; set to 0 to always call the LLM
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "1") != "0"
+# Chroma persistence directory, outside the repo so the tracked medichain_chroma_db store is never written
+SEMANTIC_CACHE_PATH = Path(os.getenv("SEMANTIC_CACHE_PATH", Path.home() / ".cache" / "mindmesh" / "semantic_cache"))
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Cosine similarity needed for a hit; defaults depend on the embedder (see below)
+SEMANTIC_CACHE_THRESHOLD = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+# Entries kept per service; the oldest are evicted beyond this
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+# Seconds an entry is served; per service with SEMANTIC_CACHE_TTL_<SERVICE>
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+
+# Expired entries are purged and the size cap enforced every this many writes
+MAINTENANCE_EVERY = 100
+# Embeddings of recent lookups, reused when the reply is stored
+RECENT_EMBEDDINGS = 256
+
+PUNCTUATION = re.compile(r"[^\w\s']+")
+WHITESPACE = re.compile(r"\s+")
+APOSTROPHES = re.compile(r"['’`]")
+# Words that flip or qualify a message's polarity. Sentence embeddings barely register them
+# ("I'm not anxious anymore" sits close to "I'm anxious"), so they partition the cache instead.
+POLARITY_WORDS = frozenset({
+    "not", "no", "never", "nor", "none", "nothing", "nobody", "neither", "without", "anymore", "longer",
+    "hardly", "barely", "cannot", "cant", "dont", "doesnt", "didnt", "isnt", "arent", "wasnt", "werent",
+    "wont", "wouldnt", "shouldnt", "couldnt", "havent", "hasnt", "hadnt", "aint",
+})
+
+
+def normalize(text: str) -> str:
+    return WHITESPACE.sub(" ", PUNCTUATION.sub(" ", APOSTROPHES.sub("'", text.lower()))).strip()
+
+
+def polarity(text: str) -> str:
+    """Sorted polarity words of a normalized message; messages only match others with the same set"""
+    words = {APOSTROPHES.sub("", w) for w in text.split() if w.endswith("n't")}
+    words.update(w for w in APOSTROPHES.sub("", text).split() if w in POLARITY_WORDS)
+    return " ".join(sorted(words))
+
+
+class SentenceEmbedder:
+    """Small local sentence-transformers model on CPU"""
+
+    # MiniLM puts paraphrases ("I can't sleep" / "I'm having trouble sleeping") around 0.75-0.9
+    default_threshold = 0.8
+
+    def __init__(self, model_name: str = SEMANTIC_CACHE_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.model.encode([text], normalize_embeddings=True)[0].astype(np.float32)
+
+
+class HashingEmbedder:
+    """Dependency-free fallback: hashed word and character-trigram counts.
+
+    Only near-identical wording scores high, so it is paired with a strict threshold.
+    """
+
+    default_threshold = 0.92
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        padded = f" {text} "
+        features = text.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        hashes = np.array([zlib.crc32(f.encode()) for f in features], dtype=np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        np.add.at(vector, (hashes % self.dim).astype(np.intp), np.where(hashes & (1 << 31), 1.0, -1.0))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def load_embedder():
+    try:
+        return SentenceEmbedder()
+    except ImportError:
+        logger.warning("sentence-transformers not installed; semantic cache uses hashed n-grams (near-duplicates only)")
+        return HashingEmbedder()
+
+
+# (id, similarity, response, expires_at) of the closest entry in a scope
+Match = Tuple[str, float, str, float]
+
+
+class ChromaIndex:
+    """Entries in a cosine-space collection of the local Chroma store"""
+
+    def __init__(self, service: str, path: Path = SEMANTIC_CACHE_PATH):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=str(path))
+        self.collection = self.client.get_or_create_collection(
+            name=f"semantic_cache_{service}", metadata={"hnsw:space": "cosine"}
+        )
+
+    def query(self, embedding: np.ndarray, scope: str) -> Optional[Match]:
+        result = self.collection.query(
+            query_embeddings=[embedding.tolist()], n_results=1, where={"scope": scope},
+            include=["documents", "metadatas", "distances"]
+        )
+        if not result["ids"] or not result["ids"][0]:
+            return None
+        meta = result["metadatas"][0][0]
+        return result["ids"][0][0], 1.0 - result["distances"][0][0], result["documents"][0][0], meta["expires_at"]
+
+    def add(self, entry_id: str, embedding: np.ndarray, message: str, response: str, scope: str,
+            expires_at: float) -> None:
+        self.collection.add(
+            ids=[entry_id], embeddings=[embedding.tolist()], documents=[response],
+            metadatas=[{"scope": scope, "message": message, "created": time.time(), "expires_at": expires_at}]
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def purge_expired(self, now: float) -> None:
+        self.collection.delete(where={"expires_at": {"$lt": now}})
+
+    def evict(self, max_entries: int) -> None:
+        excess = self.collection.count() - max_entries
+        if excess > 0:
+            entries = self.collection.get(include=["metadatas"])
+            oldest = sorted(zip(entries["ids"], entries["metadatas"]), key=lambda e: e[1]["created"])[:excess]
+            self.delete([entry_id for entry_id, _ in oldest])
+
+
+class MemoryIndex:
+    """In-process fallback when chromadb is not installed; entries are lost on restart"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._matrix = None
+        self._ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def query(self, embedding: np.ndarray, scope: str) -> Optional[Match]:
+        with self._lock:
+            if self._matrix is None and self._entries:
+                self._ids = list(self._entries)
+                self._matrix = np.stack([self._entries[i]["embedding"] for i in self._ids])
+            if not self._entries:
+                return None
+            ids, matrix = self._ids, self._matrix
+            in_scope = np.array([self._entries[i]["scope"] == scope for i in ids])
+            if not in_scope.any():
+                return None
+            similarities = np.where(in_scope, matrix @ embedding, -np.inf)
+            best = int(np.argmax(similarities))
+            entry = self._entries[ids[best]]
+            return ids[best], float(similarities[best]), entry["response"], entry["expires_at"]
+
+    def add(self, entry_id, embedding, message, response, scope, expires_at):
+        with self._lock:
+            self._entries[entry_id] = {"embedding": embedding, "response": response, "scope": scope,
+                                       "expires_at": expires_at}
+            self._matrix = None
+
+    def delete(self, ids):
+        with self._lock:
+            for entry_id in ids:
+                self._entries.pop(entry_id, None)
+            self._matrix = None
+
+    def purge_expired(self, now):
+        with self._lock:
+            expired = [i for i, entry in self._entries.items() if entry["expires_at"] < now]
+        self.delete(expired)
+
+    def evict(self, max_entries):
+        with self._lock:
+            # Insertion order is age order
+            oldest = list(self._entries)[:max(0, len(self._entries) - max_entries)]
+        self.delete(oldest)
+
+
+def load_index(service: str):
+    try:
+        return ChromaIndex(service)
+    except ImportError:
+        logger.warning("chromadb not installed; semantic cache is kept in memory")
+        return MemoryIndex()
+
+
+class SemanticCache:
+    """LLM replies keyed by message meaning, looked up by cosine similarity within a scope.
+
+    Scope is "global" for replies that depend only on the message, or a key naming the user and
+    whatever else the reply was conditioned on. Entries only match messages with the same polarity
+    words, so a negated message never gets the reply to its opposite. Crisis messages are never
+    served from or written to the cache.
+    """
+
+    def __init__(self, service: str, ttl: Optional[float] = None, threshold: Optional[float] = None,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, enabled: bool = SEMANTIC_CACHE):
+        self.service = service
+        self.ttl = ttl if ttl is not None else float(os.getenv(f"SEMANTIC_CACHE_TTL_{service.upper()}", SEMANTIC_CACHE_TTL))
+        self._threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.embedder = None
+        self.index = None
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loader = None
+        track_cache(f"semantic_{service}", lambda: (self.hits, self.misses))
+
+    @property
+    def threshold(self) -> float:
+        if self._threshold is not None:
+            return self._threshold
+        if SEMANTIC_CACHE_THRESHOLD:
+            return float(SEMANTIC_CACHE_THRESHOLD)
+        return self.embedder.default_threshold if self.embedder else 1.0
+
+    def load(self) -> None:
+        """Load the embedding model and open the index (run by the startup warmup)"""
+        with self._load_lock:
+            if self.index is None:
+                self.embedder = load_embedder()
+                self.index = load_index(self.service)
+
+    def _ready(self) -> bool:
+        """True once loaded; otherwise starts loading in a background thread, so callers never wait on the model"""
+        if self.index is not None:
+            return True
+        with self._lock:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load_in_background, name=f"semantic-cache-{self.service}",
+                                                daemon=True)
+                self._loader.start()
+        return False
+
+    def _load_in_background(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Semantic cache load failed for {self.service}: {e}")
+            # Let the next lookup retry
+            with self._lock:
+                self._loader = None
+
+    def _embed(self, text: str) -> np.ndarray:
+        with self._lock:
+            embedding = self._recent.get(text)
+            if embedding is not None:
+                self._recent.move_to_end(text)
+                return embedding
+        embedding = self.embedder.embed(text)
+        with self._lock:
+            self._recent[text] = embedding
+            if len(self._recent) > RECENT_EMBEDDINGS:
+                self._recent.popitem(last=False)
+        return embedding
+
+    def lookup(self, message: str, scope: str = "global") -> Optional[str]:
+        """Cached reply for a close enough earlier message, or None"""
+        if not self.enabled or detect(message):
+            return None
+        try:
+            if not self._ready():
+                self.misses += 1
+                return None
+            text = normalize(message)
+            with Stage(self.service, "semantic_cache_lookup"):
+                match = self.index.query(self._embed(text), f"{scope}#{polarity(text)}")
+            if match is not None:
+                entry_id, similarity, response, expires_at = match
+                if expires_at < time.time():
+                    self.index.delete([entry_id])
+                elif similarity >= self.threshold:
+                    self.hits += 1
+                    return response
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed for {self.service}: {e}")
+        self.misses += 1
+        return None
+
+    def store(self, message: str, response: str, scope: str = "global") -> None:
+        if not self.enabled or not response or detect(message):
+            return
+        try:
+            if not self._ready():
+                return
+            now = time.time()
+            text = normalize(message)
+            with Stage(self.service, "semantic_cache_store"):
+                self.index.add(uuid.uuid4().hex, self._embed(text), text, response, f"{scope}#{polarity(text)}",
+                               now + self.ttl)
+            self._writes += 1
+            if self._writes % MAINTENANCE_EVERY == 0:
+                self.index.purge_expired(now)
+                self.index.evict(self.max_entries)
+        except Exception as e:
+            logger.error(f"Semantic cache store failed for {self.service}: {e}")
@@ -0,0 +1,334 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# "memory" keeps state in-process (single worker); "sqlite" shares it between workers on one host
+STATE_STORE = os.getenv("STATE_STORE", "memory")
+STATE_STORE_PATH = Path(os.getenv("STATE_STORE_PATH", "state/state.sqlite3"))
+
+# Bound on distinct keys held by either store
+DEFAULT_MAX_KEYS = 50000
+# The SQLite store drops expired values and enforces its key bound every this many writes
+PRUNE_EVERY = 500
+# A key's last-written time is only refreshed this often (seconds); eviction order needs no finer grain
+TOUCH_INTERVAL = 60
+
+
+class StateStore(ABC):
+    """Per-session state: capped lists, counters and JSON values with optional expiry"""
+
+    # True when every worker sees the same state
+    shared = False
+
+    def append(self, key: str, value: Any, max_len: int) -> None:
+        self.extend(key, [value], max_len)
+
+    @abstractmethod
+    def extend(self, key: str, values: List[Any], max_len: int) -> None:
+        """Append to a list, keeping only its last max_len items"""
+
+    @abstractmethod
+    def tail(self, key: str, n: int) -> List[Any]:
+        """Last n list items, oldest first"""
+
+    @abstractmethod
+    def length(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, field: str, amount: int = 1) -> None:
+        ...
+
+    @abstractmethod
+    def counters(self, key: str) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def update(self, key: str, fn: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        """Atomically replace a value with fn(current value or None) and return the stored value
+
+        fn returning None leaves the value as it is. No other writer, in this process or another
+        worker, can interleave between the read and the write.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(StateStore):
+    """Process-local store; the default for a single worker"""
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lists: "OrderedDict[str, deque]" = OrderedDict()
+        self._counters: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._values: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, table: OrderedDict, key: str, factory):
+        item = table.get(key)
+        if item is None:
+            item = table[key] = factory()
+            if len(table) > self.max_keys:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return item
+
+    def extend(self, key, values, max_len):
+        with self._lock:
+            items = self._touch(self._lists, key, lambda: deque(maxlen=max_len))
+            items.extend(values)
+
+    def tail(self, key, n):
+        with self._lock:
+            items = self._lists.get(key)
+            return list(items)[-n:] if items and n > 0 else []
+
+    def length(self, key):
+        with self._lock:
+            return len(self._lists.get(key, ()))
+
+    def incr(self, key, field, amount=1):
+        with self._lock:
+            counts = self._touch(self._counters, key, dict)
+            counts[field] = counts.get(field, 0) + amount
+
+    def counters(self, key):
+        with self._lock:
+            return dict(self._counters.get(key, {}))
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._values[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def _set(self, key, value, ttl):
+        self._values[key] = (value, time.time() + ttl if ttl else None)
+        self._values.move_to_end(key)
+        if len(self._values) > self.max_keys:
+            self._values.popitem(last=False)
+
+    def update(self, key, fn, ttl=None):
+        with self._lock:
+            entry = self._values.get(key)
+            current = entry[0] if entry and (entry[1] is None or entry[1] >= time.time()) else None
+            value = fn(current)
+            if value is None:
+                return current
+            self._set(key, value, ttl)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._lists.pop(key, None)
+            self._counters.pop(key, None)
+            self._values.pop(key, None)
+
+
+class SQLiteStore(StateStore):
+    """Store in a local SQLite file (WAL), shared by every worker process on the host
+
+    Like MemoryStore it holds at most max_keys keys; the least recently written ones are pruned.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: Path, max_keys: int = DEFAULT_MAX_KEYS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_keys = max_keys
+        self._writes = 0
+        # key -> when this process last recorded a write to it
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS lists (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lists_key ON lists (key, id);
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value INTEGER NOT NULL,
+                PRIMARY KEY (key, field)
+            );
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_kv_expires ON kv (expires_at);
+            CREATE TABLE IF NOT EXISTS touched (
+                key TEXT PRIMARY KEY,
+                at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_touched_at ON touched (at);
+        """)
+        # Files written before keys were tracked: count their keys as written now
+        self._db.execute(
+            "INSERT OR IGNORE INTO touched (key, at) "
+            "SELECT key, ? FROM (SELECT key FROM lists UNION SELECT key FROM counters UNION SELECT key FROM kv)",
+            (time.time(),)
+        )
+        self._db.commit()
+
+    def _touch(self, key: str) -> None:
+        """Record a write to key (caller holds the lock, inside a transaction)"""
+        now = time.time()
+        if now - self._touched.get(key, 0.0) >= TOUCH_INTERVAL:
+            self._db.execute(
+                "INSERT INTO touched (key, at) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET at = excluded.at",
+                (key, now)
+            )
+            self._touched[key] = now
+            self._touched.move_to_end(key)
+            if len(self._touched) > self.max_keys:
+                self._touched.popitem(last=False)
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired values, then the least recently written keys beyond max_keys"""
+        now = time.time()
+        expired = [key for (key,) in self._db.execute(
+            "SELECT key FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        )]
+        self._db.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        self._db.executemany(
+            "DELETE FROM touched WHERE key = ? AND NOT EXISTS (SELECT 1 FROM lists WHERE key = ?) "
+            "AND NOT EXISTS (SELECT 1 FROM counters WHERE key = ?)",
+            [(key, key, key) for key in expired]
+        )
+        for key in expired:
+            self._touched.pop(key, None)
+        excess = self._db.execute("SELECT COUNT(*) FROM touched").fetchone()[0] - self.max_keys
+        if excess > 0:
+            oldest = self._db.execute("SELECT key FROM touched ORDER BY at LIMIT ?", (excess,)).fetchall()
+            for table in ("lists", "counters", "kv", "touched"):
+                self._db.executemany(f"DELETE FROM {table} WHERE key = ?", oldest)
+            for (key,) in oldest:
+                self._touched.pop(key, None)
+
+    def extend(self, key, values, max_len):
+        with self._lock, self._db:
+            self._db.executemany("INSERT INTO lists (key, value) VALUES (?, ?)",
+                                 [(key, json.dumps(value)) for value in values])
+            self._db.execute(
+                "DELETE FROM lists WHERE key = ? AND id <= "
+                "(SELECT id FROM lists WHERE key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (key, key, max_len)
+            )
+            self._touch(key)
+
+    def tail(self, key, n):
+        if n <= 0:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT value FROM lists WHERE key = ? ORDER BY id DESC LIMIT ?", (key, n)
+            ).fetchall()
+        return [json.loads(value) for (value,) in reversed(rows)]
+
+    def length(self, key):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM lists WHERE key = ?", (key,)).fetchone()[0]
+
+    def incr(self, key, field, amount=1):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO counters (key, field, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (key, field) DO UPDATE SET value = value + excluded.value",
+                (key, field, amount)
+            )
+            self._touch(key)
+
+    def counters(self, key):
+        with self._lock:
+            return dict(self._db.execute("SELECT field, value FROM counters WHERE key = ?", (key,)).fetchall())
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        with self._lock, self._db:
+            self._set(key, value, ttl)
+
+    def _set(self, key, value, ttl):
+        self._db.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None)
+        )
+        self._touch(key)
+
+    def update(self, key, fn, ttl=None):
+        with self._lock, self._db:
+            # Take the write lock before reading so other workers wait for this update
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            current = json.loads(row[0]) if row and (row[1] is None or row[1] >= time.time()) else None
+            value = fn(current)
+            if value is None:
+                return current
+            self._set(key, value, ttl)
+            return value
+
+    def delete(self, key):
+        with self._lock, self._db:
+            for table in ("lists", "counters", "kv", "touched"):
+                self._db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+            self._touched.pop(key, None)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_store(backend: str = STATE_STORE, path: Path = STATE_STORE_PATH) -> StateStore:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(path)
+    raise ValueError(f"Unknown STATE_STORE backend: {backend}")
+
+
+# One store per process, shared by every service module in it
+STATE = open_store()
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController
+
+
+async def hold(controller: AdmissionController, key: str, release: asyncio.Event, priority: bool = False):
+    async with controller.admit(key, priority=priority):
+        await release.wait()
+
+
+def test_burst_then_rate_limit():
+    async def scenario():
+        controller = AdmissionController(rate=0.01, burst=2, max_wait=0.1)
+        for _ in range(2):
+            async with controller.admit("user:a"):
+                pass
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.admit("user:a"):
+                pass
+        assert rejected.value.status_code == 429
+        assert int(rejected.value.headers["Retry-After"]) >= 1
+        # Other clients have their own bucket
+        async with controller.admit("user:b"):
+            pass
+        return controller.shed
+    assert asyncio.run(scenario()) == 1
+
+
+def test_short_waits_are_absorbed():
+    async def scenario():
+        controller = AdmissionController(rate=20, burst=1, max_wait=0.5)
+        for _ in range(3):
+            async with controller.admit("user:a"):
+                pass
+        return controller.shed
+    assert asyncio.run(scenario()) == 0
+
+
+def test_full_queue_sheds_with_429():
+    async def scenario():
+        controller = AdmissionController(rate=1000, burst=1000, max_wait=1.0, max_concurrent=1, max_queue=1)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, "user:a", release))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(hold(controller, "user:b", release))
+        await asyncio.sleep(0.01)
+        assert (controller.in_flight, controller.queued) == (1, 1)
+
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.admit("user:c"):
+                pass
+        assert rejected.value.status_code == 429
+
+        release.set()
+        await asyncio.gather(running, queued)
+        return controller.in_flight, controller.queued
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_queue_wait_times_out_with_429():
+    async def scenario():
+        controller = AdmissionController(rate=1000, burst=1000, max_wait=0.05, max_concurrent=1, max_queue=5)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, "user:a", release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.admit("user:b"):
+                pass
+        release.set()
+        await running
+        return rejected.value.status_code
+    assert asyncio.run(scenario()) == 429
+
+
+def test_priority_skips_bucket_and_queue():
+    async def scenario():
+        controller = AdmissionController(rate=0.01, burst=1, max_wait=0.01, max_concurrent=1, max_queue=0)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, "user:a", release))
+        await asyncio.sleep(0.01)
+        # Bucket empty and no slot free, yet the crisis request gets through
+        async with controller.admit("user:a", priority=True):
+            admitted = controller.in_flight
+        release.set()
+        await running
+        return admitted, controller.priority_admitted, controller.shed
+    assert asyncio.run(scenario()) == (2, 1, 0)
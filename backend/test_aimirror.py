@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import aimirror
+
+
+def test_ai_feedback_calls_groq_off_the_loop(monkeypatch):
+    def create(**kwargs):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        message = SimpleNamespace(content="You are doing well.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    completions = SimpleNamespace(create=create)
+    monkeypatch.setattr(aimirror, "groq_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    response = TestClient(aimirror.app).post("/get-ai-feedback", json={"emotion": "happy", "confidence": 0.9})
+    assert response.status_code == 200 and response.json()["feedback"] == "You are doing well."
+
+
+@pytest.mark.parametrize("session_id", ["x/face-1", "", "a b", "x" * 129])
+def test_session_ids_that_could_collide_are_rejected(session_id):
+    response = TestClient(aimirror.app).get("/emotion-trends", params={"session_id": session_id})
+    assert response.status_code == 422
+
+
+
+def tracker():
+    from state_store import MemoryStore
+    return aimirror.FaceTracker(MemoryStore(), max_distance=0.15, grace=3)
+
+
+def test_tracker_keeps_ids_as_faces_move_and_reorder():
+    faces = tracker()
+    assert faces.assign("s", np.array([[0.2, 0.5], [0.7, 0.5]]), now=0.0) == [1, 2]
+    # Detection order swapped and both faces drifted a little
+    assert faces.assign("s", np.array([[0.68, 0.52], [0.23, 0.49]]), now=0.1) == [2, 1]
+    # A third face joins
+    assert faces.assign("s", np.array([[0.25, 0.5], [0.45, 0.1], [0.66, 0.5]]), now=0.2) == [1, 3, 2]
+
+
+def test_tracker_retires_ids_after_the_grace_period():
+    faces = tracker()
+    faces.assign("s", np.array([[0.2, 0.5], [0.7, 0.5]]), now=0.0)
+    # Face 2 is briefly missed, then comes back within the grace period
+    assert faces.assign("s", np.array([[0.2, 0.5]]), now=1.0) == [1]
+    assert faces.assign("s", np.array([[0.2, 0.5], [0.7, 0.5]]), now=2.0) == [1, 2]
+    # Gone for longer than the grace period: a new ID, never a reused one
+    assert faces.assign("s", np.array([[0.2, 0.5]]), now=4.0) == [1]
+    assert faces.assign("s", np.array([[0.2, 0.5], [0.7, 0.5]]), now=6.0) == [1, 3]
+
+
+def test_tracker_sessions_are_independent():
+    faces = tracker()
+    assert faces.assign("a", np.array([[0.2, 0.5]]), now=0.0) == [1]
+    assert faces.assign("b", np.array([[0.8, 0.5]]), now=0.0) == [1]
+    # A face that jumped across the frame is a new face
+    assert faces.assign("a", np.array([[0.8, 0.5]]), now=0.1) == [2]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def test_submissions_within_the_window_share_one_call():
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher("test", process, max_size=16, max_wait=0.05)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_a_full_batch_flushes_without_waiting():
+    calls = []
+
+    async def process(items):
+        calls.append(list(items))
+        return items
+
+    async def scenario():
+        # A wait this long would time the test out if max_size did not trigger the flush
+        batcher = MicroBatcher("test", process, max_size=3, max_wait=60)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(6))), 5)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4, 5]
+    assert calls == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_a_failing_batch_fails_every_caller():
+    async def process(items):
+        raise RuntimeError("model crashed")
+
+    async def scenario():
+        batcher = MicroBatcher("test", process, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) and str(result) == "model crashed" for result in results)
+
+
+def test_a_wrong_result_count_is_an_error():
+    async def process(items):
+        return items[:-1]
+
+    async def scenario():
+        batcher = MicroBatcher("test", process, max_wait=0.01)
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    with pytest.raises(ValueError, match="expected 2 results, got 1"):
+        asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_break_the_batch():
+    async def process(items):
+        await asyncio.sleep(0.01)
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher("test", process, max_wait=0.01)
+        gone = asyncio.ensure_future(batcher.submit("gone"))
+        kept = asyncio.ensure_future(batcher.submit("kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        assert batcher.pending == 2
+        return await kept
+
+    assert asyncio.run(scenario()) == "kept"
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import chat
+
+
+def off_loop(result):
+    """Stand-in for a blocking call that fails if it runs on the event loop"""
+    def call(*args, **kwargs):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return result
+    return call
+
+
+def test_voice_input_runs_recognition_and_synthesis_off_the_loop(monkeypatch):
+    monkeypatch.setattr(chat, "transcribe", off_loop("I had a long day"))
+    monkeypatch.setattr(chat, "generate_mental_health_response", off_loop("That sounds tiring."))
+    monkeypatch.setattr(chat, "text_to_speech", off_loop("reply.mp3"))
+    response = TestClient(chat.app).post("/voice-input", files={"file": ("clip.wav", b"RIFF", "audio/wav")})
+    assert response.json() == {**response.json(), "transcribed_text": "I had a long day",
+                               "text_response": "That sounds tiring.", "audio_file_path": "reply.mp3"}
+
+
+def test_crisis_audio_is_synthesized_once_under_a_fixed_name(monkeypatch, tmp_path):
+    calls = []
+
+    class FakeTTS:
+        def __init__(self, text, lang, slow):
+            calls.append(text)
+
+        def save(self, path):
+            with open(path, "wb") as f:
+                f.write(b"mp3")
+
+    monkeypatch.setattr(chat, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(chat, "load_speech", lambda: None)
+    monkeypatch.setattr(chat, "gTTS", FakeTTS)
+    for _ in range(3):
+        # As after a restart: nothing cached in the process
+        monkeypatch.setattr(chat, "crisis_audio_file", None)
+        asyncio.run(chat.synthesize_crisis_audio())
+        assert chat.crisis_audio_file == chat.CRISIS_AUDIO_NAME
+    assert calls == [chat.CRISIS_RESPONSE]
+    assert [path.name for path in tmp_path.iterdir()] == [chat.CRISIS_AUDIO_NAME]
@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+
+from columnar import decode_columns, is_supported
+
+
+def decode(payload) -> dict:
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return decode_columns(body, "application/json")
+
+
+def mood(emotion, intensity=None) -> dict:
+    return {"mood": {"date": [f"2024-01-{i + 1:02d}" for i in range(len(emotion))], "emotion": emotion,
+                     "intensity": intensity if intensity is not None else [5] * len(emotion)}}
+
+
+def test_integer_codes_stay_integers():
+    series = decode(mood([1, 2, 3]))
+    assert series["mood"]["emotion"].dtype == np.int64
+    assert series["mood"]["intensity"].dtype == float
+
+
+def test_whole_float_codes_become_integers():
+    emotion = decode(mood([1.0, 2.0]))["mood"]["emotion"]
+    assert emotion.dtype == np.int64 and emotion.tolist() == [1, 2]
+
+
+def test_labels_stay_strings():
+    assert decode(mood(["happy", "sad"]))["mood"]["emotion"].tolist() == ["happy", "sad"]
+
+
+def test_missing_series_are_empty():
+    series = decode(mood(["happy"]))
+    assert len(series["sleep"]["hours"]) == 0 and len(series["focus"]["score"]) == 0
+
+
+@pytest.mark.parametrize("emotion", [[1.5, 2], [2, 0.25], [float("nan"), 1.0]])
+def test_non_integral_codes_are_rejected(emotion):
+    with pytest.raises(ValueError, match="integers"):
+        decode(mood(emotion))
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([1, 2, 3], "object of series"),
+    ({"mood": [1, 2]}, "parallel arrays"),
+    ({"mood": {"emotion": "happy"}}, "must be an array"),
+    ({"mood": {"date": ["2024-01-01", "2024-01-02"], "emotion": ["happy"]}}, "mismatched lengths"),
+    ({"mood": {"intensity": ["high"]}}, "could not convert"),
+])
+def test_malformed_payloads_are_rejected(payload, message):
+    with pytest.raises(ValueError, match=message):
+        decode(payload)
+
+
+def test_invalid_json_is_a_value_error():
+    with pytest.raises(ValueError):
+        decode(b"{not json")
+
+
+def test_supported_types():
+    assert is_supported("application/json; charset=utf-8")
+    assert not is_supported("text/csv")
+
+
+@pytest.mark.parametrize("payload", [
+    # Values without dates
+    {"mood": {"emotion": ["happy", "sad"], "intensity": [5, 6]}},
+    {"sleep": {"hours": [7.5, 8.0]}},
+    # A short optional column is still a mismatch
+    {"mood": {"date": ["2024-01-01", "2024-01-02"], "emotion": ["happy", "sad"], "intensity": [5]}},
+    # Dates without values
+    {"focus": {"date": ["2024-01-01"]}},
+])
+def test_every_column_must_cover_every_row(payload):
+    with pytest.raises(ValueError, match="mismatched lengths"):
+        decode(payload)
+
+
+def test_intensity_may_be_omitted():
+    mood = decode({"mood": {"date": ["2024-01-01", "2024-01-02"], "emotion": ["happy", "sad"]}})["mood"]
+    assert len(mood["emotion"]) == 2 and len(mood["intensity"]) == 0
+
+
+def arrow_body(columns: dict) -> bytes:
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow_rows_follow_each_series_null_mask():
+    body = arrow_body({
+        "date": ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"],
+        "emotion": ["happy", None, "sad", "calm"],
+        "intensity": [5, 6, None, 7],
+        "sleep_hours": [7.0, None, 8.0, None],
+        "focus_score": [None, None, None, 9.0],
+    })
+    series = decode_columns(body, "application/vnd.apache.arrow.stream")
+    assert series["mood"]["date"].tolist() == ["2024-01-01", "2024-01-03", "2024-01-04"]
+    assert series["mood"]["emotion"].tolist() == ["happy", "sad", "calm"]
+    np.testing.assert_array_equal(series["mood"]["intensity"], [5.0, np.nan, 7.0])
+    assert series["sleep"]["date"].tolist() == ["2024-01-01", "2024-01-03"]
+    assert series["focus"]["date"].tolist() == ["2024-01-04"] and series["focus"]["score"].tolist() == [9.0]
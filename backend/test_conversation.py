@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+from conversation import ConversationStore, estimate_tokens
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(tmp_path / "conversations.sqlite3", max_users=2)
+    yield store
+    store.close()
+
+
+def turn(role, content):
+    return {"role": role, "content": content}
+
+
+def seqs(store, user_id):
+    return [seq for (seq,) in store._db.execute("SELECT seq FROM turns WHERE user_id = ? ORDER BY seq", (user_id,))]
+
+
+def test_seqs_are_contiguous_per_user(store):
+    store.add_turns("a", [turn("user", "hi"), turn("assistant", "hello")])
+    store.add_turns("b", [turn("user", "hey")])
+    store.add_turns("a", [turn("user", "again")])
+    assert seqs(store, "a") == [0, 1, 2]
+    assert seqs(store, "b") == [0]
+
+
+def test_workers_sharing_the_file_never_reuse_a_seq(tmp_path):
+    # Two stores on one file stand in for two worker processes
+    path = tmp_path / "conversations.sqlite3"
+    stores = [ConversationStore(path), ConversationStore(path)]
+
+    def write(store):
+        for i in range(50):
+            store.add_turns("shared", [turn("user", f"q{i}"), turn("assistant", f"a{i}")])
+
+    threads = [threading.Thread(target=write, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seqs(stores[0], "shared") == list(range(200))
+    for store in stores:
+        store.close()
+
+
+def test_lru_evicts_the_oldest_user_but_keeps_their_turns(store):
+    for user_id in ("a", "b", "c"):
+        store.add_turns(user_id, [turn("user", f"from {user_id}")])
+    assert list(store._cache) == ["b", "c"]
+
+    misses = store.cache_misses
+    assert store.build_context("a")["recent"] == [turn("user", "from a")]
+    assert store.cache_misses == misses + 1
+    assert list(store._cache) == ["c", "a"]
+
+
+def test_context_keeps_the_newest_turns_within_budget(store):
+    turns = [turn("user" if i % 2 == 0 else "assistant", f"message {i} " * 10) for i in range(10)]
+    store.add_turns("a", turns)
+    budget = 3 * estimate_tokens(turns[-1]["content"])
+
+    context = store.build_context("a", budget=budget)
+    # The last three turns fit, but the window must not open on the assistant reply at index 7
+    assert context["recent"] == turns[8:]
+    assert [t["content"] for t in context["pending"]] == [t["content"] for t in turns[:8]]
+
+
+def test_summary_refresh_folds_pending_turns(store):
+    store.add_turns("a", [turn("user", "x" * 400), turn("assistant", "y" * 400), turn("user", "latest")])
+    seen = []
+
+    async def summarizer(previous, turns):
+        seen.append((previous, turns))
+        return "they talked about x and y"
+
+    async def scenario():
+        pending = store.build_context("a", budget=10)["pending"]
+        store.schedule_summary_refresh("a", pending, summarizer)
+        # A second refresh while one is running is skipped
+        store.schedule_summary_refresh("a", pending, summarizer)
+        await asyncio.sleep(0)
+        while store._refreshing:
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert len(seen) == 1 and seen[0][0] == ""
+    context = store.build_context("a")
+    assert context["summary"] == "they talked about x and y"
+    assert context["recent"] == [turn("user", "latest")] and context["pending"] == []
+
+    # The summary survives a cold start
+    store._cache.clear()
+    assert store.build_context("a")["summary"] == "they talked about x and y"
+
+
+def test_clear_forgets_everything(store):
+    store.add_turns("a", [turn("user", "hi")])
+    store.clear("a")
+    assert store.build_context("a") == {"summary": "", "recent": [], "pending": []}
+    assert seqs(store, "a") == []
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from crisis import CRISIS_RESPONSE, FollowupStore, detect, is_crisis
+from state_store import MemoryStore
+
+
+@pytest.mark.parametrize("message, phrase", [
+    ("I want to kill myself", "kill myself"),
+    ("I WANT TO DIE", "want to die"),
+    ("I don't want to live anymore", "dont want to live"),
+    ("I don’t want to be alive", "dont want to be alive"),
+    ("Nobody cares. I want to end it all", "end it all"),
+    ("I keep cutting myself", "cutting myself"),
+    ("I'm not ok, I want to die", "want to die"),
+    ("I'm not sad but I want to die", "want to die"),
+    ("I almost killed myself last night", "killed myself"),
+    ("I just want to end it all", "end it all"),
+    ("I don't want to be here anymore", "dont want to be here anymore"),
+    # A negator that doesn't govern the phrase must not suppress it
+    ("no, i really want to die", "want to die"),
+    ("no i really want to die", "want to die"),
+    ("not gonna lie i want to die", "want to die"),
+    ("Not going to lie, I want to kill myself", "kill myself"),
+    ("I'm not ok i want to die", "want to die"),
+    ("No suicidal thoughts? I have them every day", "suicidal"),
+])
+def test_crisis_phrases_are_detected(message, phrase):
+    assert phrase in [match["phrase"] for match in detect(message)]
+
+
+@pytest.mark.parametrize("message", [
+    "I'm not suicidal",
+    "I would never hurt myself",
+    "I dont want to die",
+    "I'm not going to hurt myself",
+    "I'm not feeling suicidal",
+    "I have no suicidal thoughts",
+    "I had a rough day at work",
+    # Phrases only match whole words
+    "my skills are improving",
+    "",
+    None,
+])
+def test_non_crisis_messages(message):
+    assert not is_crisis(message)
+
+
+def test_categories():
+    categories = {match["category"] for match in detect("I want to die and I keep hurting myself")}
+    assert categories == {"suicidal", "self_harm"}
+
+
+def test_negation_does_not_cross_clauses():
+    assert detect("I'm not sure. I want to kill myself")
+
+
+def run_followup(produce):
+    async def scenario():
+        followups = FollowupStore(MemoryStore())
+        followup_id = followups.start(produce)
+        assert followups.get(followup_id) == {"status": "pending"}
+        await asyncio.gather(*followups._tasks)
+        return followups.get(followup_id)
+    return asyncio.run(scenario())
+
+
+def test_followup_stores_the_elaboration():
+    async def produce():
+        return "elaboration"
+    assert run_followup(produce) == {"status": "ready", "text_response": "elaboration"}
+
+
+def test_failed_followup_falls_back_to_the_crisis_response():
+    async def produce():
+        raise RuntimeError("upstream down")
+    assert run_followup(produce) == {"status": "ready", "text_response": CRISIS_RESPONSE}
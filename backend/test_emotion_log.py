@@ -0,0 +1,64 @@
+import asyncio
+import sqlite3
+
+from emotion_log import EmotionLog
+
+
+def entry(user_id: str, day: int, emotion: str = "happy") -> dict:
+    return {"user_id": user_id, "emotion": emotion, "intensity": 5, "timestamp": f"2024-01-{day:02d}T09:00:00",
+            "notes": None}
+
+
+def stored_rows(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM emotions").fetchone()[0]
+
+
+def test_flush_commits_everything_appended(tmp_path):
+    async def scenario():
+        log = EmotionLog(tmp_path / "emotions.sqlite3", flush_interval=10)
+        await log.append([entry("a", day) for day in range(1, 6)])
+        await log.flush()
+        pending = log.pending
+        await log.close()
+        return pending
+    assert asyncio.run(scenario()) == 0
+    assert stored_rows(tmp_path / "emotions.sqlite3") == 5
+
+
+def test_recent_includes_unflushed_entries_in_order(tmp_path):
+    async def scenario():
+        log = EmotionLog(tmp_path / "emotions.sqlite3", flush_interval=10)
+        await log.append([entry("a", 1, "sad"), entry("b", 2)])
+        await log.flush()
+        await log.append([entry("a", 3, "calm"), entry("a", 2, "happy")])
+        recent = await log.recent("a")
+        await log.close()
+        return recent
+    recent = asyncio.run(scenario())
+    assert [r["emotion"] for r in recent] == ["sad", "happy", "calm"]
+
+
+def test_close_commits_the_buffer(tmp_path):
+    async def scenario():
+        # Long interval and big batch: nothing would be written before close()
+        log = EmotionLog(tmp_path / "emotions.sqlite3", batch_size=1000, flush_interval=60)
+        await log.append([entry("a", day) for day in range(1, 4)])
+        await log.close()
+    asyncio.run(scenario())
+    assert stored_rows(tmp_path / "emotions.sqlite3") == 3
+
+
+def test_full_batch_triggers_a_write(tmp_path):
+    async def scenario():
+        log = EmotionLog(tmp_path / "emotions.sqlite3", batch_size=10, flush_interval=60)
+        await log.append([entry("a", 1 + day % 28) for day in range(10)])
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not log.pending:
+                break
+        pending = log.pending
+        await log.close()
+        return pending
+    assert asyncio.run(scenario()) == 0
+    assert stored_rows(tmp_path / "emotions.sqlite3") == 10
@@ -0,0 +1,41 @@
+import numpy as np
+
+from emotions import EMOTION_TABLE, EMOTIONS, SYNONYMS, TAGS, UNKNOWN_CODE, EmotionRegistry
+
+
+def test_logged_moods_score_by_exact_label():
+    assert EMOTIONS.scores_for(["happy", "Sad", "JOYFUL", "fine"]).tolist() == [8, 2, 10, 5]
+    # Synonyms, misspellings and facial-only classes score as unknown moods always have
+    assert EMOTIONS.scores_for(["good", "hapy", "fearful", "surprised", "whatever", ""]).tolist() == [5] * 6
+
+
+def test_codes_and_scores_agree():
+    codes = EMOTIONS.codes_for(["calm", "calm", "anxious"], exact=True)
+    assert EMOTIONS.labels_for(codes).tolist() == ["calm", "calm", "anxious"]
+    np.testing.assert_array_equal(EMOTIONS.scores_for(codes), EMOTIONS.scores_for(["calm", "calm", "anxious"]))
+
+
+def test_free_text_uses_synonyms_and_near_misses():
+    assert EMOTIONS.code("good") == EMOTIONS.codes["happy"]
+    assert EMOTIONS.code("burnt out") == EMOTIONS.codes["exhausted"]
+    assert EMOTIONS.code("anxous") == EMOTIONS.codes["anxious"]
+    assert EMOTIONS.code("anxous", fuzzy=False) == UNKNOWN_CODE
+    assert EMOTIONS.labels_for(EMOTIONS.match_text("Feeling burnt out and a bit nervous")).tolist() == \
+        ["anxious", "exhausted"]
+
+
+def test_categories_leave_out_facial_classes():
+    grouped = EMOTIONS.by_category()
+    listed = [label for labels in grouped.values() for label in labels]
+    assert "surprised" not in listed and "fearful" not in listed
+    assert len(listed) == len(EMOTIONS) - 2
+    assert grouped["neutral"] == ["neutral", "okay", "fine"]
+
+
+def test_registries_keep_separate_memos():
+    first = EmotionRegistry(EMOTION_TABLE, SYNONYMS, TAGS)
+    second = EmotionRegistry(EMOTION_TABLE, SYNONYMS, TAGS)
+    first.code("anxous")
+    first.code("anxous")
+    assert (first.hits, first.misses) == (1, 1)
+    assert (second.hits, second.misses) == (0, 0)
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+
+from forecast import MAX_SCORE, MIN_SCORE, MoodForecaster, forecast_many
+
+
+def weekly_series(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return np.clip(5.5 + 2 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.3, n), 1, 10)
+
+
+def assert_same_state(a: MoodForecaster, b: MoodForecaster) -> None:
+    for field in MoodForecaster.STATE_FIELDS:
+        np.testing.assert_allclose(getattr(a, field), getattr(b, field), err_msg=field)
+
+
+def test_constant_history_forecasts_the_constant():
+    result = MoodForecaster().fit([6.0] * 28).forecast(7)
+    np.testing.assert_allclose(result["mean"], 6.0)
+
+
+def test_intervals_bracket_the_mean_and_stay_in_range():
+    result = MoodForecaster().fit(weekly_series(60)).forecast(30, level=0.9)
+    assert result["mean"].shape == (1, 30)
+    assert np.all(result["lower"] <= result["mean"]) and np.all(result["mean"] <= result["upper"])
+    assert result["lower"].min() >= MIN_SCORE and result["upper"].max() <= MAX_SCORE
+
+
+def test_intervals_widen_with_the_horizon_and_the_level():
+    model = MoodForecaster().fit(weekly_series(60))
+    narrow, wide = model.forecast(14, level=0.5), model.forecast(14, level=0.95)
+    assert np.all(wide["upper"] - wide["lower"] >= narrow["upper"] - narrow["lower"])
+    spread = (model.forecast(14)["upper"] - model.forecast(14)["mean"])[0]
+    assert spread[-1] > spread[0]
+
+
+def test_weekly_season_is_learned():
+    history = weekly_series(70)
+    mean = MoodForecaster().fit(history).forecast(7)["mean"][0]
+    # Next week should peak and dip on the same weekdays as the history
+    expected_phase = np.sin(2 * np.pi * np.arange(70, 77) / 7)
+    assert np.corrcoef(mean, expected_phase)[0, 1] > 0.9
+
+
+def test_scalar_fit_matches_vectorized_update():
+    history = weekly_series(40)
+    single = MoodForecaster().fit(history)
+    vectorized = MoodForecaster(n_series=2).fit(np.vstack([history, history]))
+    for field in MoodForecaster.STATE_FIELDS:
+        np.testing.assert_allclose(getattr(single, field)[0], getattr(vectorized, field)[1], err_msg=field)
+
+
+def test_state_round_trip_continues_where_it_left_off():
+    history = weekly_series(50)
+    whole = MoodForecaster().fit(history)
+
+    first = MoodForecaster().fit(history[:30])
+    # Through JSON, as the state store keeps it
+    restored = MoodForecaster.from_state(json.loads(json.dumps(first.to_state())))
+    assert_same_state(first, restored)
+    restored.fit(history[30:])
+
+    assert_same_state(whole, restored)
+    np.testing.assert_allclose(whole.forecast(7)["mean"], restored.forecast(7)["mean"])
+
+
+def test_nan_entries_are_skipped():
+    history = weekly_series(30)
+    with_gaps = history.copy()
+    with_gaps[[3, 17]] = np.nan
+    assert_same_state(MoodForecaster().fit(with_gaps), MoodForecaster().fit(np.delete(history, [3, 17])))
+
+
+def test_forecast_many_matches_per_series_models():
+    series = [weekly_series(35, seed=1), weekly_series(12, seed=2), weekly_series(20, seed=3)]
+    result = forecast_many(series, 7, 0.8)
+    for i, values in enumerate(series):
+        alone = MoodForecaster().fit(values).forecast(7, 0.8)
+        for key in ("mean", "lower", "upper"):
+            np.testing.assert_allclose(result[key][i], alone[key][0], err_msg=f"{key}[{i}]")
+
+
+@pytest.mark.parametrize("days", [1, 7, 90])
+def test_forecast_shape(days):
+    result = forecast_many([weekly_series(10), weekly_series(20)], days)
+    assert all(result[key].shape == (2, days) for key in ("mean", "lower", "upper"))
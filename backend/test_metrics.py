@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import CONTENT_TYPE, REGISTRY, Registry, instrument, stage_timer, track_cache, track_queue
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/x")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 2.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = Registry()
+    assert registry.counter("hits_total", "Hits") is registry.counter("hits_total", "Hits")
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("errors_total", "Errors", ("message",)).inc(1, 'bad "quote"\n')
+    assert 'errors_total{message="bad \\"quote\\"\\n"} 1' in registry.render()
+
+
+def sample(name: str, **labels) -> float:
+    text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{text}}} "
+    for line in REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_stage_timer_counts_time_and_errors():
+    stage = stage_timer("test-metrics")
+    with stage("ok"):
+        pass
+    with pytest.raises(RuntimeError):
+        with stage("boom"):
+            raise RuntimeError("failed")
+
+    assert sample("mindmesh_stage_duration_seconds_count", service="test-metrics", stage="ok") == 1
+    assert sample("mindmesh_stage_duration_seconds_count", service="test-metrics", stage="boom") == 1
+    assert sample("mindmesh_stage_errors_total", service="test-metrics", stage="ok") == 0
+    assert sample("mindmesh_stage_errors_total", service="test-metrics", stage="boom") == 1
+
+
+def test_tracked_gauges_are_read_at_scrape_time():
+    stats = [3, 1]
+    depth = [0]
+    track_cache("test-metrics", lambda: tuple(stats))
+    track_queue("test-metrics", "jobs", lambda: depth[0])
+
+    assert sample("mindmesh_cache_hit_ratio", cache="test-metrics") == 0.75
+    assert sample("mindmesh_cache_lookups", cache="test-metrics") == 4
+    depth[0] = 7
+    assert sample("mindmesh_queue_depth", service="test-metrics", queue="jobs") == 7
+
+
+def test_a_failing_callback_drops_only_its_sample():
+    track_queue("test-metrics", "broken", lambda: 1 / 0)
+    track_queue("test-metrics", "healthy", lambda: 2)
+    text = REGISTRY.render()
+    assert 'queue="broken"' not in text
+    assert sample("mindmesh_queue_depth", service="test-metrics", queue="healthy") == 2
+
+
+def test_instrumented_app_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    instrument(app, "test-metrics-app")
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert sample("mindmesh_request_duration_seconds_count", service="test-metrics-app", method="GET",
+                  route="/items/{item_id}", status=200) == 2
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import mood
+from state_store import MemoryStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mood, "STATE", MemoryStore())
+    return TestClient(mood.app)
+
+
+def history(n: int) -> list:
+    emotions = ["happy", "sad", "calm", "anxious", "excited", "tired", "content"]
+    # Two entries per day, so same-day entries are part of every history
+    return [{"date": f"2024-01-{1 + i // 2:02d}", "emotion": emotions[i % 7], "intensity": 5} for i in range(n)]
+
+
+def forecast(client, entries, user_id=None) -> list:
+    params = {"days": 7, **({"user_id": user_id} if user_id else {})}
+    response = client.post("/api/forecast", params=params, json={"moodData": entries})
+    assert response.status_code == 200
+    return [point["score"] for point in response.json()["forecast"]]
+
+
+def test_user_forecast_matches_the_anonymous_one(client):
+    entries = history(30)
+    assert forecast(client, entries, "u1") == forecast(client, entries)
+
+
+def test_repeat_requests_fold_in_only_new_entries(client):
+    entries = history(40)
+    forecast(client, entries[:25], "u1")
+    assert forecast(client, entries, "u1") == forecast(client, entries)
+    # Same history again: nothing to fold in
+    assert forecast(client, entries, "u1") == forecast(client, entries)
+
+
+def test_edited_history_is_refit(client):
+    entries = history(30)
+    forecast(client, entries, "u1")
+    edited = [dict(entry) for entry in entries]
+    edited[3]["emotion"] = "angry"
+    assert forecast(client, edited, "u1") == forecast(client, edited)
+    # A shorter history is refit too
+    assert forecast(client, entries[:10], "u1") == forecast(client, entries[:10])
+
+
+def test_batch_reports_short_histories(client):
+    response = client.post("/api/forecast/batch", json={"users": {"a": history(10), "b": history(1)}})
+    body = response.json()
+    assert list(body["forecasts"]) == ["a"] and body["errors"] == {"b": "Need at least 2 mood entries"}
+    assert np.allclose([point["score"] for point in body["forecasts"]["a"]], forecast(client, history(10)))
+
+
+def test_timeline_rejects_a_series_with_mismatched_lengths(monkeypatch):
+    monkeypatch.setattr(mood, "decode_columns", lambda body, content_type: {
+        "mood": {"date": np.array(["2024-01-01", "2024-01-02"]), "emotion": np.array(["happy"])},
+        "sleep": {"date": np.array([]), "hours": np.array([])},
+        "focus": {"date": np.array([]), "score": np.array([])},
+    })
+    response = TestClient(mood.app).post("/api/timeline/columnar", content=b"{}",
+                                         headers={"content-type": "application/json"})
+    assert response.status_code == 400 and "'mood' has 2 dates but 1 values" in response.json()["detail"]
+
+
+def test_timeline_buckets_every_series(client):
+    response = client.post("/api/timeline", params={"bucket": "week"}, json={
+        "moodData": history(14),
+        "sleepData": [{"date": "2024-01-01", "hours": 7, "quality": "good"}],
+        "focusData": [],
+    })
+    body = response.json()
+    assert response.status_code == 200 and set(body["series"]) == {"mood", "sleep"}
+    # Two entries a day for 2024-01-01 (a Monday) to 2024-01-07: one week
+    assert body["series"]["mood"]["buckets"] == 1
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+from semantic_cache import HashingEmbedder, MemoryIndex, SemanticCache, polarity, normalize
+
+
+class FixedEmbedder:
+    """Unit vectors at chosen angles, so similarities are exact"""
+
+    default_threshold = 0.8
+
+    def __init__(self, angles):
+        self.angles = angles
+
+    def embed(self, text):
+        angle = self.angles[text]
+        return np.array([np.cos(angle), np.sin(angle)], dtype=np.float32)
+
+
+def loaded_cache(embedder, **kwargs) -> SemanticCache:
+    cache = SemanticCache("test", enabled=True, **kwargs)
+    cache.embedder, cache.index = embedder, MemoryIndex()
+    return cache
+
+
+@pytest.mark.parametrize("similarity, hit", [(0.95, True), (0.81, True), (0.79, False), (0.2, False)])
+def test_hit_only_at_or_above_the_threshold(similarity, hit):
+    cache = loaded_cache(FixedEmbedder({"i sleep badly": 0.0, "sleep is hard lately": np.arccos(similarity)}))
+    cache.store("I sleep badly", "Try a wind-down routine.")
+    assert (cache.lookup("Sleep is hard lately") == "Try a wind-down routine.") is hit
+    assert (cache.hits, cache.misses) == (int(hit), int(not hit))
+
+
+def test_negated_message_never_gets_the_opposite_reply():
+    # Identical embeddings: only the polarity words tell the two apart
+    cache = loaded_cache(FixedEmbedder({"i'm anxious": 0.0, "i'm not anxious anymore": 0.0}))
+    cache.store("I'm anxious", "Let's slow your breathing down.")
+    assert cache.lookup("I'm not anxious anymore") is None
+    assert cache.lookup("I’m anxious") == "Let's slow your breathing down."
+
+
+def test_scopes_are_separate():
+    cache = loaded_cache(HashingEmbedder())
+    cache.store("I feel low today", "reply for a sad mood", scope="u1|mood=sad")
+    assert cache.lookup("I feel low today", scope="u1|mood=sad") == "reply for a sad mood"
+    assert cache.lookup("I feel low today", scope="u1|mood=happy") is None
+    assert cache.lookup("I feel low today", scope="u2|mood=sad") is None
+
+
+def test_expired_entries_miss():
+    cache = loaded_cache(HashingEmbedder(), ttl=-1)
+    cache.store("I feel low today", "reply")
+    assert cache.lookup("I feel low today") is None
+
+
+def test_crisis_messages_bypass_the_cache():
+    cache = loaded_cache(HashingEmbedder())
+    cache.store("I want to die", "reply")
+    assert cache.lookup("I want to die") is None
+    assert cache.hits == cache.misses == 0
+
+
+def test_first_lookup_does_not_wait_for_the_model(monkeypatch):
+    import semantic_cache
+
+    def slow_embedder():
+        time.sleep(0.5)
+        return HashingEmbedder()
+
+    monkeypatch.setattr(semantic_cache, "load_embedder", slow_embedder)
+    cache = SemanticCache("test", enabled=True)
+    start = time.perf_counter()
+    assert cache.lookup("I feel low today") is None
+    assert time.perf_counter() - start < 0.25
+    cache._loader.join()
+    cache.store("I feel low today", "reply")
+    assert cache.lookup("I feel low today") == "reply"
+
+
+def test_polarity_words():
+    assert polarity(normalize("I'm not anxious anymore")) == "anymore not"
+    assert polarity(normalize("I don’t feel good")) == polarity(normalize("I don't feel good")) == "dont"
+    assert polarity(normalize("I want to go out")) == ""
+
+
+def test_wellness_scope_includes_the_mood_context():
+    from wellness import UserState, cache_scope
+
+    def state(mood):
+        return UserState(user_id="u1", current_mood=mood, xp_points=0, streak_days=0, last_activity="")
+
+    calm, stressed = state("calm"), state("stressed")
+    analysis = {"total_entries": 3, "trend": "declining", "dominant_emotion": "sad", "avg_intensity": 8.0}
+    assert cache_scope(calm, {}) != cache_scope(stressed, {})
+    assert cache_scope(calm, {}) != cache_scope(calm, analysis)
+    assert cache_scope(calm, analysis) != cache_scope(calm, {**analysis, "trend": "improving"})
+    # Small intensity changes stay in one band
+    assert cache_scope(calm, analysis) == cache_scope(calm, {**analysis, "avg_intensity": 7.4})
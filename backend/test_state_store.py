@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from state_store import MemoryStore, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**kwargs):
+        store = MemoryStore(**kwargs) if request.param == "memory" else SQLiteStore(tmp_path / "state.sqlite3", **kwargs)
+        stores.append(store)
+        return store
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_update_reads_and_writes_atomically(make_store):
+    first = make_store()
+    # Two handles on one SQLite file stand in for two workers
+    second = make_store() if first.shared else first
+
+    def bump(store):
+        for _ in range(200):
+            store.update("n", lambda current: (current or 0) + 1)
+
+    threads = [threading.Thread(target=bump, args=(store,)) for store in (first, second, first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert first.get("n") == 800
+
+
+def test_update_returning_none_keeps_the_value(make_store):
+    store = make_store()
+    store.set("k", {"v": 1})
+    assert store.update("k", lambda current: None) == {"v": 1}
+    assert store.update("missing", lambda current: None) is None
+    assert store.get("missing") is None
+
+
+def test_lists_keep_their_tail(make_store):
+    store = make_store()
+    store.extend("l", [1, 2, 3], max_len=4)
+    store.extend("l", [4, 5], max_len=4)
+    assert store.tail("l", 10) == [2, 3, 4, 5]
+    assert store.tail("l", 2) == [4, 5] and store.tail("l", 0) == []
+    assert store.length("l") == 4
+
+
+def test_counters_values_and_delete(make_store):
+    store = make_store()
+    store.incr("c", "happy")
+    store.incr("c", "happy", 2)
+    store.incr("c", "sad")
+    assert store.counters("c") == {"happy": 3, "sad": 1}
+    store.set("v", {"a": [1, 2]})
+    assert store.get("v") == {"a": [1, 2]}
+    for key in ("c", "v"):
+        store.delete(key)
+    assert store.counters("c") == {} and store.get("v", "gone") == "gone"
+
+
+def test_values_expire(make_store):
+    store = make_store()
+    store.set("short", 1, ttl=-1)
+    store.set("long", 2, ttl=3600)
+    assert store.get("short") is None and store.get("long") == 2
+
+
+def test_memory_store_evicts_the_oldest_keys():
+    store = MemoryStore(max_keys=3)
+    for i in range(5):
+        store.set(f"k{i}", i)
+        store.append(f"l{i}", i, max_len=10)
+    assert [store.get(f"k{i}") for i in range(5)] == [None, None, 2, 3, 4]
+    assert [store.length(f"l{i}") for i in range(5)] == [0, 0, 1, 1, 1]
+
+
+def test_sqlite_store_prunes_to_max_keys(tmp_path, monkeypatch):
+    import state_store
+
+    monkeypatch.setattr(state_store, "PRUNE_EVERY", 10)
+    store = SQLiteStore(tmp_path / "state.sqlite3", max_keys=5)
+    store.set("expired", 0, ttl=-1)
+    for i in range(30):
+        store.set(f"k{i}", i)
+        store.append(f"l{i}", i, max_len=10)
+        store.incr(f"c{i}", "n")
+    tables = {table: store._db.execute(f"SELECT COUNT(DISTINCT key) FROM {table}").fetchone()[0]
+              for table in ("kv", "lists", "counters", "touched")}
+    store.close()
+    # Pruning runs every 10 writes, so at most 9 keys beyond the bound survive between passes
+    assert all(count <= 5 + 9 for count in tables.values()), tables
+    assert tables["touched"] == sum(tables[t] for t in ("kv", "lists", "counters"))
+
+    reopened = SQLiteStore(tmp_path / "state.sqlite3", max_keys=5)
+    assert reopened.get("expired") is None and reopened.get("k29") == 29 and reopened.get("k0") is None
+    reopened.close()
+
+
+def test_incomplete_backend_fails_at_construction():
+    from state_store import StateStore
+
+    class ListsOnly(StateStore):
+        def extend(self, key, values, max_len):
+            pass
+
+    with pytest.raises(TypeError):
+        ListsOnly()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from timeline import aggregate, build_series, lttb
+
+
+def test_lttb_keeps_everything_below_the_threshold():
+    x = np.arange(10)
+    assert lttb(x, x, 10).tolist() == list(range(10))
+    assert lttb(x, x, 50).tolist() == list(range(10))
+    # Fewer than 3 points can't form triangles
+    assert lttb(x, x, 2).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize("n, threshold", [(100, 3), (100, 10), (1000, 37), (11, 10)])
+def test_lttb_keeps_both_endpoints_and_threshold_points(n, threshold):
+    rng = np.random.default_rng(0)
+    keep = lttb(np.arange(n), rng.normal(size=n), threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(500)
+    y[123] = 10.0
+    assert 123 in lttb(np.arange(500), y, 20)
+
+
+def test_aggregate_by_week_starts_on_monday():
+    # 2024-01-01 was a Monday
+    stats = aggregate(["2024-01-01", "2024-01-07", "2024-01-08"], [2, 4, 9], "week")
+    assert np.datetime_as_string(stats["date"]).tolist() == ["2024-01-01", "2024-01-08"]
+    assert stats["mean"].tolist() == [3.0, 9.0]
+    assert stats["min"].tolist() == [2.0, 9.0] and stats["max"].tolist() == [4.0, 9.0]
+    assert stats["count"].tolist() == [2, 1]
+
+
+def test_build_series_downsamples_but_reports_all_buckets():
+    dates = (np.datetime64("2024-01-01") + np.arange(365)).astype(str)
+    series = build_series(dates, np.sin(np.arange(365) / 10) * 4 + 5, "day", points=50)
+    assert len(series["date"]) == 50 and series["buckets"] == 365
+    assert series["date"][0] == "2024-01-01" and series["date"][-1] == "2024-12-30"
@@ -0,0 +1,72 @@
+import wellness
+from state_store import MemoryStore
+from tips import RECENT_TIPS_PER_USER, TIP_FIELDS, TipIndex
+
+
+class CountingStore(MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def extend(self, key, values, max_len):
+        self.writes += 1
+        super().extend(key, values, max_len)
+
+
+def index(catalog) -> TipIndex:
+    return TipIndex(catalog, store=CountingStore())
+
+
+def tip(tip_id, **fields):
+    return {"id": tip_id, "type": "break", "title": tip_id, "description": "", "duration_minutes": 5, **fields}
+
+
+CATALOG = [
+    tip("breathe", moods=["tag:stress"], weight=2.0),
+    tip("walk", moods=["tag:stress"], trends=["concerning"]),
+    tip("journal", moods=["sad"], bands=["low"]),
+    tip("stretch", trends=["neutral"], default=True),
+    tip("music", moods=["happy"], default=True),
+]
+
+
+def titles(tips):
+    return [t["title"] for t in tips]
+
+
+def test_ranking_follows_mood_trend_and_band():
+    tips = index(CATALOG)
+    assert titles(tips.recommend("stressed", "concerning", 5.0)) == ["walk", "breathe"]
+    assert titles(tips.recommend("sad", "neutral", 2.0, limit=2)) == ["journal", "stretch"]
+    # Nothing matches: the default tips
+    assert titles(tips.recommend("bored", "positive", 5.0)) == ["stretch", "music"]
+
+
+def test_recent_tips_rotate_per_user():
+    tips = index(CATALOG)
+    assert titles(tips.recommend("stressed", "neutral", 5.0, user_id="u1", limit=2)) == ["breathe", "walk"]
+    # The one unseen match first, topped up with the best already-seen one
+    assert titles(tips.recommend("stressed", "neutral", 5.0, user_id="u1", limit=2)) == ["stretch", "breathe"]
+    assert titles(tips.recommend("stressed", "neutral", 5.0, user_id="u2", limit=2)) == ["breathe", "walk"]
+
+
+def test_unchanged_tips_are_not_rewritten():
+    tips = index(CATALOG)
+    # Only two candidates and a limit of two: the same tips every time
+    for _ in range(5):
+        assert titles(tips.recommend("bored", "positive", 5.0, user_id="u1", limit=2)) == ["stretch", "music"]
+    assert tips.store.writes == 1
+    tips.recommend("sad", "neutral", 2.0, user_id="u1", limit=2)
+    assert tips.store.writes == 2
+    assert len(tips.store.tail("tips:recent:u1", 10)) <= RECENT_TIPS_PER_USER
+
+
+def test_fallback_tips_have_the_catalog_shape(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(wellness.TIP_INDEX, "recommend", broken)
+    state = wellness.UserState(user_id="u1", current_mood="calm", xp_points=0, streak_days=0, last_activity="")
+    fallback = wellness.generate_wellness_tips(state, {})
+    assert all(isinstance(t, dict) and tuple(t) == TIP_FIELDS for t in fallback)
+    assert all(tuple(t) == TIP_FIELDS for t in wellness.TIP_INDEX.tips)
@@ -0,0 +1,99 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+BUCKETS = ("raw", "day", "week", "month")
+
+
+def to_days(dates) -> np.ndarray:
+    """ISO date/datetime strings -> datetime64[D]"""
+    return np.asarray(dates, dtype="datetime64[s]").astype("datetime64[D]")
+
+
+def bucket_starts(days: np.ndarray, bucket: str) -> np.ndarray:
+    """Start date of the bucket each day falls in (weeks start on Monday)"""
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if bucket == "week":
+        # 1970-01-01 was a Thursday, so shift by 3 days to floor onto Mondays
+        offset = (days.astype(np.int64) + 3) % 7
+        return days - offset.astype("timedelta64[D]")
+    return days
+
+
+def aggregate(dates, values, bucket: str = "day") -> Dict[str, np.ndarray]:
+    """Vectorized group-by: mean/min/max/count of values per date bucket"""
+    values = np.asarray(values, dtype=float)
+    if not values.size:
+        empty = np.zeros(0)
+        return {"date": np.zeros(0, dtype="datetime64[D]"), "mean": empty, "min": empty, "max": empty,
+                "count": np.zeros(0, dtype=np.int64)}
+
+    days = to_days(dates)
+    if bucket == "raw":
+        order = np.argsort(days, kind="stable")
+        return {"date": days[order], "mean": values[order], "min": values[order], "max": values[order],
+                "count": np.ones(values.size, dtype=np.int64)}
+
+    keys, inverse = np.unique(bucket_starts(days, bucket), return_inverse=True)
+    counts = np.bincount(inverse, minlength=keys.size)
+    sums = np.bincount(inverse, weights=values, minlength=keys.size)
+
+    # Sort by bucket once so min/max are contiguous segment reductions
+    order = np.argsort(inverse, kind="stable")
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return {
+        "date": keys,
+        "mean": sums / counts,
+        "min": np.minimum.reduceat(sorted_values, starts),
+        "max": np.maximum.reduceat(sorted_values, starts),
+        "count": counts,
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices of the kept points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Interior points split into threshold - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def build_series(dates, values, bucket: str = "day", points: Optional[int] = None) -> Dict[str, list]:
+    """Aggregate one series and optionally LTTB-downsample it to `points` buckets"""
+    stats = aggregate(dates, values, bucket)
+    total = len(stats["mean"])
+    if points and total > points:
+        keep = lttb(stats["date"].astype(np.int64), stats["mean"], points)
+        stats = {name: column[keep] for name, column in stats.items()}
+
+    return {
+        "date": np.datetime_as_string(stats["date"], unit="D").tolist(),
+        "mean": np.round(stats["mean"], 3).tolist(),
+        "min": stats["min"].tolist(),
+        "max": stats["max"].tolist(),
+        "count": stats["count"].tolist(),
+        "buckets": total,
+    }
@@ -0,0 +1,105 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from emotions import EMOTIONS, UNKNOWN_CODE
+from state_store import STATE, StateStore
+
+TIPS_PATH = Path(__file__).resolve().parent / "wellness_tips.json"
+
+# Score contributed by each kind of match
+MOOD_WEIGHT = 2.0
+TREND_WEIGHT = 1.5
+BAND_WEIGHT = 1.0
+
+# How many recently shown tips to skip per user
+RECENT_TIPS_PER_USER = 6
+
+TIP_FIELDS = ("type", "title", "description", "duration_minutes")
+
+
+def intensity_band(avg_intensity: float) -> str:
+    if avg_intensity < 4:
+        return "low"
+    if avg_intensity <= 6.5:
+        return "mid"
+    return "high"
+
+
+class TipIndex:
+    """Tip catalog with inverted indexes on mood code, trend and intensity band"""
+
+    def __init__(self, catalog: List[Dict], store: StateStore = STATE):
+        self.ids = [tip["id"] for tip in catalog]
+        # Response-ready dicts, built once
+        self.tips = [{field: tip[field] for field in TIP_FIELDS} for tip in catalog]
+        self.base = np.array([tip.get("weight", 1.0) for tip in catalog])
+        self.defaults = np.array([i for i, tip in enumerate(catalog) if tip.get("default")], dtype=np.int64)
+
+        postings: Dict[Tuple[str, object], List[int]] = {}
+        for i, tip in enumerate(catalog):
+            for term in tip.get("moods", []):
+                labels = EMOTIONS.tagged(term[4:]) if term.startswith("tag:") else [term]
+                for label in labels:
+                    postings.setdefault(("mood", EMOTIONS.codes[label]), []).append(i)
+            for trend in tip.get("trends", []):
+                postings.setdefault(("trend", trend), []).append(i)
+            for band in tip.get("bands", []):
+                postings.setdefault(("band", band), []).append(i)
+        self.postings = {key: np.unique(ids) for key, ids in postings.items()}
+
+        # Recently shown tip ids per user, shared between workers through the state store
+        self.store = store
+        self.ranked = lru_cache(maxsize=4096)(self._ranked)
+
+    @classmethod
+    def load(cls, path: Path = TIPS_PATH) -> "TipIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _ranked(self, mood_codes: Tuple[int, ...], trend: str, band: str) -> Tuple[int, ...]:
+        """Tip ids ordered by match score for one (mood codes, trend, band) key; cached"""
+        scores = np.zeros(len(self.tips))
+        for code in mood_codes:
+            posting = self.postings.get(("mood", code))
+            if posting is not None:
+                scores[posting] += MOOD_WEIGHT
+        for key, weight in ((("trend", trend), TREND_WEIGHT), (("band", band), BAND_WEIGHT)):
+            posting = self.postings.get(key)
+            if posting is not None:
+                scores[posting] += weight
+
+        candidates = np.flatnonzero(scores > 0)
+        if not candidates.size:
+            candidates = self.defaults
+        total = scores[candidates] + self.base[candidates]
+        return tuple(candidates[np.argsort(-total, kind="stable")].tolist())
+
+    def recommend(self, mood: Optional[str], trend: str, avg_intensity: float,
+                  user_id: Optional[str] = None, limit: int = 3) -> List[Dict]:
+        """Top tips for the user's state, skipping ones this user saw recently"""
+        codes = EMOTIONS.match_text(mood or "neutral")
+        ranked = self.ranked(tuple(int(c) for c in codes if c != UNKNOWN_CODE), trend, intensity_band(avg_intensity))
+
+        recent_key = f"tips:recent:{user_id}"
+        shown = self.store.tail(recent_key, RECENT_TIPS_PER_USER) if user_id else []
+        recent = set(shown)
+        if recent:
+            fresh = [i for i in ranked if self.ids[i] not in recent]
+            # Top up with already-seen tips when the fresh list runs short
+            picked = (fresh + [i for i in ranked if self.ids[i] in recent])[:limit]
+        else:
+            picked = list(ranked[:limit])
+
+        picked_ids = [self.ids[i] for i in picked]
+        # Showing the same tips again leaves the history as it is, so skip the store write
+        if user_id and shown[-len(picked_ids):] != picked_ids:
+            self.store.extend(recent_key, picked_ids, RECENT_TIPS_PER_USER)
+        return [self.tips[i] for i in picked]
+
+
+# Loaded once at import
+TIP_INDEX = TipIndex.load()
@@ -1,20 +1,68 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import os
+from pathlib import Path
 from datetime import datetime, timedelta
 import asyncio
-from groq import Groq
+import json
+import time
+from contextlib import asynccontextmanager
 import uvicorn
 import logging
 
+from admission import AdmissionController, client_key
+from crisis import CRISIS_RESPONSE, FollowupStore, detect
+from conversation import SUMMARY_TOKEN_BUDGET, ConversationStore
+from emotion_log import EmotionLog
+from llm import get_groq_client, shared_clients
+from metrics import STAGE_SECONDS, instrument, record_tokens, stage_timer, track_cache, track_queue
+from profiling import enable_profiling
+from readiness import WARMUP_ON_STARTUP, Readiness
+from semantic_cache import SEMANTIC_CACHE, SemanticCache
+from state_store import STATE
+from tips import TIP_INDEX
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Local persistence for conversation memory and the emotion log
+DATA_DIR = Path(os.getenv("WELLNESS_DATA_DIR", "wellness_data"))
+# With a shared state store (several workers) skip the per-process LRU so every read sees other workers' turns
+conversation_store = ConversationStore(DATA_DIR / "conversations.sqlite3", max_users=0 if STATE.shared else 1000)
+emotion_log = EmotionLog(DATA_DIR / "emotions.sqlite3")
+
+# Per-client admission control in front of the Groq calls
+admission = AdmissionController()
+
+# LLM elaborations that follow an immediate crisis response
+followups = FollowupStore()
+# Replies are personalised, so cached ones are only reused for the same user in the same mood context
+response_cache = SemanticCache("wellness")
+
+stage = stage_timer("wellness")
+track_queue("wellness", "admission_queued", lambda: admission.queued)
+track_queue("wellness", "admission_in_flight", lambda: admission.in_flight)
+track_queue("wellness", "emotion_log_pending", lambda: emotion_log.pending)
+track_cache("conversation_memory", lambda: (conversation_store.cache_hits, conversation_store.cache_misses))
+track_cache("wellness_tips", lambda: TIP_INDEX.ranked.cache_info()[:2])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with shared_clients():
+        if WARMUP_ON_STARTUP and SEMANTIC_CACHE:
+            readiness.warm("semantic_cache", response_cache.load)
+        yield
+        # Commit anything still buffered before the process exits
+        await emotion_log.close()
+        conversation_store.close()
+
 # Initialize FastAPI app
-app = FastAPI(title="AI Mental Wellness Chat API", version="1.0.0")
+app = FastAPI(title="AI Mental Wellness Chat API", version="1.0.0", lifespan=lifespan)
 
 # Enhanced CORS middleware
 app.add_middleware(
@@ -25,9 +73,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request histograms, per-stage timers and /metrics
+instrument(app, "wellness")
+# Opt-in per-request sampling profiler (PROFILE_SAMPLE_RATE / PROFILE_TOKEN)
+enable_profiling(app, "wellness")
+
+# Warms the semantic cache's embedding model; tips and SQLite load at import
+readiness = Readiness("wellness")
+
 # Initialize Groq client with error handling
 try:
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY", "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"))
+    groq_client = get_groq_client()
     logger.info("Groq client initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize Groq client: {e}")
@@ -39,6 +95,7 @@ class EmotionData(BaseModel):
     intensity: int  # 1-10
     timestamp: str
     notes: Optional[str] = None
+    user_id: Optional[str] = None
 
 class UserState(BaseModel):
     user_id: str
@@ -52,6 +109,10 @@ class ChatMessage(BaseModel):
     user_state: UserState
     emotion_history: List[EmotionData] = []
 
+class EmotionImport(BaseModel):
+    user_id: str
+    emotions: List[EmotionData]
+
 class WellnessTip(BaseModel):
     type: str  # meditation, journaling, break, exercise
     title: str
@@ -78,6 +139,31 @@ Your tone should be:
 Keep responses concise but meaningful (2-4 sentences). Focus on being helpful and supportive based on the user's current emotional state.
 """
 
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and Luna, a mental wellness companion.
+Merge the previous summary with the new messages into one concise third-person summary.
+Keep the user's recurring feelings, stressors, goals and anything Luna suggested. Max 120 words.
+"""
+
+async def summarize_conversation(previous_summary: str, turns: List[Dict[str, str]]) -> str:
+    """Fold older turns into the rolling summary (runs in the background)"""
+    if not groq_client:
+        return ""
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    with stage("groq_summary"):
+        completion = await asyncio.to_thread(
+            groq_client.chat.completions.create,
+            model="llama3-8b-8192",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Previous summary: {previous_summary or 'None'}\n\nNew messages:\n{transcript}"}
+            ],
+            temperature=0.2,
+            max_tokens=SUMMARY_TOKEN_BUDGET
+        )
+    record_tokens("wellness", completion.usage)
+    return completion.choices[0].message.content.strip()
+
 def analyze_emotion_trends(emotion_history: List[EmotionData]) -> Dict[str, Any]:
     """Analyze user's emotion patterns with better error handling"""
     if not emotion_history:
@@ -127,116 +213,164 @@ def analyze_emotion_trends(emotion_history: List[EmotionData]) -> Dict[str, Any]
             "total_entries": len(emotion_history) if emotion_history else 0
         }
 
-def generate_wellness_tips(user_state: UserState, emotion_analysis: Dict) -> List[WellnessTip]:
-    """Generate personalized wellness tips based on user state"""
-    tips = []
-    
+def generate_wellness_tips(user_state: UserState, emotion_analysis: Dict) -> List[Dict]:
+    """Pick personalized wellness tips from the indexed tip catalog"""
     try:
-        mood = user_state.current_mood.lower() if user_state.current_mood else "neutral"
-        trend = emotion_analysis.get("trend", "neutral")
-        avg_intensity = emotion_analysis.get("avg_intensity", 5.0)
-        
-        if trend == "concerning" or avg_intensity < 4:
-            tips.extend([
-                WellnessTip(
-                    type="meditation",
-                    title="Gentle Breathing Exercise",
-                    description="Take 5 minutes for deep breathing. Inhale for 4, hold for 4, exhale for 6.",
-                    duration_minutes=5
-                ),
-                WellnessTip(
-                    type="journaling",
-                    title="Emotion Check-in",
-                    description="Write about what you're feeling right now. No judgment, just awareness.",
-                    duration_minutes=10
-                )
-            ])
-        
-        if any(word in mood for word in ["stress", "anxious", "worried", "overwhelmed"]):
-            tips.append(WellnessTip(
-                type="break",
-                title="Progressive Muscle Relaxation",
-                description="Tense and release each muscle group for 5 seconds, starting from your toes.",
-                duration_minutes=15
-            ))
-        
-        if any(word in mood for word in ["happy", "excited", "energetic", "positive"]):
-            tips.append(WellnessTip(
-                type="exercise",
-                title="Energy Channel Activity",
-                description="Use this positive energy! Try a short walk, dance, or creative activity.",
-                duration_minutes=20
-            ))
-        
-        if not tips:  # Default tips
-            tips.extend([
-                WellnessTip(
-                    type="meditation",
-                    title="Mindful Moment",
-                    description="Take 3 deep breaths and notice 3 things you can see, hear, and feel.",
-                    duration_minutes=3
-                ),
-                WellnessTip(
-                    type="journaling",
-                    title="Gratitude Practice",
-                    description="Write down 3 things you're grateful for today, no matter how small.",
-                    duration_minutes=5
-                )
-            ])
-        
-        return tips[:3]  # Limit to 3 tips
+        return TIP_INDEX.recommend(
+            user_state.current_mood,
+            emotion_analysis.get("trend", "neutral"),
+            emotion_analysis.get("avg_intensity", 5.0),
+            user_id=user_state.user_id
+        )
         
     except Exception as e:
         logger.error(f"Error generating wellness tips: {e}")
+        # Plain dicts, like the catalog's tips
         return [
             WellnessTip(
                 type="meditation",
                 title="Simple Breathing",
                 description="Take a moment to breathe deeply and center yourself.",
                 duration_minutes=3
-            )
+            ).model_dump()
         ]
 
-async def get_ai_response(message: str, user_state: UserState, emotion_history: List[EmotionData]) -> str:
+AI_UNAVAILABLE_REPLY = "I'm here to support you! While my AI features are temporarily unavailable, I want you to know that your feelings are valid. How can I help you process what you're experiencing? 💜"
+AI_ERROR_REPLY = "I'm here to support you! While I'm having a small technical hiccup, I want you to know that your feelings matter. Take a deep breath - you're doing great by reaching out. 💜"
+
+def build_ai_messages(message: str, user_state: UserState, emotion_analysis: Dict[str, Any]) -> tuple:
+    """Chat messages for Groq plus the memory window they were built from"""
+    # Build context more safely
+    context_parts = [
+        f"User Message: {message}",
+        f"Current Mood: {user_state.current_mood if user_state.current_mood else 'Not specified'}",
+    ]
+    
+    if emotion_analysis.get("total_entries", 0) > 0:
+        context_parts.extend([
+            f"Emotion Trend: {emotion_analysis.get('trend', 'neutral')}",
+            f"Recent Dominant Emotion: {emotion_analysis.get('dominant_emotion', 'unknown')}",
+            f"Average Intensity: {emotion_analysis.get('avg_intensity', 5.0)}/10"
+        ])
+    
+    context = "\n".join(context_parts)
+    
+    # Earlier turns come from server-side memory, not the client payload
+    memory = conversation_store.build_context(user_state.user_id)
+    messages = [{"role": "system", "content": WELLNESS_AI_PERSONALITY}]
+    if memory["summary"]:
+        messages.append({"role": "system", "content": f"Summary of earlier conversation: {memory['summary']}"})
+    messages.extend(memory["recent"])
+    messages.append({"role": "user", "content": context})
+    return messages, memory
+
+def cache_scope(user_state: UserState, emotion_analysis: Dict[str, Any]) -> str:
+    """Semantic cache scope: the user plus the mood context the reply was generated for"""
+    parts = [user_state.user_id, f"mood={user_state.current_mood or '-'}"]
+    if emotion_analysis.get("total_entries", 0) > 0:
+        intensity = float(emotion_analysis.get("avg_intensity", 5.0))
+        band = "low" if intensity < 4 else "high" if intensity >= 7 else "mid"
+        parts += [f"trend={emotion_analysis.get('trend', 'neutral')}",
+                  f"dominant={emotion_analysis.get('dominant_emotion', 'unknown')}", f"intensity={band}"]
+    return "|".join(parts)
+
+def remember_exchange(user_state: UserState, message: str, reply: str, memory: Dict) -> None:
+    conversation_store.add_turns(user_state.user_id, [
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": reply}
+    ])
+    conversation_store.schedule_summary_refresh(user_state.user_id, memory["pending"], summarize_conversation)
+
+async def get_ai_response(message: str, user_state: UserState, emotion_history: List[EmotionData],
+                          emotion_analysis: Optional[Dict[str, Any]] = None) -> str:
     """Get AI response using Groq API with better error handling"""
     try:
         if not groq_client:
-            return "I'm here to support you! While my AI features are temporarily unavailable, I want you to know that your feelings are valid. How can I help you process what you're experiencing? 💜"
+            return CRISIS_RESPONSE if detect(message) else AI_UNAVAILABLE_REPLY
         
-        emotion_analysis = analyze_emotion_trends(emotion_history)
-        
-        # Build context more safely
-        context_parts = [
-            f"User Message: {message}",
-            f"Current Mood: {user_state.current_mood if user_state.current_mood else 'Not specified'}",
-        ]
+        if emotion_analysis is None:
+            emotion_analysis = analyze_emotion_trends(emotion_history)
+        messages, memory = build_ai_messages(message, user_state, emotion_analysis)
+        scope = cache_scope(user_state, emotion_analysis)
         
-        if emotion_analysis.get("total_entries", 0) > 0:
-            context_parts.extend([
-                f"Emotion Trend: {emotion_analysis.get('trend', 'neutral')}",
-                f"Recent Dominant Emotion: {emotion_analysis.get('dominant_emotion', 'unknown')}",
-                f"Average Intensity: {emotion_analysis.get('avg_intensity', 5.0)}/10"
-            ])
+        cached = await asyncio.to_thread(response_cache.lookup, message, scope)
+        if cached:
+            remember_exchange(user_state, message, cached, memory)
+            return cached
         
-        context = "\n".join(context_parts)
-        
-        messages = [
-            {"role": "system", "content": WELLNESS_AI_PERSONALITY},
-            {"role": "user", "content": context}
-        ]
-        
-        completion = groq_client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=300
-        )
+        with stage("groq"):
+            # Off the event loop, so admission can see concurrent requests and shed load
+            completion = await asyncio.to_thread(
+                groq_client.chat.completions.create,
+                model="llama3-8b-8192",
+                messages=messages,
+                temperature=0.7,
+                max_tokens=300
+            )
+        record_tokens("wellness", completion.usage)
         
-        return completion.choices[0].message.content.strip()
+        reply = completion.choices[0].message.content.strip()
+        remember_exchange(user_state, message, reply, memory)
+        await asyncio.to_thread(response_cache.store, message, reply, scope)
+        return reply
         
     except Exception as e:
         logger.error(f"Error getting AI response: {e}")
-        return "I'm here to support you! While I'm having a small technical hiccup, I want you to know that your feelings matter. Take a deep breath - you're doing great by reaching out. 💜"
+        # Crisis follow-ups must keep the crisis guidance, never the generic hiccup reply
+        if detect(message):
+            return CRISIS_RESPONSE
+        return AI_ERROR_REPLY
+
+async def stream_ai_response(message: str, user_state: UserState, emotion_analysis: Dict[str, Any]) -> AsyncIterator[str]:
+    """Yield Luna's reply in pieces as Groq generates them"""
+    if not groq_client:
+        yield AI_UNAVAILABLE_REPLY
+        return
+    
+    parts = []
+    stream = None
+    start = time.perf_counter()
+    try:
+        messages, memory = build_ai_messages(message, user_state, emotion_analysis)
+        scope = cache_scope(user_state, emotion_analysis)
+        cached = await asyncio.to_thread(response_cache.lookup, message, scope)
+        if cached:
+            remember_exchange(user_state, message, cached, memory)
+            yield cached
+            return
+        with stage("groq_stream"):
+            stream = await asyncio.to_thread(
+                groq_client.chat.completions.create,
+                model="llama3-8b-8192",
+                messages=messages,
+                temperature=0.7,
+                max_tokens=300,
+                stream=True
+            )
+            # The SDK stream is synchronous; pull each chunk off the event loop
+            chunks = iter(stream)
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                record_tokens("wellness", getattr(getattr(chunk, "x_groq", None), "usage", None))
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if not parts:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, "wellness", "groq_first_token")
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        logger.error(f"Error streaming AI response: {e}")
+        if not parts:
+            yield AI_ERROR_REPLY
+        return
+    finally:
+        if stream is not None:
+            stream.close()
+    
+    reply = "".join(parts).strip()
+    if reply:
+        remember_exchange(user_state, message, reply, memory)
+        await asyncio.to_thread(response_cache.store, message, reply, scope)
 
 # API Endpoints
 
@@ -260,62 +394,174 @@ async def health_check():
         }
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe"""
+    return await readiness.endpoint()
+
 @app.post("/chat")
-async def chat_with_ai(chat_data: ChatMessage):
+async def chat_with_ai(chat_data: ChatMessage, request: Request):
     """Main chat endpoint - simplified and focused"""
-    try:
-        logger.info(f"Chat request from user: {chat_data.user_state.user_id}")
+    key = client_key(request, chat_data.user_state.user_id)
+    # Local check before any LLM call; crisis messages are answered without waiting on the upstream
+    crisis = bool(detect(chat_data.message))
+    async with admission.admit(key, priority=crisis):
+        try:
+            logger.info(f"Chat request from user: {chat_data.user_state.user_id}")
         
-        # Get AI response
-        ai_response = await get_ai_response(
-            chat_data.message, 
-            chat_data.user_state, 
-            chat_data.emotion_history
-        )
+            # Fall back to the server-side log when the client doesn't ship its history
+            if not chat_data.emotion_history:
+                chat_data.emotion_history = [
+                    EmotionData(**entry) for entry in await emotion_log.recent(chat_data.user_state.user_id)
+                ]
         
-        # Generate wellness tips
-        emotion_analysis = analyze_emotion_trends(chat_data.emotion_history)
-        wellness_tips = generate_wellness_tips(chat_data.user_state, emotion_analysis)
+            # Computed once and shared by the prompt, the tips and the response
+            emotion_analysis = analyze_emotion_trends(chat_data.emotion_history)
         
-        response = {
-            "ai_response": ai_response,
-            "wellness_tips": wellness_tips,
-            "emotion_analysis": emotion_analysis,
-            "timestamp": datetime.now().isoformat(),
-            "success": True
-        }
+            if crisis:
+                return crisis_reply(chat_data, key, emotion_analysis)
+        
+            # Get AI response
+            ai_response = await get_ai_response(
+                chat_data.message, 
+                chat_data.user_state, 
+                chat_data.emotion_history,
+                emotion_analysis
+            )
         
-        logger.info(f"Chat response sent successfully to user: {chat_data.user_state.user_id}")
-        return response
+            # Generate wellness tips
+            wellness_tips = generate_wellness_tips(chat_data.user_state, emotion_analysis)
         
-    except Exception as e:
-        logger.error(f"Error processing chat: {str(e)}")
-        return {
-            "ai_response": "I'm here to support you, even though I'm experiencing some technical difficulties. Your mental wellness journey matters, and I encourage you to keep taking care of yourself. 💜",
-            "wellness_tips": [
-                WellnessTip(
-                    type="meditation",
-                    title="Simple Breathing",
-                    description="Take 3 deep breaths to center yourself right now.",
-                    duration_minutes=2
-                )
-            ],
-            "emotion_analysis": {
-                "trend": "neutral",
-                "dominant_emotion": "unknown",
-                "avg_intensity": 5.0,
-                "total_entries": 0
-            },
+            response = {
+                "ai_response": ai_response,
+                "wellness_tips": wellness_tips,
+                "emotion_analysis": emotion_analysis,
+                "timestamp": datetime.now().isoformat(),
+                "success": True
+            }
+        
+            logger.info(f"Chat response sent successfully to user: {chat_data.user_state.user_id}")
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error processing chat: {str(e)}")
+            return {
+                "ai_response": "I'm here to support you, even though I'm experiencing some technical difficulties. Your mental wellness journey matters, and I encourage you to keep taking care of yourself. 💜",
+                "wellness_tips": [
+                    WellnessTip(
+                        type="meditation",
+                        title="Simple Breathing",
+                        description="Take 3 deep breaths to center yourself right now.",
+                        duration_minutes=2
+                    ).model_dump()
+                ],
+                "emotion_analysis": {
+                    "trend": "neutral",
+                    "dominant_emotion": "unknown",
+                    "avg_intensity": 5.0,
+                    "total_entries": 0
+                },
+                "timestamp": datetime.now().isoformat(),
+                "success": False,
+                "error": "Technical issue occurred"
+            }
+
+def start_crisis_followup(chat_data: ChatMessage, key: str, emotion_analysis: Dict[str, Any]) -> str:
+    """Generate the personalised reply in the background; returns the id to poll"""
+    async def elaborate():
+        async with admission.admit(key, priority=True):
+            return await get_ai_response(chat_data.message, chat_data.user_state, chat_data.emotion_history,
+                                         emotion_analysis)
+
+    logger.warning(f"Crisis language detected for user: {chat_data.user_state.user_id}")
+    return followups.start(elaborate)
+
+def crisis_reply(chat_data: ChatMessage, key: str, emotion_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Immediate crisis response; the personalised reply is generated in the background"""
+    return {
+        "ai_response": CRISIS_RESPONSE,
+        "wellness_tips": generate_wellness_tips(chat_data.user_state, {**emotion_analysis, "trend": "concerning"}),
+        "emotion_analysis": emotion_analysis,
+        "crisis": True,
+        "followup_id": start_crisis_followup(chat_data, key, emotion_analysis),
+        "timestamp": datetime.now().isoformat(),
+        "success": True
+    }
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@app.post("/chat/stream")
+async def chat_with_ai_stream(chat_data: ChatMessage, request: Request):
+    """Streaming chat (server-sent events): analysis and tips first, then Luna's reply as it is generated
+
+    Events: `analysis` {emotion_analysis, wellness_tips, crisis}, then `token` {text} chunks,
+    then `done` {ai_response, ...}; `error` {detail, retry_after} if the request is rate limited.
+    """
+    key = client_key(request, chat_data.user_state.user_id)
+    crisis = bool(detect(chat_data.message))
+    logger.info(f"Streaming chat request from user: {chat_data.user_state.user_id}")
+
+    if not chat_data.emotion_history:
+        chat_data.emotion_history = [
+            EmotionData(**entry) for entry in await emotion_log.recent(chat_data.user_state.user_id)
+        ]
+    emotion_analysis = analyze_emotion_trends(chat_data.emotion_history)
+    tips_analysis = {**emotion_analysis, "trend": "concerning"} if crisis else emotion_analysis
+    wellness_tips = generate_wellness_tips(chat_data.user_state, tips_analysis)
+
+    async def events():
+        yield sse_event("analysis", {
+            "emotion_analysis": emotion_analysis,
+            "wellness_tips": wellness_tips,
+            "crisis": crisis
+        })
+
+        if crisis:
+            followup_id = start_crisis_followup(chat_data, key, emotion_analysis)
+            yield sse_event("token", {"text": CRISIS_RESPONSE})
+            yield sse_event("done", {
+                "ai_response": CRISIS_RESPONSE,
+                "crisis": True,
+                "followup_id": followup_id,
+                "timestamp": datetime.now().isoformat(),
+                "success": True
+            })
+            return
+
+        parts = []
+        try:
+            # Only the LLM part needs an upstream slot; analysis and tips went out already
+            async with admission.admit(key):
+                async for text in stream_ai_response(chat_data.message, chat_data.user_state, emotion_analysis):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail, "retry_after": (e.headers or {}).get("Retry-After")})
+            return
+
+        yield sse_event("done", {
+            "ai_response": "".join(parts).strip(),
             "timestamp": datetime.now().isoformat(),
-            "success": False,
-            "error": "Technical issue occurred"
-        }
+            "success": True
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/chat/followup/{followup_id}")
+async def chat_followup(followup_id: str):
+    """Poll for the personalised reply that follows a crisis response"""
+    result = followups.get(followup_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Follow-up not found")
+    return result
 
-# Simple endpoints for testing (no data persistence)
 @app.post("/emotions")
-async def log_emotion_simple(emotion: EmotionData):
-    """Simple emotion logging endpoint (no persistence)"""
+async def log_emotion(emotion: EmotionData):
+    """Log an emotion entry (buffered and group-committed to the local emotion log)"""
     try:
+        await emotion_log.append([{**emotion.model_dump(), "user_id": emotion.user_id or "anonymous"}])
         logger.info(f"Emotion logged: {emotion.emotion} with intensity {emotion.intensity}")
         return {
             "message": "Emotion received successfully",
@@ -326,6 +572,27 @@ async def log_emotion_simple(emotion: EmotionData):
         logger.error(f"Error processing emotion: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing emotion: {str(e)}")
 
+@app.post("/emotions/bulk")
+async def import_emotions(data: EmotionImport):
+    """Bulk-import a user's emotion history in one batch"""
+    try:
+        count = await emotion_log.append([{**e.model_dump(), "user_id": data.user_id} for e in data.emotions])
+        return {"imported": count, "timestamp": datetime.now().isoformat(), "success": True}
+    except Exception as e:
+        logger.error(f"Error importing emotions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error importing emotions: {str(e)}")
+
+@app.get("/emotions/{user_id}")
+async def get_recent_emotions(user_id: str, limit: int = Query(20, ge=1, le=500)):
+    """Most recent emotion entries for a user, oldest first"""
+    return {"user_id": user_id, "emotions": await emotion_log.recent(user_id, limit)}
+
+@app.delete("/conversations/{user_id}")
+async def clear_conversation(user_id: str):
+    """Forget a user's stored conversation memory"""
+    conversation_store.clear(user_id)
+    return {"message": "Conversation cleared", "success": True}
+
 # Handle CORS preflight requests
 @app.options("/{full_path:path}")
 async def options_handler():